@@ -0,0 +1,158 @@
+import asyncio
+import aiohttp
+
+from concurrent.futures import Executor
+
+from app import metrics
+from app.game import Game
+from app.scraper import BlszScraper
+from app.http_client import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+from app.parsers import DEFAULT_PARSER
+
+
+def parse_games(
+    team_schedule_url: str,
+    content: bytes,
+    parser: str = DEFAULT_PARSER,
+    year_filter: int = None,
+    max_results: int = 100,
+) -> list[Game]:
+    """Extracts the games from a downloaded team schedule page.
+
+    Module level function, so it can be sent to a ProcessPoolExecutor too.
+
+    :param team_schedule_url: The URL the page was downloaded from
+    :param content: The body of the team schedule page
+    :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+    :param year_filter: Year to filter the games by, defaults to None
+    :param max_results: Max results count, defaults to 100
+    :return: A list of Game objects
+    """
+
+    scraper = BlszScraper.from_content(team_schedule_url, content, parser=parser)
+    return scraper.fetch_games(year_filter=year_filter, max_results=max_results)
+
+
+class AsyncBlszScraper:
+    """Class for scraping many team schedule pages concurrently in one event loop"""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_POOL_SIZE,
+        parser: str = DEFAULT_PARSER,
+        session: aiohttp.ClientSession = None,
+        executor: Executor = None,
+    ) -> None:
+        """Initializes the AsyncBlszScraper object
+
+        :param max_concurrency: Max number of pages downloaded at the same time, defaults to DEFAULT_POOL_SIZE
+        :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+        :param session: aiohttp session to use, one is opened on enter if not set, defaults to None
+        :param executor: Executor running the CPU bound parsing, defaults to the event loop's
+            default thread pool; pass a ProcessPoolExecutor to parse on several cores
+        """
+        self.max_concurrency = max_concurrency
+        self.parser = parser
+        self.session = session
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "AsyncBlszScraper":
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=DEFAULT_CONNECT_TIMEOUT, sock_read=DEFAULT_READ_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_content_from_url(self, url: str) -> bytes:
+        """Downloads the body of the url, waiting for a free concurrency slot"""
+
+        async with self.semaphore:
+            with metrics.phase("fetch"):
+                async with self.session.get(url) as r:
+                    r.raise_for_status()
+                    content = await r.read()
+
+        metrics.increment("bytes_downloaded", len(content))
+
+        return content
+
+    async def fetch_games(
+        self, team_schedule_url: str, year_filter: int = None, max_results: int = 100
+    ) -> list[Game]:
+        """Fetches the game list of one team schedule page
+
+        :param team_schedule_url: The URL from where the fixture schedule can be scraped
+        :param year_filter: Year to filter the games by, defaults to None
+        :param max_results: Max results count, defaults to 100
+        :return: A list of Game objects
+        """
+
+        content = await self.get_content_from_url(team_schedule_url)
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self.executor,
+            parse_games,
+            team_schedule_url,
+            content,
+            self.parser,
+            year_filter,
+            max_results,
+        )
+
+    async def fetch_all_team_games(
+        self, schedules: list[dict], year_filter: int = None, max_results: int = 100
+    ) -> dict[str, list[Game]]:
+        """Fetches the game lists of several teams concurrently
+
+        :param schedules: Team configs from the "schedules" section of the app config
+        :param year_filter: Year to filter the games by, defaults to None
+        :param max_results: Max results count per team, defaults to 100
+        :return: A dictionary of Game lists keyed by team name
+        """
+
+        game_lists = await asyncio.gather(
+            *(
+                self.fetch_games(team_config["url"], year_filter, max_results)
+                for team_config in schedules
+            )
+        )
+
+        return {
+            team_config["team_name"]: games
+            for team_config, games in zip(schedules, game_lists)
+        }
+
+
+async def fetch_all_team_games_async(
+    schedules: list[dict],
+    year_filter: int = None,
+    max_results: int = 100,
+    max_concurrency: int = DEFAULT_POOL_SIZE,
+    parser: str = DEFAULT_PARSER,
+) -> dict[str, list[Game]]:
+    """Fetches the game lists of several teams with an AsyncBlszScraper
+
+    :param schedules: Team configs from the "schedules" section of the app config
+    :param year_filter: Year to filter the games by, defaults to None
+    :param max_results: Max results count per team, defaults to 100
+    :param max_concurrency: Max number of pages downloaded at the same time, defaults to DEFAULT_POOL_SIZE
+    :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+    :return: A dictionary of Game lists keyed by team name
+    """
+
+    async with AsyncBlszScraper(max_concurrency, parser=parser) as scraper:
+        return await scraper.fetch_all_team_games(schedules, year_filter, max_results)
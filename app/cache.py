@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from typing import TYPE_CHECKING
+from dataclasses import dataclass
+
+from app import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_MAX_AGE = 0
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    """Class for representing a cached HTTP response"""
+
+    url: str
+    body: bytes
+    etag: str = None
+    last_modified: str = None
+    stored_at: float = 0.0
+
+
+class ResponseCache:
+    """On-disk HTTP response cache keyed by URL, revalidated with conditional requests"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """Initializes the ResponseCache object
+
+        :param directory: Directory where the cached responses are stored
+        :param max_age: Seconds a cached response is served without revalidation, defaults to DEFAULT_MAX_AGE
+        :param max_bytes: Max total size of the cached bodies, the least recently used
+            entries are evicted above it, defaults to DEFAULT_MAX_BYTES
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        """Returns the metadata and body file paths of the url"""
+
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Writes data to path through a temporary file, so readers never see partial files"""
+
+        # unique per process and thread, the scraper processes can share the directory
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, meta_path: str) -> dict:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, meta_path: str, meta: dict) -> None:
+        self._write_atomic(meta_path, json.dumps(meta).encode())
+
+    def get(self, url: str) -> CacheEntry:
+        """Returns the cached response of the url or None if it is not cached"""
+
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            try:
+                meta = self._read_meta(meta_path)
+                with open(body_path, "rb") as f:
+                    body = f.read()
+            except (FileNotFoundError, ValueError):
+                return None
+
+            meta["accessed_at"] = time.time()
+            self._write_meta(meta_path, meta)
+
+        return CacheEntry(
+            url=url,
+            body=body,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            stored_at=meta["stored_at"],
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Checks if the entry can be served without revalidation"""
+
+        return time.time() - entry.stored_at < self.max_age
+
+    def conditional_headers(self, entry: CacheEntry) -> dict:
+        """Returns the conditional request headers to revalidate the entry"""
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, url: str, response: "requests.Response") -> None:
+        """Stores the body and validators of a response, then evicts entries above max_bytes"""
+
+        meta_path, body_path = self._paths(url)
+        now = time.time()
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "stored_at": now,
+            "accessed_at": now,
+            "size": len(response.content),
+        }
+        with self._lock:
+            self._write_atomic(body_path, response.content)
+            self._write_meta(meta_path, meta)
+            self.evict()
+
+    def refresh(self, url: str) -> bool:
+        """Marks the cached entry of the url as revalidated now
+
+        :param url: The URL of the entry
+        :return: False if the entry was evicted in the meantime, a miss for the next fetch
+        """
+
+        meta_path, _ = self._paths(url)
+        with self._lock:
+            try:
+                meta = self._read_meta(meta_path)
+            except (FileNotFoundError, ValueError):
+                return False
+            meta["stored_at"] = time.time()
+            self._write_meta(meta_path, meta)
+
+        return True
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the total size fits max_bytes"""
+
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.directory, file_name)
+            try:
+                meta = self._read_meta(meta_path)
+            except (FileNotFoundError, ValueError):
+                continue
+            entries.append(
+                (meta.get("accessed_at", 0), meta.get("size", 0), meta["url"])
+            )
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, url in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            for path in self._paths(url):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+    def fetch(self, http, url: str) -> bytes:
+        """Returns the body of the url, downloading it only if the cached copy changed
+
+        :param http: requests Session or the requests module used for the request
+        :param url: The URL to fetch
+        :return: The response body
+        """
+
+        entry = self.get(url)
+        if entry is not None and self.is_fresh(entry):
+            metrics.increment("cache_hits")
+            return entry.body
+
+        headers = self.conditional_headers(entry) if entry is not None else {}
+        r = http.get(url, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            metrics.increment("cache_not_modified")
+            self.refresh(url)
+            return entry.body
+
+        r.raise_for_status()
+        metrics.increment("bytes_downloaded", len(r.content))
+        self.store(url, r)
+
+        return r.content
@@ -0,0 +1,215 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+from gcsa.serializers.event_serializer import EventSerializer
+
+from app import metrics
+from app.rate_limiter import AdaptiveRateLimiter, is_rate_limit_error
+
+# the Calendar API accepts more, but recommends at most 50 calls per batch
+MAX_BATCH_SIZE = 50
+
+
+@dataclass
+class WriteResult:
+    """Class for representing the outcome of one calendar write"""
+
+    operation: str
+    event: Event
+    ok: bool
+    error: Exception = None
+    response: dict = None
+
+
+@dataclass
+class EventPatch:
+    """Class for representing a partial update of the changed fields of an event"""
+
+    event: Event
+    fields: tuple[str, ...] = ()
+
+    @property
+    def id(self) -> str:
+        return self.event.id
+
+    def body(self) -> dict:
+        """Returns the PATCH request body: the changed fields and the extended properties"""
+
+        event_json = EventSerializer.to_json(self.event)
+        return {
+            key: event_json[key]
+            for key in (*self.fields, "extendedProperties")
+            if key in event_json
+        }
+
+    def __str__(self) -> str:
+        return f"{self.event} ({', '.join(self.fields) or 'fingerprint only'})"
+
+
+def to_operations(
+    inserts: Iterable[Event] = (),
+    deletes: Iterable[Event] = (),
+    patches: Iterable[EventPatch] = (),
+) -> list[tuple[str, Event]]:
+    """Returns the (operation, event) pairs of the writes: inserts, patches, then deletes
+
+    There is no full update (PUT): the listed events are partial, see EVENT_LIST_FIELDS.
+    """
+
+    return (
+        [("insert", event) for event in inserts]
+        + [("patch", patch) for patch in patches]
+        + [("delete", event) for event in deletes]
+    )
+
+
+@dataclass
+class WriteSummary:
+    """Class for representing the outcome of a group of calendar writes"""
+
+    results: list[WriteResult] = field(default_factory=list)
+    skipped: list[tuple[str, Event]] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> list[WriteResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> list[WriteResult]:
+        return [result for result in self.results if not result.ok]
+
+    def summary(self) -> str:
+        """Returns a one line summary of the writes"""
+
+        return (
+            f"{len(self.succeeded)} succeeded, {len(self.failed)} failed, "
+            f"{len(self.skipped)} skipped"
+        )
+
+
+class CalendarBatchWriter:
+    """Class for sending calendar inserts, patches and deletes in batch requests"""
+
+    def __init__(
+        self,
+        gc_client: GoogleCalendar,
+        calendar_id: str = None,
+        send_updates: str = "none",
+        batch_size: int = MAX_BATCH_SIZE,
+        rate_limiter: AdaptiveRateLimiter = None,
+    ) -> None:
+        """Initializes the CalendarBatchWriter object
+
+        :param gc_client: The GoogleCalendar client object.
+        :param calendar_id: Calendar to write, defaults to the default calendar of the client
+        :param send_updates: Whether to notify the attendees, defaults to "none"
+        :param batch_size: Max number of calls in one batch request, defaults to MAX_BATCH_SIZE
+        :param rate_limiter: Paces the batch requests and retries the throttled calls, defaults to None (no pacing)
+        """
+        self.gc_client = gc_client
+        self.calendar_id = calendar_id or gc_client.default_calendar
+        self.send_updates = send_updates
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter
+
+    def build_request(self, operation: str, event: Event):
+        """Builds the API request of one write without executing it"""
+
+        events = self.gc_client.service.events()
+        if operation == "insert":
+            return events.insert(
+                calendarId=self.calendar_id,
+                body=EventSerializer.to_json(event),
+                sendUpdates=self.send_updates,
+            )
+        if operation == "patch":
+            return events.patch(
+                calendarId=self.calendar_id,
+                eventId=event.id,
+                body=event.body(),
+                sendUpdates=self.send_updates,
+            )
+        if operation == "delete":
+            return events.delete(
+                calendarId=self.calendar_id,
+                eventId=event.id,
+                sendUpdates=self.send_updates,
+            )
+
+        raise ValueError(f"Unknown calendar write operation: {operation}")
+
+    def execute(self, operations: list[tuple[str, Event]]) -> list[WriteResult]:
+        """Executes (operation, event) pairs in batch requests of batch_size calls
+
+        With a rate limiter the calls throttled by the quota are sent again in new batch
+        requests, at the lowered rate.
+
+        :param operations: The writes to execute
+        :return: One WriteResult per operation, in the order of the operations
+        """
+
+        results = [None] * len(operations)
+
+        def callback(request_id: str, response: dict, exception: Exception) -> None:
+            index = int(request_id)
+            operation, event = operations[index]
+            results[index] = WriteResult(
+                operation=operation,
+                event=event,
+                ok=exception is None,
+                error=exception,
+                response=response,
+            )
+
+        pending = list(range(len(operations)))
+        max_retries = self.rate_limiter.max_retries if self.rate_limiter else 0
+        for attempt in range(max_retries + 1):
+            for offset in range(0, len(pending), self.batch_size):
+                chunk = pending[offset : offset + self.batch_size]
+                if self.rate_limiter is not None:
+                    # every call of a batch request counts against the quota
+                    self.rate_limiter.acquire(len(chunk))
+                batch = self.gc_client.service.new_batch_http_request(callback=callback)
+                for index in chunk:
+                    operation, event = operations[index]
+                    batch.add(
+                        self.build_request(operation, event), request_id=str(index)
+                    )
+                batch.execute()
+
+            if self.rate_limiter is None:
+                break
+            pending = [
+                index
+                for index in pending
+                if not results[index].ok and is_rate_limit_error(results[index].error)
+            ]
+            if not pending:
+                self.rate_limiter.record_success()
+                break
+            self.rate_limiter.record_throttle()
+            if attempt < max_retries:
+                metrics.increment("rate_limit_retries", len(pending))
+                print(
+                    f"Calendar API rate limit exceeded, retrying {len(pending)} calls"
+                )
+
+        return results
+
+    def write(
+        self,
+        inserts: Iterable[Event] = (),
+        deletes: Iterable[Event] = (),
+        patches: Iterable[EventPatch] = (),
+    ) -> list[WriteResult]:
+        """Sends the inserts, patches and deletes in as few batch requests as possible
+
+        :param inserts: Events to create
+        :param deletes: Events to delete, they must have an id
+        :param patches: Partial updates of existing events
+        :return: One WriteResult per event, in the order of to_operations
+        """
+
+        return self.execute(to_operations(inserts, deletes, patches))
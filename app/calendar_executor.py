@@ -0,0 +1,115 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+
+from app.calendar_batch import EventPatch, WriteResult, to_operations
+from app.rate_limiter import AdaptiveRateLimiter
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class CalendarPoolExecutor:
+    """Class for running independent calendar writes in a bounded worker pool.
+
+    The HTTP transport of the Google API client is not thread safe, so every worker
+    thread gets its own GoogleCalendar client from the client factory.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], GoogleCalendar],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        send_updates: str = "none",
+        rate_limiter: AdaptiveRateLimiter = None,
+    ) -> None:
+        """Initializes the CalendarPoolExecutor object
+
+        :param client_factory: Creates the GoogleCalendar client of a worker thread
+        :param max_workers: Max number of writes running at the same time, defaults to DEFAULT_MAX_WORKERS
+        :param send_updates: Whether to notify the attendees, defaults to "none"
+        :param rate_limiter: Paces the writes and retries the throttled ones, defaults to None (no pacing)
+        """
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.send_updates = send_updates
+        self.rate_limiter = rate_limiter
+        self._local = threading.local()
+
+    def get_client(self) -> GoogleCalendar:
+        """Returns the client of the current thread, creating it on first use"""
+
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def send(self, operation: str, event: Event):
+        """Sends one write with the client of the current thread, returns the API response"""
+
+        client = self.get_client()
+        if operation == "insert":
+            return client.add_event(event, send_updates=self.send_updates)
+        if operation == "patch":
+            return (
+                client.service.events()
+                .patch(
+                    calendarId=client.default_calendar,
+                    eventId=event.id,
+                    body=event.body(),
+                    sendUpdates=self.send_updates,
+                )
+                .execute()
+            )
+        if operation == "delete":
+            return client.delete_event(event, send_updates=self.send_updates)
+        raise ValueError(f"Unknown calendar write operation: {operation}")
+
+    def run(self, operation: str, event: Event) -> WriteResult:
+        """Executes one write, the error is returned in the result instead of raised"""
+
+        try:
+            if self.rate_limiter is not None:
+                response = self.rate_limiter.call(self.send, operation, event)
+            else:
+                response = self.send(operation, event)
+        except Exception as e:
+            return WriteResult(operation=operation, event=event, ok=False, error=e)
+
+        return WriteResult(operation=operation, event=event, ok=True, response=response)
+
+    def execute(self, operations: list[tuple[str, Event]]) -> list[WriteResult]:
+        """Executes (operation, event) pairs concurrently
+
+        :param operations: The writes to execute
+        :return: One WriteResult per operation, in the order of the operations
+        """
+
+        if not operations:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(operations))
+        ) as executor:
+            return list(
+                executor.map(lambda operation: self.run(*operation), operations)
+            )
+
+    def write(
+        self,
+        inserts: Iterable[Event] = (),
+        deletes: Iterable[Event] = (),
+        patches: Iterable[EventPatch] = (),
+    ) -> list[WriteResult]:
+        """Sends the inserts, patches and deletes concurrently
+
+        :param inserts: Events to create
+        :param deletes: Events to delete, they must have an id
+        :param patches: Partial updates of existing events
+        :return: One WriteResult per event, in the order of to_operations
+        """
+
+        return self.execute(to_operations(inserts, deletes, patches))
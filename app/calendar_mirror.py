@@ -0,0 +1,156 @@
+import os
+import copy
+import json
+
+from datetime import datetime
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+from gcsa.serializers.event_serializer import EventSerializer
+from googleapiclient.errors import HttpError
+
+from app.game import SCRAPER_TAG_PROPERTY
+
+MIRROR_VERSION = 1
+
+
+def is_scraper_event(event_json: dict) -> bool:
+    """Checks if a raw API event was created by the scraper"""
+
+    shared_properties = event_json.get("extendedProperties", {}).get("shared", {})
+    return shared_properties.get(SCRAPER_TAG_PROPERTY) == "yes"
+
+
+class CalendarMirror:
+    """Local mirror of the scraper created events, kept up to date with sync tokens.
+
+    The first sync lists the whole calendar once, later syncs only fetch the changes
+    since the stored sync token. When Google expires the token (410 Gone) the mirror
+    falls back to a full resync.
+    """
+
+    def __init__(
+        self, gc_client: GoogleCalendar, path: str, calendar_id: str = None
+    ) -> None:
+        """Initializes the CalendarMirror object
+
+        :param gc_client: The GoogleCalendar client object.
+        :param path: JSON file where the mirror is persisted between runs
+        :param calendar_id: Calendar to mirror, defaults to the default calendar of the client
+        """
+        self.gc_client = gc_client
+        self.path = path
+        self.calendar_id = calendar_id or gc_client.default_calendar
+        self.sync_token = None
+        self.events: dict[str, dict] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Loads the persisted mirror if it belongs to the same calendar"""
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        if (
+            state.get("version") == MIRROR_VERSION
+            and state.get("calendar_id") == self.calendar_id
+        ):
+            self.sync_token = state["sync_token"]
+            self.events = state["events"]
+
+    def save(self) -> None:
+        """Persists the mirror atomically"""
+
+        state = {
+            "version": MIRROR_VERSION,
+            "calendar_id": self.calendar_id,
+            "sync_token": self.sync_token,
+            "events": self.events,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _list_pages(self, **kwargs):
+        """Yields the raw response pages of an event listing"""
+
+        page_token = None
+        while True:
+            response = (
+                self.gc_client.service.events()
+                .list(calendarId=self.calendar_id, pageToken=page_token, **kwargs)
+                .execute()
+            )
+            yield response
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+    def _apply(self, items: list[dict]) -> int:
+        """Applies listed events to the mirror, returns the number of changed events"""
+
+        changed = 0
+        for item in items:
+            event_id = item["id"]
+            if item.get("status") != "cancelled" and is_scraper_event(item):
+                self.events[event_id] = item
+                changed += 1
+            elif self.events.pop(event_id, None) is not None:
+                changed += 1
+        return changed
+
+    def full_sync(self) -> int:
+        """Rebuilds the mirror from a full listing of the calendar"""
+
+        self.events = {}
+        changed = 0
+        for response in self._list_pages():
+            changed += self._apply(response.get("items", []))
+            self.sync_token = response.get("nextSyncToken", self.sync_token)
+
+        self.save()
+        return changed
+
+    def sync(self) -> int:
+        """Brings the mirror up to date, incrementally if a sync token is stored
+
+        :return: The number of created, changed or removed scraper events
+        """
+
+        if self.sync_token is None:
+            return self.full_sync()
+
+        changed = 0
+        try:
+            for response in self._list_pages(syncToken=self.sync_token):
+                changed += self._apply(response.get("items", []))
+                next_sync_token = response.get("nextSyncToken")
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            print("Calendar sync token expired, doing a full resync")
+            return self.full_sync()
+
+        self.sync_token = next_sync_token or self.sync_token
+        self.save()
+        return changed
+
+    def get_events(self, time_min: datetime = None) -> list[Event]:
+        """Returns the mirrored scraper events as Event objects, ordered by start
+
+        :param time_min: Only events ending after this, timezone aware datetime, defaults to None
+        :return: List of Event objects
+        """
+
+        events = [
+            EventSerializer.to_object(copy.deepcopy(event_json))
+            for event_json in self.events.values()
+        ]
+        if time_min is not None:
+            events = [event for event in events if event.end > time_min]
+
+        return sorted(events, key=lambda event: event.start)
@@ -0,0 +1,427 @@
+import os
+import re
+import json
+import time
+import argparse
+import lxml.html
+
+from typing import TYPE_CHECKING, Callable
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from app import metrics
+from app.cache import ResponseCache
+from app.scraper import BlszScraper
+from app.snapshot import SnapshotStore
+from app.http_client import ResilientHttp, create_session
+from app.parsers import DEFAULT_PARSER, PARSER_BACKENDS
+from app.utils import get_cache_path, get_crawl_path
+
+if TYPE_CHECKING:
+    import requests
+
+CHECKPOINT_VERSION = 1
+# seconds between two requests to the same host
+DEFAULT_DELAY = 1.0
+# the checkpoint is written after every this many crawled pages
+DEFAULT_CHECKPOINT_EVERY = 10
+# a page failing this many times is given up on
+DEFAULT_MAX_ATTEMPTS = 3
+
+CLUB_URL_PATTERN = re.compile(r"/club/(\d+)/(\d+)/(\d+)/(\d+)/(\d+)\.html$")
+CLUB_SELECTOR_XPATH = '//select[@id="ClubSelector"]/option[@value]'
+
+
+@dataclass(frozen=True)
+class ClubPage:
+    """Class for representing a team schedule page of the adatbank club pages.
+
+    The same schedule is shown on the page of every round (fordulo), so a team page
+    is identified by the season (evad), the organizer (szervezet), the competition
+    (verseny) and the team id.
+    """
+
+    base_url: str
+    evad: str
+    szervezet: str
+    verseny: str
+    fordulo: str
+    team_id: str
+
+    @classmethod
+    def from_url(cls, url: str) -> "ClubPage":
+        """Returns the ClubPage of a club page URL, None if the URL is not a club page"""
+
+        parts = urlsplit(url)
+        match = CLUB_URL_PATTERN.search(parts.path)
+        if match is None:
+            return None
+
+        return cls(f"{parts.scheme}://{parts.netloc}", *match.groups())
+
+    @classmethod
+    def from_selector_value(cls, base_url: str, value: str) -> "ClubPage":
+        """Returns the ClubPage of a #ClubSelector option value, None if it is incomplete
+
+        :param base_url: Scheme and host of the page the option is on
+        :param value: The option value, e.g. "teamId=268004&evad=61&szervezet=5&verseny=27291&fordulo=5"
+        """
+
+        query = {name: values[0] for name, values in parse_qs(value).items()}
+        try:
+            return cls(
+                base_url,
+                query["evad"],
+                query["szervezet"],
+                query["verseny"],
+                query.get("fordulo", "1"),
+                query["teamId"],
+            )
+        except KeyError:
+            return None
+
+    @property
+    def key(self) -> str:
+        """The deduplication key of the team schedule"""
+
+        return f"{self.evad}/{self.szervezet}/{self.verseny}/{self.team_id}"
+
+    @property
+    def url(self) -> str:
+        return (
+            f"{self.base_url}/club/{self.evad}/{self.szervezet}/{self.verseny}"
+            f"/{self.fordulo}/{self.team_id}.html"
+        )
+
+
+def discover_club_pages(url: str, content: bytes) -> list[ClubPage]:
+    """Returns the team schedule pages of the same club linked from a team schedule page
+
+    The other teams of the club are listed in the #ClubSelector options. Links to club
+    pages are followed only if they point to one of these teams, the links to the
+    opponents lead to other clubs.
+
+    :param url: The URL of the page
+    :param content: The body of the page
+    :return: The linked pages of the club, in document order, without duplicates
+    """
+
+    page = ClubPage.from_url(url)
+    base_url = f"{urlsplit(url).scheme}://{urlsplit(url).netloc}"
+    document = lxml.html.document_fromstring(
+        content, parser=lxml.html.HTMLParser(encoding="utf-8")
+    )
+
+    pages = []
+    for option in document.xpath(CLUB_SELECTOR_XPATH):
+        club_page = ClubPage.from_selector_value(base_url, option.get("value"))
+        if club_page is not None:
+            pages.append(club_page)
+
+    club_team_ids = {club_page.team_id for club_page in pages}
+    if page is not None:
+        club_team_ids.add(page.team_id)
+
+    for anchor in document.xpath("//a[@href]"):
+        club_page = ClubPage.from_url(urljoin(url, anchor.get("href")))
+        if club_page is not None and club_page.team_id in club_team_ids:
+            pages.append(club_page)
+
+    unique_pages = {}
+    for club_page in pages:
+        unique_pages.setdefault(club_page.key, club_page)
+
+    return list(unique_pages.values())
+
+
+class HostPoliteness:
+    """Keeps a minimum delay between two requests to the same host"""
+
+    def __init__(self, delay: float = DEFAULT_DELAY) -> None:
+        """Initializes the HostPoliteness object
+
+        :param delay: Seconds between two requests to the same host, defaults to DEFAULT_DELAY
+        """
+        self.delay = delay
+        self.next_allowed = {}
+
+    def wait_time(self, host: str, now: float) -> float:
+        """Returns the seconds until the host can be requested again"""
+
+        return max(self.next_allowed.get(host, now) - now, 0)
+
+    def record(self, host: str, now: float) -> None:
+        """Records a request to the host"""
+
+        self.next_allowed[host] = now + self.delay
+
+
+class CrawlFrontier:
+    """FIFO queue of the pages to crawl, every team schedule is queued only once"""
+
+    def __init__(self) -> None:
+        """Initializes the CrawlFrontier object"""
+
+        self.queue = deque()
+        self.seen = set()
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def add(self, page: ClubPage) -> bool:
+        """Queues the page if it was never queued before, returns True if it was queued"""
+
+        if page.key in self.seen:
+            return False
+
+        self.seen.add(page.key)
+        self.queue.append(page.url)
+        return True
+
+    def requeue(self, url: str, first: bool = False) -> None:
+        """Puts an already seen page back to the end, or to the front, of the queue"""
+
+        if first:
+            self.queue.appendleft(url)
+        else:
+            self.queue.append(url)
+
+    def pop_ready(self, politeness: HostPoliteness, now: float) -> tuple[str, float]:
+        """Takes the first queued page whose host can be requested now
+
+        :param politeness: The per-host request delays
+        :param now: The current time of the politeness clock
+        :return: The URL and 0, or None and the seconds until a host gets ready
+        """
+
+        wait = None
+        for index, url in enumerate(self.queue):
+            host_wait = politeness.wait_time(urlsplit(url).netloc, now)
+            if host_wait == 0:
+                del self.queue[index]
+                return url, 0
+            wait = host_wait if wait is None else min(wait, host_wait)
+
+        return None, wait or 0
+
+
+class ScheduleCrawler:
+    """Crawls every team schedule page of the clubs reachable from the seed pages.
+
+    The crawled fixtures are saved to a SnapshotStore keyed by the page URL. The queue,
+    the seen pages and the failures are written to a checkpoint file, so an interrupted
+    crawl continues where it left off when it is started again.
+    """
+
+    def __init__(
+        self,
+        seeds: list[str],
+        checkpoint_path: str,
+        store: SnapshotStore,
+        session: "requests.Session" = None,
+        cache: ResponseCache = None,
+        parser: str = DEFAULT_PARSER,
+        delay: float = DEFAULT_DELAY,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initializes the ScheduleCrawler object
+
+        :param seeds: Club team schedule URLs the crawl starts from
+        :param checkpoint_path: Path of the checkpoint file, it is resumed from if it exists
+        :param store: Store the fixtures of the crawled pages are saved to
+        :param session: Shared requests Session of the page downloads, defaults to None
+        :param cache: Response cache used for conditional requests, defaults to None
+        :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+        :param delay: Seconds between two requests to the same host, defaults to DEFAULT_DELAY
+        :param max_attempts: Attempts of a failing page before it is given up on, defaults to DEFAULT_MAX_ATTEMPTS
+        :param checkpoint_every: Crawled pages between two checkpoint writes, defaults to DEFAULT_CHECKPOINT_EVERY
+        :param clock: Returns the current time in seconds, defaults to time.monotonic
+        :param sleep: Waits the given seconds, defaults to time.sleep
+        """
+        self.checkpoint_path = checkpoint_path
+        self.store = store
+        self.session = session
+        self.cache = cache
+        self.parser = parser
+        self.politeness = HostPoliteness(delay)
+        self.max_attempts = max_attempts
+        self.checkpoint_every = checkpoint_every
+        self.clock = clock
+        self.sleep = sleep
+        self.frontier = CrawlFrontier()
+        self.attempts = {}
+        self.failed = []
+        self.crawled = 0
+
+        if not self.load_checkpoint():
+            for seed in seeds:
+                page = ClubPage.from_url(seed)
+                if page is None:
+                    raise ValueError(f"Not a club team schedule URL: {seed}")
+                self.frontier.add(page)
+
+    def load_checkpoint(self) -> bool:
+        """Restores the crawl state from the checkpoint, returns False if there is none"""
+
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return False
+
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            return False
+
+        self.frontier.queue.extend(checkpoint["frontier"])
+        self.frontier.seen.update(checkpoint["seen"])
+        self.attempts = checkpoint["attempts"]
+        self.failed = checkpoint["failed"]
+        self.crawled = checkpoint["crawled"]
+        print(
+            f"Resuming the crawl: {self.crawled} pages crawled, {len(self.frontier)} queued"
+        )
+
+        return True
+
+    def save_checkpoint(self) -> None:
+        """Writes the crawl state to the checkpoint, replacing the previous one atomically"""
+
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "frontier": list(self.frontier.queue),
+            "seen": sorted(self.frontier.seen),
+            "attempts": self.attempts,
+            "failed": self.failed,
+            "crawled": self.crawled,
+        }
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def crawl_page(self, url: str) -> int:
+        """Downloads a page, saves its fixtures and queues the club pages it links to
+
+        :param url: The URL of the team schedule page
+        :return: The number of newly queued pages
+        """
+
+        content = BlszScraper(
+            url, session=self.session, cache=self.cache, parser=self.parser
+        ).get_content_from_url(url)
+        games = BlszScraper.from_content(url, content, self.parser).fetch_games(
+            max_results=None
+        )
+        self.store.save(url, games)
+
+        return sum(
+            self.frontier.add(page) for page in discover_club_pages(url, content)
+        )
+
+    def run(self, max_pages: int = None) -> int:
+        """Crawls the queued pages until the queue is empty or interrupted
+
+        :param max_pages: Stop after this many pages, defaults to None (crawl everything)
+        :return: The number of pages crawled by this run
+        """
+
+        crawled = 0
+        try:
+            while self.frontier and (max_pages is None or crawled < max_pages):
+                url, wait = self.frontier.pop_ready(self.politeness, self.clock())
+                if url is None:
+                    self.sleep(wait)
+                    continue
+
+                self.politeness.record(urlsplit(url).netloc, self.clock())
+                try:
+                    queued = self.crawl_page(url)
+                except KeyboardInterrupt:
+                    self.frontier.requeue(url, first=True)
+                    raise
+                except Exception as e:
+                    self.attempts[url] = self.attempts.get(url, 0) + 1
+                    metrics.increment("crawl_errors")
+                    if self.attempts[url] < self.max_attempts:
+                        print(f"Error crawling {url}, retrying later: {e}")
+                        self.frontier.requeue(url)
+                    else:
+                        print(f"Error crawling {url}, giving up: {e}")
+                        self.failed.append(url)
+                    continue
+
+                self.attempts.pop(url, None)
+                self.crawled += 1
+                crawled += 1
+                metrics.increment("crawl_pages")
+                print(f"Crawled {url}: {queued} new pages, {len(self.frontier)} queued")
+                if self.crawled % self.checkpoint_every == 0:
+                    self.save_checkpoint()
+        except KeyboardInterrupt:
+            print("Crawl interrupted, the checkpoint is saved")
+        finally:
+            self.save_checkpoint()
+
+        return crawled
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawls every season and team schedule page of the clubs of the seed pages."
+    )
+    parser.add_argument(
+        "seeds", nargs="+", help="Club team schedule URLs the crawl starts from"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=os.path.join(get_crawl_path(), "checkpoint.json"),
+        help="Checkpoint file, an existing one is resumed",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join(get_crawl_path(), "games"),
+        help="Directory the crawled fixtures are saved to",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=DEFAULT_DELAY,
+        help="Seconds between two requests to the same host",
+    )
+    parser.add_argument(
+        "--max_pages", type=int, help="Stop after this many pages, resume later"
+    )
+    parser.add_argument(
+        "--parser",
+        type=str,
+        choices=list(PARSER_BACKENDS),
+        default="lxml",
+        help="HTML parser backend",
+    )
+    args = parser.parse_args()
+
+    crawler = ScheduleCrawler(
+        args.seeds,
+        args.checkpoint,
+        SnapshotStore(args.output),
+        session=ResilientHttp(create_session(pool_size=1)),
+        cache=ResponseCache(get_cache_path()),
+        parser=args.parser,
+        delay=args.delay,
+    )
+    crawled = crawler.run(max_pages=args.max_pages)
+    print(
+        f"Crawled {crawled} pages, {crawler.crawled} in total, "
+        f"{len(crawler.frontier)} queued, {len(crawler.failed)} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import time
+import requests
+
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Callable
+
+from app import metrics
+from app.game import Game
+from app.cache import ResponseCache
+from app.scraper import BlszScraper
+from app.snapshot import diff_games
+from app.parsers import DEFAULT_PARSER
+from app.calendar_batch import WriteResult
+from app.fan_out import FanOutProcessor, get_targets
+from app.game_event_processor import GameEventProcessor
+
+# polling interval right after a detected change or a failed poll
+MIN_INTERVAL = timedelta(minutes=15)
+# polling interval when the next game is within NEAR_MATCH_WINDOW
+NEAR_MATCH_INTERVAL = timedelta(hours=1)
+NEAR_MATCH_WINDOW = timedelta(days=2)
+# polling interval during the season, when the next game is further away
+SEASON_INTERVAL = timedelta(hours=6)
+# polling interval in the off-season, when there is no upcoming game
+OFF_SEASON_INTERVAL = timedelta(days=1)
+# after a quiet poll the interval grows by this factor, up to the proximity interval
+BACKOFF_FACTOR = 2
+
+
+def get_poll_interval(
+    games: list[Game],
+    now: datetime,
+    changed: bool = False,
+    previous_interval: timedelta = None,
+) -> timedelta:
+    """Returns the time until the next poll of a team schedule
+
+    The interval is short after a change and grows back while nothing changes,
+    up to a ceiling given by how close the next game of the team is.
+
+    :param games: The last scraped games of the team
+    :param now: The current time
+    :param changed: The last poll found changes, defaults to False
+    :param previous_interval: The interval before the last poll, defaults to None
+    :return: The interval until the next poll
+    """
+
+    if changed:
+        return MIN_INTERVAL
+
+    upcoming = [game.start_datetime for game in games if game.start_datetime > now]
+    if not upcoming:
+        ceiling = OFF_SEASON_INTERVAL
+    elif min(upcoming) - now <= NEAR_MATCH_WINDOW:
+        ceiling = NEAR_MATCH_INTERVAL
+    else:
+        ceiling = SEASON_INTERVAL
+
+    if previous_interval is None:
+        return ceiling
+
+    return min(max(previous_interval * BACKOFF_FACTOR, MIN_INTERVAL), ceiling)
+
+
+@dataclass
+class TeamState:
+    """Class for representing the in-memory polling state of a team"""
+
+    team_config: dict
+    next_poll: datetime
+    interval: timedelta = None
+    content: bytes = None
+    games: list[Game] = None
+    polls: int = 0
+    syncs: int = 0
+    errors: int = 0
+
+
+class ScheduleDaemon:
+    """Keeps the calendar in sync with the team schedules in one long-running process.
+
+    The authenticated calendar client, the HTTP connection pool and the last scraped
+    fixtures stay in memory between polls. Every team is polled on its own adaptive
+    interval and the calendar is only synced when its fixtures changed.
+    """
+
+    def __init__(
+        self,
+        gep: GameEventProcessor,
+        team_configs: list[dict],
+        session: requests.Session = None,
+        cache: ResponseCache = None,
+        parser: str = DEFAULT_PARSER,
+        year_filter: int = None,
+        max_results: int = 100,
+        dry_run: bool = False,
+        metrics_dir: str = None,
+        delete_missing: bool = False,
+        now: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initializes the ScheduleDaemon object
+
+        :param gep: The GameEventProcessor object with the authenticated client
+        :param team_configs: Configs of the teams to keep in sync
+        :param session: Shared requests Session of the schedule page downloads, defaults to None
+        :param cache: Response cache used for conditional requests, defaults to None
+        :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+        :param year_filter: Year to filter the games by, defaults to None
+        :param max_results: Max results count per team, defaults to 100
+        :param dry_run: Dry run flag, the syncs only print if set to True, defaults to False
+        :param metrics_dir: Directory the metrics of every poll cycle are exported to, defaults to None
+        :param delete_missing: Delete the events of the fixtures removed from the schedule pages, only
+            without year_filter and max_results, defaults to False
+        :param now: Returns the current time, defaults to datetime.now
+        :param sleep: Waits the given seconds, defaults to time.sleep
+        """
+        if delete_missing and (year_filter is not None or max_results is not None):
+            raise ValueError(
+                "delete_missing needs the complete game lists, without year_filter and max_results"
+            )
+
+        self.gep = gep
+        self.session = session
+        self.cache = cache
+        self.parser = parser
+        self.year_filter = year_filter
+        self.max_results = max_results
+        self.dry_run = dry_run
+        self.metrics_dir = metrics_dir
+        self.delete_missing = delete_missing
+        self.now = now
+        self.sleep = sleep
+        self.teams = [
+            TeamState(team_config=team_config, next_poll=now())
+            for team_config in team_configs
+        ]
+
+    def fetch_games(self, team: TeamState) -> bool:
+        """Downloads the schedule of the team, returns True if its fixtures changed"""
+
+        url = team.team_config["url"]
+        content = BlszScraper(
+            url, session=self.session, cache=self.cache, parser=self.parser
+        ).get_content_from_url(url)
+        if content == team.content:
+            return False
+
+        games = BlszScraper.from_content(url, content, self.parser).fetch_games(
+            year_filter=self.year_filter, max_results=self.max_results
+        )
+        changed = team.games is None or diff_games(team.games, games).has_changes
+        team.content = content
+        team.games = games
+
+        return changed
+
+    def retry_soon(self, team: TeamState) -> None:
+        """Forgets the fixtures of the team, so the next poll syncs even if the page did not change"""
+
+        team.content = None
+        team.games = None
+        team.interval = MIN_INTERVAL
+        team.next_poll = self.now() + team.interval
+
+    def sync(self, team: TeamState) -> list[WriteResult]:
+        """Reconciles the calendar events of the team with its fixtures
+
+        A team with "targets" in its config is synced to every target calendar.
+
+        :param team: The state of the team
+        :return: The failed calendar writes
+        """
+
+        if "targets" in team.team_config:
+            fan_out = FanOutProcessor.from_processor(
+                self.gep,
+                get_targets(team.team_config, self.gep.gc_client.default_calendar),
+            )
+            plans = fan_out.sync(
+                team.games, dry_run=self.dry_run, delete_missing=self.delete_missing
+            ).values()
+        else:
+            plans = [
+                self.gep.reconcile(
+                    team.games,
+                    team.team_config["attendees_2024"],
+                    dry_run=self.dry_run,
+                    delete_missing=self.delete_missing,
+                )
+            ]
+
+        return [result for plan in plans for result in plan.write_summary.failed]
+
+    def poll(self, team: TeamState) -> bool:
+        """Polls one team, syncs its calendar events if its fixtures changed
+
+        A failed poll or a sync with failed calendar writes is retried after MIN_INTERVAL.
+
+        :param team: The state of the team
+        :return: True if the calendar was synced
+        """
+
+        team_name = team.team_config["team_name"]
+        team.polls += 1
+        failed = []
+        try:
+            changed = self.fetch_games(team)
+            if changed:
+                print(f"Fixtures of {team_name} changed, syncing the calendar")
+                failed = self.sync(team)
+                team.syncs += 1
+                metrics.increment("daemon_syncs")
+        except Exception as e:
+            print(f"Error polling {team_name}: {e}")
+            team.errors += 1
+            metrics.increment("daemon_poll_errors")
+            self.retry_soon(team)
+            return False
+
+        metrics.increment("daemon_polls")
+        if failed:
+            print(f"{len(failed)} calendar writes of {team_name} failed, retrying them")
+            team.errors += 1
+            metrics.increment("daemon_sync_errors")
+            self.retry_soon(team)
+            return changed
+
+        now = self.now()
+        team.interval = get_poll_interval(
+            team.games or [], now, changed=changed, previous_interval=team.interval
+        )
+        team.next_poll = now + team.interval
+        print(f"Next poll of {team_name} in {team.interval}")
+
+        return changed
+
+    def run_once(self) -> float:
+        """Polls the teams that are due
+
+        :return: Seconds until the next team is due
+        """
+
+        due_teams = [team for team in self.teams if team.next_poll <= self.now()]
+        if due_teams:
+            # every poll cycle is exported as a run of its own
+            metrics.reset()
+            for team in due_teams:
+                self.poll(team)
+            if self.metrics_dir:
+                metrics.export(self.metrics_dir)
+
+        next_poll = min(
+            (team.next_poll for team in self.teams),
+            default=self.now() + OFF_SEASON_INTERVAL,
+        )
+        return max((next_poll - self.now()).total_seconds(), 0)
+
+    def run(self, max_cycles: int = None) -> None:
+        """Polls the teams until interrupted
+
+        :param max_cycles: Stop after this many poll cycles, defaults to None (run forever)
+        """
+
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                wait = self.run_once()
+                cycles += 1
+                if max_cycles is None or cycles < max_cycles:
+                    self.sleep(wait)
+        except KeyboardInterrupt:
+            print("Daemon stopped")
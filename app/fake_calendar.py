@@ -0,0 +1,438 @@
+import copy
+import json
+import time
+import uuid
+import random
+import threading
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Union
+from zoneinfo import ZoneInfo
+
+import httplib2
+from gcsa.event import Event
+from gcsa.serializers.event_serializer import EventSerializer
+from googleapiclient.errors import HttpError
+
+DEFAULT_PAGE_SIZE = 250
+
+# the reason the Calendar API reports for each simulated error status
+ERROR_REASONS = {
+    403: "rateLimitExceeded",
+    404: "notFound",
+    410: "fullSyncRequired",
+    429: "rateLimitExceeded",
+    500: "backendError",
+    503: "backendError",
+}
+
+
+def make_http_error(status: int, reason: str = None) -> HttpError:
+    """Builds an HttpError like the one googleapiclient raises for an API error response"""
+
+    reason = reason or ERROR_REASONS.get(status, "unknown")
+    content = json.dumps(
+        {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}
+    ).encode()
+    return HttpError(httplib2.Response({"status": status, "reason": reason}), content)
+
+
+def parse_event_time(value: dict) -> datetime:
+    """Converts the start or end of an API event to a timezone aware datetime"""
+
+    if "date" in value:
+        return datetime.combine(
+            date.fromisoformat(value["date"]), datetime.min.time(), ZoneInfo("UTC")
+        )
+
+    dt = datetime.fromisoformat(value["dateTime"])
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(value.get("timeZone") or "UTC"))
+    return dt
+
+
+def to_aware(value: Union[date, datetime, str]) -> datetime:
+    """Converts an API time bound or a gcsa time bound to a timezone aware datetime"""
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value
+
+
+class FakeRequest:
+    """An API request of the fake service, runs the call when executed"""
+
+    def __init__(self, call: Callable[[], dict]) -> None:
+        self.call = call
+
+    def execute(self) -> dict:
+        return self.call()
+
+
+class FakeBatch:
+    """Batch request of the fake service, with the callback interface of googleapiclient"""
+
+    def __init__(self, calendar: "FakeGoogleCalendar", callback: Callable) -> None:
+        self.calendar = calendar
+        self.callback = callback
+        self.requests: list[tuple[str, FakeRequest]] = []
+
+    def add(self, request: FakeRequest, request_id: str = None) -> None:
+        self.requests.append((request_id or str(len(self.requests)), request))
+
+    def execute(self) -> None:
+        self.calendar.call_counts["batch"] += 1
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeEventsResource:
+    """The events() resource of the fake service, takes the raw API parameters"""
+
+    def __init__(self, calendar: "FakeGoogleCalendar") -> None:
+        self.calendar = calendar
+
+    def insert(self, calendarId: str, body: dict, **kwargs) -> FakeRequest:
+        return FakeRequest(
+            lambda: self.calendar.api_call("insert", calendarId, body=body)
+        )
+
+    def update(
+        self, calendarId: str, eventId: str, body: dict, **kwargs
+    ) -> FakeRequest:
+        return FakeRequest(
+            lambda: self.calendar.api_call(
+                "update", calendarId, eventId=eventId, body=body
+            )
+        )
+
+    def patch(self, calendarId: str, eventId: str, body: dict, **kwargs) -> FakeRequest:
+        return FakeRequest(
+            lambda: self.calendar.api_call(
+                "patch", calendarId, eventId=eventId, body=body
+            )
+        )
+
+    def get(self, calendarId: str, eventId: str, **kwargs) -> FakeRequest:
+        return FakeRequest(
+            lambda: self.calendar.api_call("get", calendarId, eventId=eventId)
+        )
+
+    def delete(self, calendarId: str, eventId: str, **kwargs) -> FakeRequest:
+        return FakeRequest(
+            lambda: self.calendar.api_call("delete", calendarId, eventId=eventId)
+        )
+
+    def list(self, calendarId: str, **kwargs) -> FakeRequest:
+        return FakeRequest(lambda: self.calendar.api_call("list", calendarId, **kwargs))
+
+
+class FakeService:
+    """Stand-in of the googleapiclient calendar resource used through GoogleCalendar.service"""
+
+    def __init__(self, calendar: "FakeGoogleCalendar") -> None:
+        self.calendar = calendar
+        self.events_resource = FakeEventsResource(calendar)
+
+    def events(self) -> FakeEventsResource:
+        return self.events_resource
+
+    def new_batch_http_request(self, callback: Callable = None) -> FakeBatch:
+        return FakeBatch(self.calendar, callback)
+
+
+class FakeGoogleCalendar:
+    """In-memory stand-in of the gcsa GoogleCalendar client.
+
+    It implements the client methods the processor uses and the raw service resource
+    used by the batch writer and the calendar mirror, including extended property
+    filters, free text queries, pagination and sync tokens. Latency, quota errors and
+    random failures can be injected to benchmark the processor offline and to replay
+    rate limit incidents.
+    """
+
+    def __init__(
+        self,
+        default_calendar: str = "primary",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        max_requests_per_second: float = None,
+        quota_status: int = 403,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        seed: int = None,
+    ) -> None:
+        """Initializes the FakeGoogleCalendar object
+
+        :param default_calendar: Calendar used when no calendar id is given, defaults to "primary"
+        :param latency: Seconds every API call takes, defaults to 0.0
+        :param error_rate: Probability of a call failing with error_status, defaults to 0.0
+        :param error_status: HTTP status of the random failures, defaults to 503
+        :param max_requests_per_second: Calls above this rate fail with quota_status, defaults to None (no quota)
+        :param quota_status: HTTP status of the quota errors, 403 or 429, defaults to 403
+        :param page_size: Max number of events in a list response, defaults to DEFAULT_PAGE_SIZE
+        :param seed: Seed of the random failures, defaults to None
+        """
+        self.default_calendar = default_calendar
+        self.credentials = None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_requests_per_second = max_requests_per_second
+        self.quota_status = quota_status
+        self.page_size = page_size
+        self.random = random.Random(seed)
+        self.service = FakeService(self)
+
+        self.calendars: dict[str, dict[str, dict]] = {}
+        self.call_counts = Counter()
+        self.errors = Counter()
+        self.injected_errors: list[int] = []
+        self.sequence = 0
+        self.min_sync_sequence = 0
+        self.request_times: list[float] = []
+        self.lock = threading.Lock()
+
+    def fail_next(self, status: int, count: int = 1) -> None:
+        """Makes the next count API calls fail with the given HTTP status"""
+
+        with self.lock:
+            self.injected_errors.extend([status] * count)
+
+    def expire_sync_tokens(self) -> None:
+        """Invalidates the issued sync tokens, the next incremental sync gets 410 Gone"""
+
+        with self.lock:
+            self.min_sync_sequence = self.sequence + 1
+
+    def _check_failures(self) -> None:
+        """Raises the injected, quota and random errors of the current call"""
+
+        if self.injected_errors:
+            raise make_http_error(self.injected_errors.pop(0))
+
+        if self.max_requests_per_second:
+            now = time.monotonic()
+            self.request_times = [t for t in self.request_times if now - t < 1.0]
+            if len(self.request_times) >= self.max_requests_per_second:
+                raise make_http_error(self.quota_status)
+            self.request_times.append(now)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise make_http_error(self.error_status)
+
+    def api_call(self, method: str, calendar_id: str, **kwargs) -> dict:
+        """Runs one raw API call with the configured latency and failures"""
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            self.call_counts[method] += 1
+            try:
+                self._check_failures()
+                return getattr(self, f"_{method}")(
+                    self.calendars.setdefault(calendar_id, {}), **kwargs
+                )
+            except HttpError as e:
+                self.errors[e.resp.status] += 1
+                raise
+
+    def _store(self, events: dict[str, dict], body: dict) -> dict:
+        self.sequence += 1
+        body["updated"] = self.sequence
+        for key in ("start", "end"):
+            if key in body and "dateTime" in body[key]:
+                body[key]["dateTime"] = parse_event_time(body[key]).isoformat()
+        events[body["id"]] = body
+        return self._response(body)
+
+    @staticmethod
+    def _response(body: dict) -> dict:
+        response = copy.deepcopy(body)
+        response.pop("updated", None)
+        return response
+
+    def _get_live(self, events: dict[str, dict], event_id: str) -> dict:
+        stored = events.get(event_id)
+        if stored is None or stored.get("status") == "cancelled":
+            raise make_http_error(404)
+        return stored
+
+    def _insert(self, events: dict[str, dict], body: dict) -> dict:
+        body = copy.deepcopy(body)
+        body.setdefault("id", uuid.uuid4().hex)
+        body["status"] = "confirmed"
+        return self._store(events, body)
+
+    def _update(self, events: dict[str, dict], eventId: str, body: dict) -> dict:
+        self._get_live(events, eventId)
+        body = copy.deepcopy(body)
+        body.update(id=eventId, status="confirmed")
+        return self._store(events, body)
+
+    def _patch(self, events: dict[str, dict], eventId: str, body: dict) -> dict:
+        stored = copy.deepcopy(self._get_live(events, eventId))
+        for key, value in copy.deepcopy(body).items():
+            if key == "extendedProperties":
+                for scope, properties in value.items():
+                    stored.setdefault(key, {}).setdefault(scope, {}).update(properties)
+            else:
+                stored[key] = value
+        return self._store(events, stored)
+
+    def _get(self, events: dict[str, dict], eventId: str) -> dict:
+        return self._response(self._get_live(events, eventId))
+
+    def _delete(self, events: dict[str, dict], eventId: str) -> str:
+        self._get_live(events, eventId)
+        self._store(events, {"id": eventId, "status": "cancelled"})
+        return ""
+
+    @staticmethod
+    def _matches(body: dict, params: dict) -> bool:
+        """Checks the time window, free text and extended property filters of a listing"""
+
+        if params.get("timeMin") and parse_event_time(body["end"]) <= to_aware(
+            params["timeMin"]
+        ):
+            return False
+        if params.get("timeMax") and parse_event_time(body["start"]) >= to_aware(
+            params["timeMax"]
+        ):
+            return False
+
+        query = params.get("q")
+        if query:
+            text = " ".join(
+                str(body.get(key) or "")
+                for key in ("summary", "description", "location")
+            ).lower()
+            if not all(term in text for term in query.lower().split()):
+                return False
+
+        for scope in ("shared", "private"):
+            constraints = params.get(f"{scope}ExtendedProperty") or []
+            if isinstance(constraints, str):
+                constraints = [constraints]
+            properties = body.get("extendedProperties", {}).get(scope, {})
+            for constraint in constraints:
+                key, _, value = constraint.partition("=")
+                if properties.get(key) != value:
+                    return False
+
+        return True
+
+    def _list(self, events: dict[str, dict], **params) -> dict:
+        sync_token = params.get("syncToken")
+        if sync_token is not None:
+            since = int(sync_token)
+            if since < self.min_sync_sequence:
+                raise make_http_error(410)
+            items = [body for body in events.values() if body["updated"] > since]
+        else:
+            items = [
+                body
+                for body in events.values()
+                if body.get("status") != "cancelled" and self._matches(body, params)
+            ]
+
+        items.sort(key=lambda body: body["updated"])
+        offset = int(params.get("pageToken") or 0)
+        page_size = min(params.get("maxResults") or self.page_size, self.page_size)
+        page = items[offset : offset + page_size]
+
+        response = {"items": [self._response(body) for body in page]}
+        if offset + page_size < len(items):
+            response["nextPageToken"] = str(offset + page_size)
+        else:
+            response["nextSyncToken"] = str(self.sequence)
+        return response
+
+    def add_event(self, event: Event, calendar_id: str = None, **kwargs) -> Event:
+        """Creates the event, returns it with the assigned id"""
+
+        response = (
+            self.service.events()
+            .insert(
+                calendarId=calendar_id or self.default_calendar,
+                body=EventSerializer.to_json(event),
+            )
+            .execute()
+        )
+        return EventSerializer.to_object(response)
+
+    def get_event(self, event_id: str, calendar_id: str = None, **kwargs) -> Event:
+        response = (
+            self.service.events()
+            .get(calendarId=calendar_id or self.default_calendar, eventId=event_id)
+            .execute()
+        )
+        return EventSerializer.to_object(response)
+
+    def update_event(self, event: Event, calendar_id: str = None, **kwargs) -> Event:
+        response = (
+            self.service.events()
+            .update(
+                calendarId=calendar_id or self.default_calendar,
+                eventId=event.id,
+                body=EventSerializer.to_json(event),
+            )
+            .execute()
+        )
+        return EventSerializer.to_object(response)
+
+    def delete_event(
+        self, event: Union[Event, str], calendar_id: str = None, **kwargs
+    ) -> None:
+        event_id = event if isinstance(event, str) else event.id
+        if event_id is None:
+            raise ValueError("Event has to have event_id to be deleted.")
+        self.service.events().delete(
+            calendarId=calendar_id or self.default_calendar, eventId=event_id
+        ).execute()
+
+    def get_events(
+        self,
+        time_min: Union[date, datetime] = None,
+        time_max: Union[date, datetime] = None,
+        order_by: str = None,
+        timezone: str = None,
+        single_events: bool = False,
+        query: str = None,
+        calendar_id: str = None,
+        **kwargs,
+    ) -> Iterable[Event]:
+        """Lists the events with the defaults of GoogleCalendar.get_events, a one year window from now"""
+
+        time_min = time_min or datetime.now()
+        time_max = time_max or time_min + timedelta(days=365)
+        page_token = None
+        while True:
+            response = (
+                self.service.events()
+                .list(
+                    calendarId=calendar_id or self.default_calendar,
+                    timeMin=to_aware(time_min).isoformat(),
+                    timeMax=to_aware(time_max).isoformat(),
+                    q=query,
+                    pageToken=page_token,
+                    **kwargs,
+                )
+                .execute()
+            )
+            for item in response.get("items", []):
+                yield EventSerializer.to_object(item)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
@@ -0,0 +1,263 @@
+import copy
+
+from typing import Callable
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from gcsa.event import Attendee, Event
+from gcsa.google_calendar import GoogleCalendar
+
+from app.game import (
+    Game,
+    DEFAULT_DESCRIPTION,
+    DESCRIPTION_VARIANTS,
+    FINGERPRINT_PROPERTY,
+    get_event_fingerprint,
+)
+from app.reconcile import ReconcilePlan
+from app.state_store import StateStore
+from app.rate_limiter import AdaptiveRateLimiter
+from app.game_event_processor import GameEventProcessor
+
+
+@dataclass(frozen=True)
+class CalendarTarget:
+    """Class for representing a calendar the games of a team are synced to"""
+
+    name: str
+    calendar_id: str
+    attendees: tuple[str, ...] = ()
+    description: str = DEFAULT_DESCRIPTION
+
+    def __post_init__(self):
+        if self.description not in DESCRIPTION_VARIANTS:
+            raise ValueError(
+                f"Unknown description variant of the {self.name} target: {self.description}"
+            )
+
+    @classmethod
+    def from_config(
+        cls, target_config: dict, default_calendar: str
+    ) -> "CalendarTarget":
+        """Creates a CalendarTarget from an item of the "targets" of a team config
+
+        :param target_config: The target config with name, calendar_id, attendees and description
+        :param default_calendar: Calendar of the target if calendar_id is not set
+        :return: The CalendarTarget object
+        """
+
+        return cls(
+            name=target_config["name"],
+            calendar_id=target_config.get("calendar_id", default_calendar),
+            attendees=tuple(target_config.get("attendees", ())),
+            description=target_config.get("description", DEFAULT_DESCRIPTION),
+        )
+
+
+def get_targets(team_config: dict, default_calendar: str) -> list[CalendarTarget]:
+    """Returns the calendar targets of a team.
+
+    A team config without "targets" has one target: the default calendar with the
+    attendees_2024 attendees and the default description.
+
+    :param team_config: Config of the team from the "schedules" section of the app config
+    :param default_calendar: The calendar of the authenticated client
+    :return: The CalendarTarget objects
+    """
+
+    if "targets" not in team_config:
+        return [
+            CalendarTarget(
+                name=team_config["team_name"],
+                calendar_id=default_calendar,
+                attendees=tuple(team_config.get("attendees_2024", ())),
+            )
+        ]
+
+    targets = [
+        CalendarTarget.from_config(target_config, default_calendar)
+        for target_config in team_config["targets"]
+    ]
+    # targets sharing a calendar would see each other's events as duplicates
+    for attribute in ("name", "calendar_id"):
+        values = [getattr(target, attribute) for target in targets]
+        if len(set(values)) != len(values):
+            raise ValueError(
+                f"The targets of {team_config['team_name']} must have different {attribute}s"
+            )
+
+    return targets
+
+
+def with_attendees(event: Event, attendees: tuple[str, ...]) -> Event:
+    """Returns a copy of a rendered event with other attendees and the matching fingerprint
+
+    The copy is shallow, only the attendees and the extended properties are replaced,
+    so the copies of an event must not be modified otherwise.
+
+    :param event: The event rendered by Game.to_gc_event
+    :param attendees: Emails of the attendees of the copy
+    :return: The copy of the event
+    """
+
+    target_event = copy.copy(event)
+    target_event.attendees = [Attendee(email) for email in attendees]
+    fingerprint = get_event_fingerprint(
+        {
+            "summary": event.summary,
+            "description": event.description,
+            "location": event.location,
+            "start": event.start,
+            "end": event.end,
+            "attendees": list(attendees),
+        }
+    )
+    shared_properties = event.other["extendedProperties"]["shared"]
+    target_event.other = {
+        **event.other,
+        "extendedProperties": {
+            "shared": {**shared_properties, FINGERPRINT_PROPERTY: fingerprint}
+        },
+    }
+
+    return target_event
+
+
+def render_target_events(
+    games: list[Game], targets: list[CalendarTarget]
+) -> dict[str, dict[str, Event]]:
+    """Renders the events of the games for every target.
+
+    The event of a game is rendered once per description variant, the targets get
+    copies of it with their own attendees.
+
+    :param games: The scraped games
+    :param targets: The calendar targets
+    :return: The events keyed by target name, then by match key
+    """
+
+    events = {target.name: {} for target in targets}
+    for game in games:
+        rendered = {}
+        for target in targets:
+            if target.description not in rendered:
+                rendered[target.description] = game.to_gc_event(
+                    [], description=game.get_description(target.description)
+                )
+            events[target.name][game.match_key] = with_attendees(
+                rendered[target.description], target.attendees
+            )
+
+    return events
+
+
+class FanOutProcessor:
+    """Syncs the games of one scrape to several target calendars concurrently.
+
+    Every target has its own client, so the writes of the targets run in parallel
+    threads without sharing the HTTP transport of the Google API client.
+    """
+
+    def __init__(
+        self,
+        targets: list[CalendarTarget],
+        client_factory: Callable[[str], GoogleCalendar],
+        max_workers: int = 1,
+        state_store: StateStore = None,
+        rate_limiter: AdaptiveRateLimiter = None,
+    ) -> None:
+        """Initializes the FanOutProcessor object
+
+        :param targets: The calendar targets
+        :param client_factory: Creates a client of the calendar with the given id
+        :param max_workers: Max number of concurrent writes within a target, defaults to 1
+        :param state_store: Local store of the events of the target calendars, defaults to None
+        :param rate_limiter: Paces the writes of all targets, they share the quota of the user, defaults to a new limiter
+        """
+        self.targets = targets
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.state_store = state_store
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+    @classmethod
+    def from_processor(
+        cls, gep: GameEventProcessor, targets: list[CalendarTarget]
+    ) -> "FanOutProcessor":
+        """Creates a FanOutProcessor with the credentials and settings of a GameEventProcessor
+
+        :param gep: The GameEventProcessor of the default calendar
+        :param targets: The calendar targets
+        :return: The FanOutProcessor object
+        """
+
+        return cls(
+            targets,
+            client_factory=lambda calendar_id: GoogleCalendar(
+                calendar_id, credentials=gep.gc_client.credentials
+            ),
+            max_workers=gep.max_workers,
+            state_store=gep.state_store,
+            rate_limiter=gep.rate_limiter,
+        )
+
+    def create_processor(self, target: CalendarTarget) -> GameEventProcessor:
+        """Creates the GameEventProcessor of a target calendar"""
+
+        return GameEventProcessor(
+            self.client_factory(target.calendar_id),
+            max_workers=self.max_workers,
+            client_factory=lambda: self.client_factory(target.calendar_id),
+            state_store=self.state_store,
+            rate_limiter=self.rate_limiter,
+        )
+
+    def sync_target(
+        self,
+        target: CalendarTarget,
+        games: list[Game],
+        events: dict[str, Event],
+        dry_run: bool,
+        delete_missing: bool = False,
+    ) -> ReconcilePlan:
+        """Reconciles one target calendar with its pre-rendered events
+
+        :param target: The calendar target
+        :param games: The scraped games of the team
+        :param events: The events of the target keyed by match key
+        :param dry_run: Dry run flag, only prints the plan if set to True
+        :param delete_missing: Delete the events of games that are no longer scraped, defaults to False
+        :return: The executed ReconcilePlan
+        """
+
+        print(f"Syncing the {target.name} calendar {target.calendar_id}")
+        return self.create_processor(target).reconcile(
+            games,
+            list(target.attendees),
+            dry_run=dry_run,
+            delete_missing=delete_missing,
+            render=lambda game: events[game.match_key],
+        )
+
+    def sync(
+        self, games: list[Game], dry_run: bool = False, delete_missing: bool = False
+    ) -> dict[str, ReconcilePlan]:
+        """Reconciles every target calendar with the games
+
+        :param games: The scraped games of the team
+        :param dry_run: Dry run flag, only prints the plans if set to True, defaults to False
+        :param delete_missing: Delete the events of games that are no longer scraped, only for the
+            complete unfiltered game list of the schedule page, defaults to False
+        :return: The executed ReconcilePlan of every target, keyed by target name
+        """
+
+        events = render_target_events(games, self.targets)
+        with ThreadPoolExecutor(max_workers=max(len(self.targets), 1)) as executor:
+            plans = executor.map(
+                lambda target: self.sync_target(
+                    target, games, events[target.name], dry_run, delete_missing
+                ),
+                self.targets,
+            )
+
+            return {target.name: plan for target, plan in zip(self.targets, plans)}
@@ -1,17 +1,77 @@
 import os
+import re
+import sys
+import json
 import time
+import hashlib
 
 from datetime import datetime, timedelta
-from gcsa.google_calendar import GoogleCalendar
 from gcsa.event import Event, Reminder
-from dataclasses import dataclass
-from dotenv import load_dotenv
+from dataclasses import dataclass, field
 
-load_dotenv()
-HOME_TEAM_NAME = os.getenv("TEAM_NAME")
+from app.settings import get_env
 
+HOME_TEAM_NAME = get_env("TEAM_NAME")
 
-@dataclass
+# extended properties of the events created by the scraper
+SCRAPER_TAG_PROPERTY = "scraper_automatic_event"
+MATCH_KEY_PROPERTY = "scraper_match_key"
+FINGERPRINT_PROPERTY = "scraper_fingerprint"
+
+# description variants of the events, e.g. for separate players and stewards calendars
+DEFAULT_DESCRIPTION = "default"
+DESCRIPTION_VARIANTS = (DEFAULT_DESCRIPTION, "players", "stewards", "club")
+
+DATE_FORMAT = "%Y. %m. %d.  %H:%M"
+DATE_PATTERN = re.compile(r"(\d{4})\. (\d{2})\. (\d{2})\.  (\d{2}):(\d{2})")
+
+
+def parse_game_date(date: str) -> datetime:
+    """Parses a game date in the adatbank "2022. 01. 01.  12:00" format.
+
+    The fixed width format is matched with a precompiled pattern, anything else
+    falls back to strptime, so invalid dates raise ValueError just like before.
+
+    Args:
+        date (str): The date string of the game.
+
+    Returns:
+        datetime: The parsed datetime.
+    """
+    match = DATE_PATTERN.fullmatch(date)
+    if match is None:
+        return datetime.strptime(date, DATE_FORMAT)
+
+    year, month, day, hour, minute = match.groups()
+    return datetime(int(year), int(month), int(day), int(hour), int(minute))
+
+
+def get_event_fingerprint(event_data: dict) -> str:
+    """Computes a stable fingerprint of the synced content of a rendered event.
+
+    Comparing the fingerprint stored on an existing event to the one of the newly
+    rendered event tells if the event changed without comparing it field by field.
+
+    Args:
+        event_data (dict): The summary, description, location, start, end and attendees of the event.
+
+    Returns:
+        str: A short hex digest that changes whenever any of these attributes change.
+    """
+    content = [
+        event_data["summary"],
+        event_data["description"],
+        event_data["location"],
+        event_data["start"].isoformat(),
+        event_data["end"].isoformat(),
+        sorted(event_data["attendees"]),
+    ]
+    serialized = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+
+    return hashlib.sha256(serialized.encode()).hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
 class Game:
     """Class for representing a game"""
 
@@ -20,6 +80,14 @@ class Game:
     venue: str
     date: str
     division: str
+    # parsed once from date, see __post_init__
+    start_datetime: datetime = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # team, venue and division names repeat across thousands of games
+        for name in ("home_team", "away_team", "venue", "division"):
+            object.__setattr__(self, name, sys.intern(getattr(self, name)))
+        object.__setattr__(self, "start_datetime", parse_game_date(self.date))
 
     @property
     def summary(self):
@@ -32,14 +100,14 @@ class Game:
         return f"{self.home_team} - {self.away_team}"
 
     @property
-    def start_datetime(self):
+    def match_key(self):
         """
-        Get the start datetime of the game.
+        Get the stable key of the fixture, which does not change when the game is rescheduled.
 
         Returns:
-            datetime: The start datetime of the game.
+            str: The match key in the format "{division}|{home_team}|{away_team}".
         """
-        return datetime.strptime(self.date, "%Y. %m. %d.  %H:%M")
+        return f"{self.division}|{self.home_team}|{self.away_team}"
 
     @property
     def end_datetime(self):
@@ -99,19 +167,48 @@ class Game:
             \nÉrkezés játékosoknak: {self.arrival_datetime_str}
             \nTALÁLKOZÓ A MEGBESZÉLT IDŐBEN A MEGBESZÉLT HELYEN!"""
 
-    def to_gc_event(self, attendees: list[str]) -> Event:
+    def get_description(self, variant: str = DEFAULT_DESCRIPTION) -> str:
+        """
+        Get a variant of the description of the game.
+
+        Args:
+            variant (str): One of DESCRIPTION_VARIANTS. "default" is the description property,
+                "players" only has the arrival time of the players, "stewards" only the arrival
+                time of the stewards and "club" only the division.
+
+        Returns:
+            str: The description of the game.
+        """
+        if variant == DEFAULT_DESCRIPTION:
+            return self.description
+        if variant == "players":
+            return f"""{self.division} bajnoki mérkőzés 
+            \nÉrkezés játékosoknak: {self.arrival_datetime_str}
+            \nTALÁLKOZÓ A MEGBESZÉLT IDŐBEN A MEGBESZÉLT HELYEN!"""
+        if variant == "stewards":
+            return f"""{self.division} bajnoki mérkőzés 
+            \nÉrkezés rendezőknek: {self.steward_datetime_str}
+            \nTALÁLKOZÓ A MEGBESZÉLT IDŐBEN A MEGBESZÉLT HELYEN!"""
+        if variant == "club":
+            return f"{self.division} bajnoki mérkőzés"
+
+        raise ValueError(f"Unknown description variant: {variant}")
+
+    def to_gc_event(self, attendees: list[str], description: str = None) -> Event:
         """
         Convert the Game object to a Google Calendar event.
 
         Args:
             attendees (list[str]): A list of attendees for the event.
+            description (str): An already rendered description, e.g. from get_description,
+                defaults to the description property.
 
         Returns:
             Event: The Google Calendar event representing the game.
         """
         game_event_data = {
             "summary": self.summary,
-            "description": self.description,
+            "description": self.description if description is None else description,
             "location": self.venue,
             "start": self.start_datetime,
             "end": self.end_datetime,
@@ -120,7 +217,14 @@ class Game:
             "default_reminders": False,
             "reminders": Reminder("email", 60 * 48),
             "minutes_before_popup_reminder": 60 * 24,
-            "extendedProperties": {"public": {"scraper_automatic_event": "yes"}},
+        }
+        # the Calendar API calls the public extended properties "shared"
+        game_event_data["extendedProperties"] = {
+            "shared": {
+                SCRAPER_TAG_PROPERTY: "yes",
+                MATCH_KEY_PROPERTY: self.match_key,
+                FINGERPRINT_PROPERTY: get_event_fingerprint(game_event_data),
+            }
         }
 
         gc_event = Event(**game_event_data)
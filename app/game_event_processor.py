@@ -1,27 +1,80 @@
 import os
-import time
 
 from datetime import datetime, timedelta
 from gcsa.google_calendar import GoogleCalendar
 from gcsa.event import Event, Reminder
 from dataclasses import dataclass
-from dotenv import load_dotenv
+from typing import Callable
 
-from app.game import Game
+from app import metrics
+from app.game import Game, SCRAPER_TAG_PROPERTY
+from app.calendar_batch import (
+    CalendarBatchWriter,
+    EventPatch,
+    WriteResult,
+    WriteSummary,
+    to_operations,
+)
+from app.calendar_executor import CalendarPoolExecutor
+from app.reconcile import (
+    ReconcilePlan,
+    build_reconcile_plan,
+    get_changed_fields,
+    get_match_key,
+    get_shared_property,
+)
+from app.calendar_mirror import CalendarMirror
+from app.state_store import StateStore
+from app.rate_limiter import AdaptiveRateLimiter
+from app.settings import get_env
 
-load_dotenv(override=True)
-HOME_TEAM_NAME = os.getenv("TEAM_NAME")
+HOME_TEAM_NAME = get_env("TEAM_NAME")
+
+# partial response mask of the event listing, only the attributes the scraper reads.
+# The listed events are incomplete (no reminders, colorId, timezone of the times...),
+# so they must only be changed with patches of the synced fields: a full update (PUT)
+# of a listed event would clear every field missing from the mask
+EVENT_LIST_FIELDS = (
+    "nextPageToken,"
+    "items(id,summary,description,location,start,end,"
+    "attendees(email,responseStatus),extendedProperties)"
+)
 
 
 class GameEventProcessor:
     """Class for processing game events in Google Calendar"""
 
-    def __init__(self, gc_client: GoogleCalendar) -> None:
+    def __init__(
+        self,
+        gc_client: GoogleCalendar,
+        mirror: CalendarMirror = None,
+        max_workers: int = 1,
+        client_factory: Callable[[], GoogleCalendar] = None,
+        state_store: StateStore = None,
+        rate_limiter: AdaptiveRateLimiter = None,
+    ) -> None:
         """Initialize the GameEventProcessor object.
 
         :param gc_client: The GoogleCalendar client object.
+        :param mirror: Local mirror of the scraper events to read from instead of listing the calendar, defaults to None
+        :param max_workers: Max number of calendar writes running at the same time, 1 writes one by one, defaults to 1
+        :param client_factory: Creates the client of a write worker thread, defaults to a client with the credentials of gc_client
+        :param state_store: Local store of the fixture -> event mapping to read from instead of listing the calendar, defaults to None
+        :param rate_limiter: Paces the calendar writes by the observed quota, defaults to a limiter of this process
         """
         self.gc_client = gc_client
+        self.mirror = mirror
+        self.max_workers = max_workers
+        self.client_factory = client_factory or self.create_client
+        self.state_store = state_store
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+    def create_client(self) -> GoogleCalendar:
+        """Creates a new client with the credentials of gc_client, for a worker thread"""
+
+        return GoogleCalendar(
+            self.gc_client.default_calendar, credentials=self.gc_client.credentials
+        )
 
     def create_game_events(
         self,
@@ -29,16 +82,51 @@ class GameEventProcessor:
         attendees: list[str],
         apply_date_filter: bool = True,
         dry_run: bool = False,
-    ) -> None:
+        use_batch: bool = False,
+        skip_existing: bool = False,
+    ) -> WriteSummary:
         """Creating game events in Google Calendar.
 
         :param games: Games to create events for.
         :param attendees: Attendees to invite to the events.
         :param apply_date_filter: Flag to apply date filter for the games, defaults to True
         :param dry_run: Dry run flag, only prints if set to True, defaults to False
+        :param use_batch: Send the inserts in batch requests instead of one by one, defaults to False
+        :param skip_existing: Skip the games that already have a scraper created event, the
+            untagged events of older versions are patched with the tag instead, defaults to False
+        :return: The WriteSummary of the inserts and patches, every write is skipped in dry run mode
         """
 
+        existing_keys = set()
+        legacy_events = {}
+        if skip_existing:
+            legacy_events = self.list_legacy_events(games)
+            existing_keys = {
+                get_match_key(event) for event in self.list_scraper_events()
+            }
+
+        game_events = []
+        legacy_patches = []
+        summary = WriteSummary()
         for game in games:
+            if game.match_key in existing_keys:
+                print(f"Skipping existing event: {game.summary}")
+                continue
+            if game.summary in legacy_events:
+                legacy_event = legacy_events[game.summary]
+                game_event = game.to_gc_event(attendees)
+                game_event.event_id = legacy_event.event_id
+                legacy_patches.append(
+                    EventPatch(game_event, get_changed_fields(legacy_event, game_event))
+                )
+                print(
+                    f"Tagging existing event: {game.summary} in dry_run mode: {dry_run}"
+                )
+                continue
+            if game.summary in existing_keys:
+                print(f"Skipping existing event: {game.summary}")
+                continue
+
             game_event = game.to_gc_event(attendees)
 
             tz = game_event.start.tzinfo
@@ -50,24 +138,177 @@ class GameEventProcessor:
 
             if game_event.start > compare_date:
                 print(f"Creating event: {game_event} in dry_run mode: {dry_run}")
-                if not dry_run:
-                    time.sleep(20)
+                if use_batch or self.max_workers > 1:
+                    game_events.append(game_event)
+                elif dry_run:
+                    summary.skipped.append(("insert", game_event))
+                else:
+                    metrics.increment("calendar_writes")
                     try:
-                        self.gc_client.add_event(game_event, send_updates="none")
+                        with metrics.phase("calendar_write"):
+                            created_event = self.rate_limiter.call(
+                                self.gc_client.add_event,
+                                game_event,
+                                send_updates="none",
+                            )
+                        result = WriteResult(
+                            "insert", game_event, True, response=created_event
+                        )
+                        self.save_state([result])
                     except Exception as e:
+                        metrics.increment("calendar_write_errors")
                         print(f"Error creating event: {e}")
+                        result = WriteResult("insert", game_event, False, error=e)
+                    summary.results.append(result)
+
+        if use_batch:
+            summary = self.write_batch(inserts=game_events, dry_run=dry_run)
+        elif self.max_workers > 1:
+            summary = self.write_concurrent(inserts=game_events, dry_run=dry_run)
+        if legacy_patches:
+            migration = self.write_batch(patches=legacy_patches, dry_run=dry_run)
+            summary.results.extend(migration.results)
+            summary.skipped.extend(migration.skipped)
+        return summary
 
-    def delete_game_events(self, dry_run: bool = False) -> None:
+    def delete_game_events(
+        self, dry_run: bool = False, use_batch: bool = False
+    ) -> WriteSummary:
         """Delete game events from Google Calendar.
 
         :param dry_run: Dry run flag, only prints if set to True, defaults to False
+        :param use_batch: Send the deletes in batch requests instead of one by one, defaults to False
+        :return: The WriteSummary of the deletes, every delete is skipped in dry run mode
         """
 
-        for game_event in self.gc_client.get_events(query=HOME_TEAM_NAME):
+        game_events = []
+        summary = WriteSummary()
+        for game_event in self.list_events(time_min=datetime.now()):
             if game_event.start > datetime.now(game_event.start.tzinfo):
                 print(f"Deleting event: {game_event} in dry_run mode: {dry_run}")
-                if not dry_run:
-                    self.gc_client.delete_event(game_event)
+                if use_batch or self.max_workers > 1:
+                    game_events.append(game_event)
+                elif dry_run:
+                    summary.skipped.append(("delete", game_event))
+                else:
+                    metrics.increment("calendar_writes")
+                    try:
+                        with metrics.phase("calendar_write"):
+                            self.rate_limiter.call(
+                                self.gc_client.delete_event, game_event
+                            )
+                        result = WriteResult("delete", game_event, True)
+                        self.save_state([result])
+                    except Exception as e:
+                        metrics.increment("calendar_write_errors")
+                        print(f"Error deleting event: {e}")
+                        result = WriteResult("delete", game_event, False, error=e)
+                    summary.results.append(result)
+
+        if use_batch:
+            return self.write_batch(deletes=game_events, dry_run=dry_run)
+        if self.max_workers > 1:
+            return self.write_concurrent(deletes=game_events, dry_run=dry_run)
+        return summary
+
+    def write_batch(
+        self,
+        inserts: list[Event] = (),
+        deletes: list[Event] = (),
+        dry_run: bool = False,
+        patches: list[EventPatch] = (),
+    ) -> WriteSummary:
+        """Sends calendar inserts, patches and deletes in batch requests.
+
+        :param inserts: Events to create
+        :param deletes: Events to delete
+        :param dry_run: Dry run flag, nothing is sent if set to True, defaults to False
+        :param patches: Partial updates of the changed fields of existing events
+        :return: The WriteSummary of the writes, every write is skipped in dry run mode
+        """
+
+        if dry_run:
+            return WriteSummary(skipped=to_operations(inserts, deletes, patches))
+
+        with metrics.phase("calendar_write"):
+            results = CalendarBatchWriter(
+                self.gc_client, rate_limiter=self.rate_limiter
+            ).write(inserts, deletes, patches)
+        self.record_results(results)
+        self.save_state(results)
+        for result in results:
+            if not result.ok:
+                print(
+                    f"Error in {result.operation} of event {result.event}: {result.error}"
+                )
+
+        return WriteSummary(results=results)
+
+    def write_concurrent(
+        self,
+        inserts: list[Event] = (),
+        deletes: list[Event] = (),
+        dry_run: bool = False,
+        patches: list[EventPatch] = (),
+    ) -> WriteSummary:
+        """Sends calendar inserts, patches and deletes concurrently, max_workers at a time.
+
+        :param inserts: Events to create
+        :param deletes: Events to delete
+        :param dry_run: Dry run flag, nothing is sent if set to True, defaults to False
+        :param patches: Partial updates of the changed fields of existing events
+        :return: The WriteSummary of the writes, every write is skipped in dry run mode
+        """
+
+        if dry_run:
+            return WriteSummary(skipped=to_operations(inserts, deletes, patches))
+
+        executor = CalendarPoolExecutor(
+            self.client_factory,
+            max_workers=self.max_workers,
+            rate_limiter=self.rate_limiter,
+        )
+        with metrics.phase("calendar_write"):
+            results = executor.write(inserts, deletes, patches)
+        self.record_results(results)
+        self.save_state(results)
+
+        return WriteSummary(results=results)
+
+    @staticmethod
+    def record_results(results: list[WriteResult]) -> None:
+        """Counts the sent and the failed calendar writes in the run metrics"""
+
+        metrics.increment("calendar_writes", len(results))
+        metrics.increment(
+            "calendar_write_errors", sum(1 for result in results if not result.ok)
+        )
+
+    def save_state(self, results: list[WriteResult]) -> None:
+        """Records the successful calendar writes in the state store, if there is one"""
+
+        if self.state_store is not None:
+            self.state_store.record_results(self.gc_client.default_calendar, results)
+
+    def load_state(self, time_min: datetime = None) -> list[Event]:
+        """Returns the events of the calendar from the state store.
+
+        The first time a calendar is used its upcoming scraper events are listed once
+        and stored, after that the store is updated by the writes of the scraper and
+        listed again when the seed is older than the max_age of the store.
+
+        :param time_min: Only events ending after this, timezone aware datetime, defaults to None
+        :return: List of the stored events, ordered by start
+        """
+
+        calendar_id = self.gc_client.default_calendar
+        if self.state_store.is_stale(calendar_id):
+            print(f"Seeding the local state store from the calendar {calendar_id}")
+            self.state_store.seed(
+                calendar_id, self.list_events(time_min=datetime.now())
+            )
+
+        return self.state_store.get_events(calendar_id, time_min=time_min)
 
     def get_game_events(self, apply_date_filter: bool = False) -> list[Event]:
         """Gets game events from Google Calendar.
@@ -75,8 +316,21 @@ class GameEventProcessor:
         :param apply_date_filter: Flag to apply date filter for the games, defaults to False
         :return: List of games from Google Calendar
         """
+        if self.state_store is not None:
+            print("Getting events from the local state store")
+            time_min = datetime.now().astimezone() if apply_date_filter else None
+            return self.load_state(time_min=time_min)
+
+        if self.mirror is not None:
+            print("Getting events from the local calendar mirror")
+            with metrics.phase("calendar_read"):
+                self.mirror.sync()
+            time_min = datetime.now().astimezone() if apply_date_filter else None
+            return self.mirror.get_events(time_min=time_min)
+
         print(f"Getting events from Google Calendar for '{HOME_TEAM_NAME}'")
-        games = self.gc_client.get_events(query=HOME_TEAM_NAME)
+        time_min = datetime.now() if apply_date_filter else None
+        games = self.list_events(time_min=time_min)
         if apply_date_filter:
             return [
                 game for game in games if game.start > datetime.now(game.start.tzinfo)
@@ -84,12 +338,147 @@ class GameEventProcessor:
         else:
             return games
 
-    def update_game_events(self, games: list[Game], dry_run: bool = False) -> None:
+    def list_scraper_events(self) -> list[Event]:
+        """Lists the upcoming events created by the scraper with one paginated listing.
+
+        :return: List of the scraper created events from Google Calendar
+        """
+
+        if self.state_store is not None:
+            return self.load_state(time_min=datetime.now().astimezone())
+
+        if self.mirror is not None:
+            with metrics.phase("calendar_read"):
+                self.mirror.sync()
+            return self.mirror.get_events(time_min=datetime.now().astimezone())
+
+        return self.list_events(time_min=datetime.now())
+
+    def list_events(self, time_min: datetime = None) -> list[Event]:
+        """Lists the scraper created events with the filtering done by the API.
+
+        Only the events tagged by the scraper in the time window are returned, with
+        a partial response of the attributes the scraper reads, so unrelated events
+        of a shared calendar are neither transferred nor matched.
+
+        :param time_min: Only events ending after this, defaults to now
+        :return: List of the scraper created events from Google Calendar
+        """
+
+        with metrics.phase("calendar_read"):
+            events = list(
+                self.gc_client.get_events(
+                    time_min=time_min,
+                    sharedExtendedProperty=f"{SCRAPER_TAG_PROPERTY}=yes",
+                    fields=EVENT_LIST_FIELDS,
+                )
+            )
+        metrics.increment("calendar_events_listed", len(events))
+
+        return events
+
+    def list_legacy_events(self, games: list[Game]) -> dict[str, Event]:
+        """Lists the upcoming events of the games created by the versions before the shared tag.
+
+        Those versions put the tag into the "public" extended properties, which the
+        Calendar API drops, so their events are only found by the old free text search
+        of the team name. Only the events with the summary of a game are returned, the
+        other events of the search are not the scraper's to touch.
+
+        :param games: The scraped games
+        :return: The untagged events keyed by summary
+        """
+
+        if not HOME_TEAM_NAME or not games:
+            return {}
+        if self.state_store is not None and not self.state_store.is_stale(
+            self.gc_client.default_calendar
+        ):
+            # searched when the store was seeded, the events were tagged since then
+            return {}
+
+        with metrics.phase("calendar_read"):
+            events = list(
+                self.gc_client.get_events(
+                    time_min=datetime.now(),
+                    query=HOME_TEAM_NAME,
+                    fields=EVENT_LIST_FIELDS,
+                )
+            )
+        metrics.increment("calendar_events_listed", len(events))
+
+        summaries = {game.summary for game in games}
+        return {
+            event.summary: event
+            for event in events
+            if get_shared_property(event, SCRAPER_TAG_PROPERTY) != "yes"
+            and event.summary in summaries
+        }
+
+    def reconcile(
+        self,
+        games: list[Game],
+        attendees: list[str],
+        dry_run: bool = False,
+        delete_missing: bool = False,
+        render: Callable[[Game], Event] = None,
+    ) -> ReconcilePlan:
+        """Makes the calendar match the games with the minimal number of writes.
+
+        :param games: Games that should be in the calendar.
+        :param attendees: Attendees to invite to the events.
+        :param dry_run: Dry run flag, only prints the plan if set to True, defaults to False
+        :param delete_missing: Delete the events of games that are no longer scraped, only for the
+            complete unfiltered game list of the schedule page, defaults to False
+        :param render: Returns the already rendered event of a game, defaults to game.to_gc_event(attendees)
+        :return: The executed ReconcilePlan
+        """
+
+        # the untagged events of older versions match by summary and get the tag patched in
+        legacy_events = self.list_legacy_events(games)
+        plan = build_reconcile_plan(
+            games,
+            self.list_scraper_events() + list(legacy_events.values()),
+            attendees,
+            delete_missing=delete_missing,
+            render=render,
+        )
+
+        print(f"Reconcile plan: {plan.summary()} in dry_run mode: {dry_run}")
+        for game_event in plan.to_create:
+            print(f"Creating event: {game_event}")
+        for event_patch in plan.to_update:
+            print(f"Updating event: {event_patch}")
+        for game_event in plan.to_delete:
+            print(f"Deleting event: {game_event}")
+
+        if not plan.is_empty:
+            plan.write_summary = self.write_batch(
+                inserts=plan.to_create,
+                deletes=plan.to_delete,
+                patches=plan.to_update,
+                dry_run=dry_run,
+            )
+
+        return plan
+
+    def update_game_events(
+        self,
+        games: list[Game],
+        attendees: list[str],
+        dry_run: bool = False,
+        delete_missing: bool = False,
+    ) -> ReconcilePlan:
         """Updates game events in Google Calendar.
 
         :param games: Games to update events for.
-        :param dry_run: _description_, defaults to False
+        :param attendees: Attendees to invite to the events.
+        :param dry_run: Dry run flag, only prints if set to True, defaults to False
+        :param delete_missing: Delete the events of games that are no longer scraped, only for the
+            complete unfiltered game list of the schedule page, defaults to False
+        :return: The executed ReconcilePlan
         """
 
-        raise NotImplementedError("Update mode is not implemented yet.")
-        # gc.update_event(e, send_updates="all")
+        return self.reconcile(
+            games, attendees, dry_run=dry_run, delete_missing=delete_missing
+        )
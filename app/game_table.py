@@ -0,0 +1,237 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from app import game as game_module
+from app.game import Game
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_minutes(dt: datetime) -> int:
+    """Converts a naive datetime to whole minutes since EPOCH, the unit of the date column"""
+
+    return (dt - EPOCH) // timedelta(minutes=1)
+
+
+def to_minutes_ceil(dt: datetime) -> int:
+    """Converts a naive datetime to minutes since EPOCH, rounding the seconds up"""
+
+    return -((EPOCH - dt) // timedelta(minutes=1))
+
+
+class Categories:
+    """Interning table mapping the repeated strings of the games to integer codes"""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int:
+        """Returns the code of the value, -1 if it never occurred"""
+
+        return self.codes.get(value, -1)
+
+
+class GameTable:
+    """Column-wise collection of games sorted by their start datetime.
+
+    Teams, venues and divisions are stored as integer codes of a shared Categories
+    table, the start datetimes as a sorted array of minutes, so date range queries
+    are binary searches. The team filters use per-team indexes of the sorted rows,
+    built on first use, so they are binary searches as well.
+    """
+
+    def __init__(self, categories: Categories = None) -> None:
+        """Initializes an empty GameTable object, use from_games to fill it
+
+        :param categories: Interning table shared with the parent table, defaults to None
+        """
+        self.categories = categories or Categories()
+        self.starts = array("q")
+        self.home_teams = array("l")
+        self.away_teams = array("l")
+        self.venues = array("l")
+        self.divisions = array("l")
+        self.dates: list[str] = []
+        self.indexes: dict[str, dict[int, array]] = {}
+
+    @classmethod
+    def from_games(cls, games: Iterable[Game]) -> "GameTable":
+        """Creates a GameTable from Game objects
+
+        :param games: The games to store
+        :return: The GameTable object, sorted by start datetime
+        """
+
+        table = cls()
+        encode = table.categories.encode
+        for game in sorted(games, key=lambda game: game.start_datetime):
+            table.starts.append(to_minutes(game.start_datetime))
+            table.home_teams.append(encode(game.home_team))
+            table.away_teams.append(encode(game.away_team))
+            table.venues.append(encode(game.venue))
+            table.divisions.append(encode(game.division))
+            table.dates.append(game.date)
+
+        return table
+
+    def take(self, rows: Iterable[int]) -> "GameTable":
+        """Returns a new GameTable with the given rows, sharing the categories"""
+
+        if isinstance(rows, range) and rows.step == 1:
+
+            def select(column):
+                return column[rows.start : rows.stop]
+
+        else:
+            rows = list(rows)
+
+            def select(column):
+                values = map(column.__getitem__, rows)
+                return (
+                    array(column.typecode, values)
+                    if isinstance(column, array)
+                    else list(values)
+                )
+
+        table = GameTable(self.categories)
+        table.starts = select(self.starts)
+        table.home_teams = select(self.home_teams)
+        table.away_teams = select(self.away_teams)
+        table.venues = select(self.venues)
+        table.divisions = select(self.divisions)
+        table.dates = select(self.dates)
+
+        return table
+
+    def index(self, column: str) -> dict[int, array]:
+        """Returns the sorted rows of every code of a team column, built on first use"""
+
+        index = self.indexes.get(column)
+        if index is None:
+            index = self.indexes[column] = {}
+            for row, code in enumerate(getattr(self, column)):
+                rows = index.get(code)
+                if rows is None:
+                    rows = index[code] = array("l")
+                rows.append(row)
+
+        return index
+
+    def team_rows(self, column: str, code: int, rows: range) -> array:
+        """Returns the rows of the range having the code in a team column"""
+
+        team_rows = self.index(column).get(code, array("l"))
+
+        return team_rows[
+            bisect_left(team_rows, rows.start) : bisect_left(team_rows, rows.stop)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, row: int) -> Game:
+        values = self.categories.values
+        return Game(
+            home_team=values[self.home_teams[row]],
+            away_team=values[self.away_teams[row]],
+            venue=values[self.venues[row]],
+            date=self.dates[row],
+            division=values[self.divisions[row]],
+        )
+
+    def __iter__(self) -> Iterator[Game]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_games(self) -> list[Game]:
+        """Returns the stored games as a list of Game objects"""
+
+        return list(self)
+
+    def row_range(self, start: datetime = None, end: datetime = None) -> range:
+        """Returns the rows starting in [start, end) with two binary searches
+
+        The games start on whole minutes, so the bounds are rounded up to whole minutes.
+        """
+
+        first = 0 if start is None else bisect_left(self.starts, to_minutes_ceil(start))
+        last = (
+            len(self) if end is None else bisect_left(self.starts, to_minutes_ceil(end))
+        )
+
+        return range(first, max(first, last))
+
+    def filter(
+        self,
+        year: int = None,
+        start: datetime = None,
+        end: datetime = None,
+        home: bool = None,
+        opponent: str = None,
+        team: str = None,
+    ) -> "GameTable":
+        """Returns the games matching all the given filters as a new GameTable
+
+        :param year: Only games of this year, defaults to None
+        :param start: Only games starting at or after this datetime, defaults to None
+        :param end: Only games starting before this datetime, defaults to None
+        :param home: True for the home games, False for the away games of team, defaults to None
+        :param opponent: Only games against this team, defaults to None
+        :param team: Team the home filter refers to, defaults to HOME_TEAM_NAME
+        :return: The filtered GameTable object
+        """
+
+        if year is not None:
+            year_start, year_end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+            start = year_start if start is None else max(start, year_start)
+            end = year_end if end is None else min(end, year_end)
+
+        rows = self.row_range(start, end)
+        selections = []
+
+        if home is not None:
+            team_code = self.categories.lookup(team or game_module.HOME_TEAM_NAME)
+            column = "home_teams" if home else "away_teams"
+            selections.append(self.team_rows(column, team_code, rows))
+
+        if opponent is not None:
+            opponent_code = self.categories.lookup(opponent)
+            selections.append(
+                sorted(
+                    {
+                        *self.team_rows("home_teams", opponent_code, rows),
+                        *self.team_rows("away_teams", opponent_code, rows),
+                    }
+                )
+            )
+
+        if selections:
+            rows = selections[0]
+            for selection in selections[1:]:
+                selected = set(selection)
+                rows = [row for row in rows if row in selected]
+
+        return self.take(rows)
+
+    def next_games(self, n: int, after: datetime = None) -> list[Game]:
+        """Returns the next n games starting after the given datetime
+
+        :param n: Number of games to return
+        :param after: Reference datetime, defaults to now
+        :return: A list of at most n Game objects
+        """
+
+        after = after or datetime.now()
+        first = bisect_right(self.starts, to_minutes(after))
+
+        return [self[row] for row in range(first, min(first + n, len(self)))]
@@ -0,0 +1,324 @@
+import math
+import time
+import random
+import threading
+
+from functools import cache
+from typing import TYPE_CHECKING, Callable
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from app import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_POOL_SIZE = 4
+
+# seconds to wait for the TCP/TLS connection and between two bytes of the response
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 20.0
+# retries of a failed request, the waits between them are drawn uniformly from
+# [0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)]
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# consecutive failures opening the circuit of a host, and seconds it stays open
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+# response times kept per host, and the number needed before requests are hedged
+LATENCY_WINDOW = 100
+HEDGE_MIN_SAMPLES = 20
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> "requests.Session":
+    """Creates a requests Session backed by a keep-alive connection pool.
+
+    Every scraper sharing the returned session reuses the open TCP/TLS connections
+    to adatbank.mlsz.hu instead of doing a new handshake per page.
+
+    :param pool_size: Max number of pooled connections per host, defaults to DEFAULT_POOL_SIZE
+    :return: The configured Session object
+    """
+
+    # imported here, the CLI reads DEFAULT_POOL_SIZE at startup without needing requests
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the time budget of the run is used up"""
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised when the circuit of a host is open after repeated failures"""
+
+
+class Deadline:
+    """Time budget shared by every request of a run"""
+
+    def __init__(
+        self, budget: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initializes the Deadline object
+
+        :param budget: Seconds the requests of the run may take in total
+        :param clock: Returns the current time in seconds, defaults to time.monotonic
+        """
+        self.clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        """Returns the seconds left of the budget"""
+
+        return max(self.expires_at - self.clock(), 0)
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    After failure_threshold consecutive failures the host is not requested for
+    reset_timeout seconds, then one trial request decides if it is closed again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initializes the CircuitBreaker object
+
+        :param failure_threshold: Consecutive failures opening the circuit, defaults to DEFAULT_FAILURE_THRESHOLD
+        :param reset_timeout: Seconds the circuit stays open, defaults to DEFAULT_RESET_TIMEOUT
+        :param clock: Returns the current time in seconds, defaults to time.monotonic
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = defaultdict(int)
+        self.opened_at = {}
+        self.lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """Checks if the host can be requested"""
+
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return True
+            if self.clock() - opened_at < self.reset_timeout:
+                return False
+            # half-open: let one trial request through, a failure opens it again
+            self.opened_at[host] = self.clock()
+            return True
+
+    def record_success(self, host: str) -> None:
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self.lock:
+            self.failures[host] += 1
+            if self.failures[host] >= self.failure_threshold:
+                self.opened_at[host] = self.clock()
+
+
+class LatencyTracker:
+    """Keeps the recent response times of every host"""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.lock = threading.Lock()
+
+    def record(self, host: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies[host].append(seconds)
+
+    def percentile(self, host: str, percentile: float = 0.95) -> float:
+        """Returns the percentile of the recent response times, None without enough samples"""
+
+        with self.lock:
+            latencies = sorted(self.latencies[host])
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+
+        return latencies[math.ceil(percentile * len(latencies)) - 1]
+
+
+class ResilientHttp:
+    """Drop-in replacement of a requests Session for the page downloads.
+
+    Every request has connect and read timeouts. Connection errors, timeouts and
+    5xx/429 responses are retried with jittered exponential backoff, within the
+    deadline of the run if one is set. A host failing repeatedly is cut off by a
+    circuit breaker, and with hedging a second request is sent when the first one is
+    slower than the p95 response time of the host.
+    """
+
+    def __init__(
+        self,
+        session: "requests.Session" = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        deadline: Deadline = None,
+        breaker: CircuitBreaker = None,
+        hedge: bool = False,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initializes the ResilientHttp object
+
+        :param session: The requests Session sending the requests, defaults to None (the requests module)
+        :param connect_timeout: Seconds to wait for the connection, defaults to DEFAULT_CONNECT_TIMEOUT
+        :param read_timeout: Seconds to wait between two bytes of the response, defaults to DEFAULT_READ_TIMEOUT
+        :param max_retries: Retries of a failed request, defaults to DEFAULT_MAX_RETRIES
+        :param deadline: Time budget of all the requests, defaults to None (no budget)
+        :param breaker: Per-host circuit breaker, a new one is created if not set, defaults to None
+        :param hedge: Send a second request when the first is slower than the p95 latency, defaults to False
+        :param sleep: Waits the given seconds, defaults to time.sleep
+        :param clock: Returns the current time in seconds, defaults to time.monotonic
+        """
+        self.session = session
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.hedge = hedge
+        self.sleep = sleep
+        self.clock = clock
+        self.latencies = LatencyTracker()
+        # created up front, the scraper threads share the ResilientHttp
+        self._executor = (
+            ThreadPoolExecutor(thread_name_prefix="hedge") if hedge else None
+        )
+
+    def close(self) -> None:
+        """Shuts down the threads of the hedged requests and closes the session"""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.session is not None:
+            self.session.close()
+
+    def get_timeout(self) -> tuple[float, float]:
+        """Returns the (connect, read) timeouts, cut to the remaining deadline"""
+
+        if self.deadline is None:
+            return self.connect_timeout, self.read_timeout
+
+        remaining = self.deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError("The time budget of the run is used up")
+
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def get_backoff(self, attempt: int, response: "requests.Response" = None) -> float:
+        """Returns the jittered wait before the retry, at least the Retry-After of the response"""
+
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+
+        return delay
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """Sends a GET request with retries, like requests.Session.get
+
+        :param url: The URL to get
+        :return: The response; a 5xx/429 response is returned after the last retry
+        """
+
+        import requests
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow(host):
+                metrics.increment("http_circuit_open")
+                raise CircuitOpenError(f"Too many failed requests to {host}")
+
+            timeout = self.get_timeout()
+            error, response = None, None
+            try:
+                response = self.send(url, timeout, kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success(host)
+                return response
+
+            self.breaker.record_failure(host)
+            if attempt == self.max_retries:
+                break
+
+            delay = self.get_backoff(attempt, response)
+            if self.deadline is not None and delay >= self.deadline.remaining():
+                break
+            metrics.increment("http_retries")
+            self.sleep(delay)
+
+        if response is not None:
+            return response
+        raise error
+
+    def send(self, url: str, timeout: tuple[float, float], kwargs: dict):
+        """Sends one request, hedged if hedging is on and the host is slow"""
+
+        http = self.session
+        if http is None:
+            import requests as http
+
+        host = urlsplit(url).netloc
+        hedge_after = self.latencies.percentile(host) if self.hedge else None
+        start = self.clock()
+        if hedge_after is None:
+            response = http.get(url, timeout=timeout, **kwargs)
+        else:
+            response = self.send_hedged(http, url, timeout, kwargs, hedge_after)
+        self.latencies.record(host, self.clock() - start)
+
+        return response
+
+    def send_hedged(
+        self, http, url: str, timeout: tuple, kwargs: dict, hedge_after: float
+    ):
+        """Sends a second request if the first one is not done in hedge_after seconds,
+        returns the first successful response"""
+
+        futures = [self._executor.submit(http.get, url, timeout=timeout, **kwargs)]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            metrics.increment("http_hedges")
+            futures.append(
+                self._executor.submit(http.get, url, timeout=timeout, **kwargs)
+            )
+
+        pending = set(futures)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+            if not pending:
+                return future.result()
+
+
+@cache
+def get_default_http() -> ResilientHttp:
+    """Returns the ResilientHttp shared by the scrapers created without a session"""
+
+    return ResilientHttp()
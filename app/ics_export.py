@@ -0,0 +1,230 @@
+import os
+import re
+import hashlib
+import argparse
+import threading
+
+from typing import Iterable, Iterator, TextIO
+from datetime import datetime, timezone
+
+from app.game import Game
+from app.utils import config_parser
+from app.scraper import fetch_all_team_games
+from app.snapshot import SnapshotStore
+
+# the adatbank fixture times are Hungarian local times
+ICS_TIMEZONE = "Europe/Budapest"
+PRODID = "-//blsz-scraper//Fixture schedule//HU"
+UID_DOMAIN = "blsz-scraper"
+# RFC 5545 content lines are folded above 75 octets, with CRLF line breaks
+MAX_LINE_OCTETS = 75
+CRLF = "\r\n"
+
+# the VTIMEZONE of the TZID used by the events, with the EU daylight saving rules
+VTIMEZONE_LINES = (
+    "BEGIN:VTIMEZONE",
+    f"TZID:{ICS_TIMEZONE}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+TEXT_ESCAPES = {"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"}
+TEXT_ESCAPE_PATTERN = re.compile(r"[\\;,\n]")
+
+
+def escape_text(value: str) -> str:
+    """Escapes a TEXT property value, e.g. "a, b" -> "a\\, b" """
+
+    value = value.replace("\r\n", "\n").replace("\r", "\n")
+    return TEXT_ESCAPE_PATTERN.sub(lambda match: TEXT_ESCAPES[match.group()], value)
+
+
+def fold_line(line: str) -> str:
+    """Folds a content line into lines of at most MAX_LINE_OCTETS UTF-8 octets.
+
+    The continuation lines start with a space, multi-byte characters are never split.
+
+    :param line: The unfolded content line, without line break
+    :return: The folded line ending with CRLF
+    """
+
+    data = line.encode()
+    if len(data) <= MAX_LINE_OCTETS:
+        return line + CRLF
+
+    parts = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(data) - start > limit:
+        end = start + limit
+        # step back to the first byte of a multi-byte character
+        while data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        # the leading space of the continuation lines counts towards the limit
+        start, limit = end, MAX_LINE_OCTETS - 1
+    parts.append(data[start:].decode())
+
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def format_local(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def get_uid(game: Game) -> str:
+    """Returns the UID of the game, it does not change when the game is rescheduled"""
+
+    digest = hashlib.sha256(game.match_key.encode()).hexdigest()[:32]
+    return f"{digest}@{UID_DOMAIN}"
+
+
+def iter_event_lines(game: Game, dtstamp: str) -> Iterator[str]:
+    """Yields the unfolded content lines of the VEVENT of a game"""
+
+    yield "BEGIN:VEVENT"
+    yield f"UID:{get_uid(game)}"
+    yield f"DTSTAMP:{dtstamp}"
+    yield f"DTSTART;TZID={ICS_TIMEZONE}:{format_local(game.start_datetime)}"
+    yield f"DTEND;TZID={ICS_TIMEZONE}:{format_local(game.end_datetime)}"
+    yield f"SUMMARY:{escape_text(game.summary)}"
+    yield f"LOCATION:{escape_text(game.venue)}"
+    yield f"DESCRIPTION:{escape_text(game.description)}"
+    yield f"CATEGORIES:{escape_text(game.division)}"
+    yield "END:VEVENT"
+
+
+def iter_calendar(
+    games: Iterable[Game], calendar_name: str = None, now: datetime = None
+) -> Iterator[str]:
+    """Yields the folded lines of an iCalendar feed of the games
+
+    The games are consumed one by one, e.g. straight from BlszScraper.iter_games.
+
+    :param games: The games of the feed
+    :param calendar_name: Name of the calendar shown by the subscribers, defaults to None
+    :param now: Time of the export, used as DTSTAMP, defaults to None (the current time)
+    :return: The lines of the feed, each ending with CRLF
+    """
+
+    now = now or datetime.now(timezone.utc)
+    dtstamp = now.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+    ]
+    if calendar_name:
+        header.append(f"X-WR-CALNAME:{escape_text(calendar_name)}")
+    header.append(f"X-WR-TIMEZONE:{ICS_TIMEZONE}")
+    for line in (*header, *VTIMEZONE_LINES):
+        yield fold_line(line)
+
+    seen_uids = set()
+    for game in games:
+        # a fixture listed twice would be two events with the same UID
+        uid = get_uid(game)
+        if uid in seen_uids:
+            continue
+        seen_uids.add(uid)
+        for line in iter_event_lines(game, dtstamp):
+            yield fold_line(line)
+
+    yield fold_line("END:VCALENDAR")
+
+
+def write_calendar(
+    f: TextIO, games: Iterable[Game], calendar_name: str = None, now: datetime = None
+) -> None:
+    """Streams the iCalendar feed of the games into an open text file"""
+
+    f.writelines(iter_calendar(games, calendar_name, now))
+
+
+def export_ics(
+    path: str, games: Iterable[Game], calendar_name: str = None, now: datetime = None
+) -> None:
+    """Writes the iCalendar feed of the games to path atomically
+
+    The feed is written to a temporary file next to path and moved over it, so the
+    subscribers never download a partial feed.
+
+    :param path: Path of the .ics file
+    :param games: The games of the feed
+    :param calendar_name: Name of the calendar shown by the subscribers, defaults to None
+    :param now: Time of the export, used as DTSTAMP, defaults to None (the current time)
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # unique per process and thread, the exports of several processes can share the directory
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            write_calendar(f, games, calendar_name, now)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_feed_file_name(name: str) -> str:
+    """Returns a file name for the feed of a team, e.g. "SFC 2" -> "SFC_2.ics" """
+
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") + ".ics"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exports the fixtures of the teams as iCalendar feeds."
+    )
+    parser.add_argument(
+        "--output", type=str, default="feeds", help="Directory of the .ics files"
+    )
+    parser.add_argument(
+        "--snapshots",
+        type=str,
+        help="Export the saved game lists of this directory, e.g. the crawler output, instead of scraping the config teams",
+    )
+    parser.add_argument("--year", type=int, help="Only export the games of this year")
+    args = parser.parse_args()
+
+    if args.snapshots:
+        feeds = (
+            (url.rstrip("/").rsplit("/club/", 1)[-1].removesuffix(".html"), games)
+            for url, games in SnapshotStore(args.snapshots).iter_snapshots()
+        )
+    else:
+        schedules = config_parser()["schedules"]
+        games_by_team = fetch_all_team_games(
+            schedules, year_filter=args.year, max_results=None, parser="lxml"
+        )
+        feeds = games_by_team.items()
+
+    count = 0
+    for name, games in feeds:
+        if args.year and args.snapshots:
+            games = [game for game in games if game.start_datetime.year == args.year]
+        path = os.path.join(args.output, get_feed_file_name(name))
+        export_ics(path, games, calendar_name=name)
+        count += 1
+        print(f"Exported {path}")
+    print(f"Exported {count} feeds")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,138 @@
-import os
+import json
 import argparse
 
-from bs4 import BeautifulSoup
-from gcsa.event import Event
-from gcsa.google_calendar import GoogleCalendar
+from typing import TYPE_CHECKING
 from datetime import datetime
-from dotenv import load_dotenv
 
-from app.utils import config_parser, get_config_by_team, get_credentials_path
-from app.game_event_processor import GameEventProcessor
-from app.scraper import BlszScraper
+from app.utils import (
+    config_parser,
+    get_config_by_team,
+    get_credentials_path,
+    get_cache_path,
+    get_snapshot_path,
+    get_mirror_path,
+    get_state_path,
+    get_rate_limit_path,
+)
+from app import metrics
+from app.settings import get_env
+from app.cache import DEFAULT_MAX_AGE
+from app.http_client import DEFAULT_POOL_SIZE, Deadline, ResilientHttp
+from app.parsers import PARSER_BACKENDS
 
-load_dotenv(override=True)
-HOME_TEAM_NAME = os.getenv("TEAM_NAME")
-SENDER_MAIL = os.getenv("SENDER_MAIL")
+# the heavy dependencies (Google API client, bs4, lxml, requests, aiohttp) are imported
+# by the branches that use them, so --help and the offline modes do not pay for them
+if TYPE_CHECKING:
+    from app.game import Game
+    from app.calendar_batch import WriteSummary
+    from app.snapshot import SnapshotStore
+    from app.game_event_processor import GameEventProcessor
+
+HOME_TEAM_NAME = get_env("TEAM_NAME")
+SENDER_MAIL = get_env("SENDER_MAIL")
+
+
+def get_failed_match_keys(summaries: list["WriteSummary"]) -> set[str]:
+    """Returns the match keys of the fixtures whose calendar write failed
+
+    :param summaries: The WriteSummary of each group of writes
+    :return: Set of match keys
+    """
+
+    from app.reconcile import get_match_key
+
+    failed_keys = set()
+    for summary in summaries:
+        for result in summary.failed:
+            # a patch wraps the event rendered from the game
+            event = getattr(result.event, "event", result.event)
+            failed_keys.add(get_match_key(event))
+
+    return failed_keys
+
+
+def create_team_events(
+    gep: "GameEventProcessor",
+    team_config: dict,
+    games: list["Game"],
+    dry_run: bool,
+    snapshot_store: "SnapshotStore" = None,
+    use_batch: bool = False,
+) -> None:
+    """Creates the events of a team, only for the new fixtures if a snapshot store is given.
+
+    With a snapshot store the events of the rescheduled and venue changed fixtures are
+    patched, and the snapshot is saved with the fixtures whose writes succeeded, the
+    failed ones are retried by the next run. A team with "targets" in its config gets
+    the events in every target calendar.
+
+    :param gep: The GameEventProcessor object
+    :param team_config: Config of the team from the "schedules" section of the app config
+    :param games: The scraped games of the team
+    :param dry_run: Dry run flag, only prints if set to True
+    :param snapshot_store: Store of the game lists of the previous runs, defaults to None
+    :param use_batch: Send the inserts in batch requests, defaults to False
+    """
+
+    games_to_create = games
+    games_to_update = []
+    previous_games = []
+    if snapshot_store is not None:
+        from app.snapshot import diff_games
+
+        previous_games = snapshot_store.load(team_config["url"]) or []
+        diff = diff_games(previous_games, games)
+        print(
+            f"Changes of {team_config['team_name']} since the last run: {diff.summary()}"
+        )
+        for old_game, game in diff.rescheduled:
+            print(f"Rescheduled: {game.summary} {old_game.date} -> {game.date}")
+        for old_game, game in diff.venue_changed:
+            print(f"Venue changed: {game.summary} {old_game.venue} -> {game.venue}")
+        for game in diff.removed:
+            print(f"Removed: {game.summary} {game.date}")
+        games_to_create = diff.added
+        games_to_update = [game for _, game in diff.rescheduled + diff.venue_changed]
+
+    summaries = []
+    if "targets" in team_config:
+        from app.fan_out import FanOutProcessor, get_targets
+
+        fan_out = FanOutProcessor.from_processor(
+            gep, get_targets(team_config, gep.gc_client.default_calendar)
+        )
+        plans = fan_out.sync(games_to_create + games_to_update, dry_run=dry_run)
+        summaries.extend(plan.write_summary for plan in plans.values())
+    else:
+        summary = gep.create_game_events(
+            games_to_create,
+            attendees=team_config["attendees_2024"],
+            dry_run=dry_run,
+            use_batch=use_batch,
+            skip_existing=True,
+        )
+        summaries.append(summary)
+        if games_to_update:
+            plan = gep.reconcile(
+                games_to_update, team_config["attendees_2024"], dry_run=dry_run
+            )
+            summaries.append(plan.write_summary)
+
+    if snapshot_store is not None and not dry_run:
+        failed_keys = get_failed_match_keys(summaries)
+        previous_by_key = {game.match_key: game for game in previous_games}
+        # a failed fixture keeps its previous state, or is left out if it is new
+        saved_games = [
+            (
+                previous_by_key.get(game.match_key)
+                if game.match_key in failed_keys
+                else game
+            )
+            for game in games
+        ]
+        snapshot_store.save(
+            team_config["url"], [game for game in saved_games if game is not None]
+        )
 
 
 def main():
@@ -29,39 +148,277 @@ def main():
         "--limit", type=int, help="Limit the number of events to create"
     )
     parser.add_argument("--dry_run", action="store_true", help="Set the dry_run flag")
+    parser.add_argument(
+        "--all_teams",
+        action="store_true",
+        help="Process every team listed in the config schedules, not just TEAM_NAME",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="Max number of team schedule pages fetched concurrently",
+    )
+    parser.add_argument(
+        "--async_mode",
+        action="store_true",
+        help="Fetch the team schedule pages with asyncio in --all_teams mode",
+    )
+    parser.add_argument(
+        "--cache_max_age",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        help="Seconds a cached schedule page is reused without asking the server",
+    )
+    parser.add_argument(
+        "--parser",
+        type=str,
+        choices=list(PARSER_BACKENDS),
+        default="lxml",
+        help="HTML parser backend used to extract the fixtures",
+    )
+    parser.add_argument(
+        "--changed_only",
+        action="store_true",
+        help="Only create events for the fixtures that are new since the last run",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send the calendar writes in batch requests instead of one by one",
+    )
+    parser.add_argument(
+        "--delete_missing",
+        action="store_true",
+        help="In update and daemon mode, delete the events of the fixtures no longer on the schedule page, the whole schedule is scraped without --limit and year filter",
+    )
+    parser.add_argument(
+        "--use_mirror",
+        action="store_true",
+        help="Read the calendar events from a local mirror kept up to date with sync tokens",
+    )
+    parser.add_argument(
+        "--state_store",
+        action="store_true",
+        help="Record the calendar event of each fixture in a local SQLite store and read it instead of listing the calendar, --mode R works offline",
+    )
+    parser.add_argument(
+        "--reseed_state",
+        action="store_true",
+        help="Seed the state store again from a listing of the calendar, it is otherwise seeded again once a day",
+    )
+    parser.add_argument(
+        "--calendar_workers",
+        type=int,
+        default=1,
+        help="Max number of calendar writes sent concurrently, 1 writes one by one",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and sync the calendar whenever the polled schedules change",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds the schedule page downloads of the run may take in total, no limit if not set",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a second request for a schedule page when the first is slower than the p95 response time",
+    )
+    parser.add_argument(
+        "--metrics_dir",
+        type=str,
+        help="Directory of the run metrics JSON log and Prometheus textfile, metrics are off if not set",
+    )
 
     args = parser.parse_args()
+    if args.metrics_dir:
+        metrics.enable()
+
+    success = False
+    try:
+        run(args)
+        success = True
+    finally:
+        if args.metrics_dir:
+            snapshot = metrics.export(args.metrics_dir, success)
+            print(f"Run metrics: {json.dumps(snapshot)}")
+
+
+def run(args: argparse.Namespace) -> None:
+    """Runs the mode selected by the command line arguments
+
+    :param args: The parsed command line arguments
+    """
+
     run_mode = args.mode
     dry_run = args.dry_run
     limit = args.limit or 100
     print(f"Run mode: {run_mode}, Dry run: {dry_run}, Limit: {limit}")
 
+    state_store = None
+    if args.state_store:
+        from app.state_store import StateStore, DEFAULT_MAX_AGE
+
+        max_age = 0 if args.reseed_state else DEFAULT_MAX_AGE
+        state_store = StateStore(get_state_path(), max_age=max_age)
+    if run_mode == "R" and state_store is not None and not args.daemon:
+        # answered from the local store, without authenticating to the API
+        print("Reading events from the local state store...")
+        if not state_store.is_seeded(SENDER_MAIL):
+            print("The state store has no events yet, run a sync with --state_store")
+        elif state_store.is_stale(SENDER_MAIL):
+            print("The state store may be out of date, run a sync with --state_store")
+        created_game_events = state_store.get_events(
+            SENDER_MAIL, time_min=datetime.now().astimezone()
+        )
+        print(
+            f"Found {len(created_game_events)} events in the state store: {created_game_events}"
+        )
+        return
+
+    from gcsa.google_calendar import GoogleCalendar
+
+    from app.cache import ResponseCache
+    from app.scraper import BlszScraper
+    from app.http_client import create_session
+    from app.rate_limiter import AdaptiveRateLimiter
+    from app.game_event_processor import GameEventProcessor
+
     config = config_parser()
     a_team_config = get_config_by_team(config, HOME_TEAM_NAME)
     credentials_path = get_credentials_path()
 
     gc = GoogleCalendar(SENDER_MAIL, credentials_path=credentials_path)
-    gep = GameEventProcessor(gc)
-    blsz_scraper = BlszScraper(a_team_config["url"])
-
-    if run_mode == "C":
-        print("Creating events...")
-        games = blsz_scraper.fetch_games(year_filter=2025)
-        gep.create_game_events(
-            games[:limit], attendees=a_team_config["attendees_2024"], dry_run=dry_run
-        )
-    elif run_mode == "R":
-        print("Reading events from the calendar...")
-        created_game_events = gep.get_game_events(apply_date_filter=True)
-        print(
-            f"Found {len(created_game_events)} events in the calendar: {created_game_events}"
-        )
-    elif run_mode == "U":
-        raise NotImplementedError("Update mode is not implemented yet.")
-    elif run_mode == "D":
-        raise NotImplementedError("Delete mode is not fully implemented yet.")
-    else:
-        raise ValueError("Invalid mode of operation.")
+    mirror = None
+    if args.use_mirror:
+        from app.calendar_mirror import CalendarMirror
+
+        mirror = CalendarMirror(gc, get_mirror_path())
+    # shared with the other scraper processes of the host through the state file
+    rate_limiter = AdaptiveRateLimiter(get_rate_limit_path())
+    gep = GameEventProcessor(
+        gc,
+        mirror=mirror,
+        max_workers=args.calendar_workers,
+        state_store=state_store,
+        rate_limiter=rate_limiter,
+    )
+    cache = ResponseCache(get_cache_path(), max_age=args.cache_max_age)
+    # the daemon runs indefinitely, the deadline only bounds a single run
+    deadline = Deadline(args.deadline) if args.deadline and not args.daemon else None
+    http = ResilientHttp(
+        create_session(pool_size=args.max_workers), deadline=deadline, hedge=args.hedge
+    )
+    blsz_scraper = BlszScraper(
+        a_team_config["url"], session=http, cache=cache, parser=args.parser
+    )
+    snapshot_store = None
+    if args.changed_only:
+        from app.snapshot import SnapshotStore
+
+        snapshot_store = SnapshotStore(get_snapshot_path())
+
+    try:
+        if args.daemon:
+            from app.daemon import ScheduleDaemon
+
+            print("Starting the daemon...")
+            team_configs = config["schedules"] if args.all_teams else [a_team_config]
+            daemon = ScheduleDaemon(
+                gep,
+                team_configs,
+                session=http,
+                cache=cache,
+                parser=args.parser,
+                # deletes are only safe against the complete schedules
+                year_filter=None if args.delete_missing else 2025,
+                max_results=None if args.delete_missing else limit,
+                dry_run=dry_run,
+                metrics_dir=args.metrics_dir,
+                delete_missing=args.delete_missing,
+            )
+            daemon.run()
+        elif run_mode == "C" and args.all_teams:
+            print("Creating events for all teams...")
+            if args.async_mode:
+                import asyncio
+
+                from app.async_scraper import fetch_all_team_games_async
+
+                games_by_team = asyncio.run(
+                    fetch_all_team_games_async(
+                        config["schedules"],
+                        year_filter=2025,
+                        max_results=limit,
+                        max_concurrency=args.max_workers,
+                        parser=args.parser,
+                    )
+                )
+            else:
+                from app.scraper import fetch_all_team_games
+
+                games_by_team = fetch_all_team_games(
+                    config["schedules"],
+                    year_filter=2025,
+                    max_results=limit,
+                    max_workers=args.max_workers,
+                    session=http,
+                    cache=cache,
+                    parser=args.parser,
+                )
+            for team_config in config["schedules"]:
+                create_team_events(
+                    gep,
+                    team_config,
+                    games_by_team[team_config["team_name"]],
+                    dry_run,
+                    snapshot_store,
+                    args.batch,
+                )
+        elif run_mode == "C":
+            print("Creating events...")
+            games = blsz_scraper.fetch_games(year_filter=2025, max_results=limit)
+            create_team_events(
+                gep, a_team_config, games, dry_run, snapshot_store, args.batch
+            )
+        elif run_mode == "R":
+            print("Reading events from the calendar...")
+            created_game_events = gep.get_game_events(apply_date_filter=True)
+            print(
+                f"Found {len(created_game_events)} events in the calendar: {created_game_events}"
+            )
+        elif run_mode == "U":
+            print("Updating events...")
+            if args.delete_missing:
+                # deletes are only safe against the complete schedule of the team
+                games = blsz_scraper.fetch_games(max_results=None)
+            else:
+                games = blsz_scraper.fetch_games(year_filter=2025, max_results=limit)
+            if "targets" in a_team_config:
+                from app.fan_out import FanOutProcessor, get_targets
+
+                fan_out = FanOutProcessor.from_processor(
+                    gep, get_targets(a_team_config, gc.default_calendar)
+                )
+                fan_out.sync(games, dry_run=dry_run, delete_missing=args.delete_missing)
+            else:
+                gep.update_game_events(
+                    games,
+                    attendees=a_team_config["attendees_2024"],
+                    dry_run=dry_run,
+                    delete_missing=args.delete_missing,
+                )
+        elif run_mode == "D":
+            raise NotImplementedError("Delete mode is not fully implemented yet.")
+        else:
+            raise ValueError("Invalid mode of operation.")
+
+    finally:
+        http.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+from collections import Counter
+from datetime import datetime
+
+METRIC_PREFIX = "blsz_scraper"
+JSON_LOG_NAME = "run_metrics.jsonl"
+PROMETHEUS_FILE_NAME = f"{METRIC_PREFIX}.prom"
+
+# the phases of a run, also exported with zero values so dashboards see every series
+PHASES = ("fetch", "parse", "transform", "calendar_read", "calendar_write")
+
+_DISABLED_PHASE = contextlib.nullcontext()
+
+
+class Metrics:
+    """Collects the phase durations and counters of one run.
+
+    Disabled metrics record nothing, phase() returns a shared no-op context manager,
+    so the instrumentation costs one attribute check per call.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initializes the Metrics object
+
+        :param enabled: Record the metrics, defaults to False
+        """
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops the recorded values and restarts the run clock"""
+
+        with self.lock:
+            self.started = time.time()
+            self.phase_seconds = Counter()
+            self.phase_calls = Counter()
+            self.counters = Counter()
+
+    def record(self, phase: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.phase_seconds[phase] += seconds
+            self.phase_calls[phase] += 1
+
+    @contextlib.contextmanager
+    def _timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def phase(self, phase: str):
+        """Returns a context manager that adds its duration to the phase"""
+
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._timed(phase)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Adds value to the counter"""
+
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += value
+
+    def snapshot(self, success: bool = True) -> dict:
+        """Returns the recorded metrics as a JSON serializable dict"""
+
+        with self.lock:
+            return {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "success": success,
+                "duration_seconds": round(time.time() - self.started, 6),
+                "phases": {
+                    phase: {
+                        "seconds": round(self.phase_seconds[phase], 6),
+                        "calls": self.phase_calls[phase],
+                    }
+                    for phase in sorted(set(PHASES) | set(self.phase_seconds))
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def to_prometheus(self, snapshot: dict) -> str:
+        """Formats a snapshot in the Prometheus text exposition format"""
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_phase_seconds Time spent in the phase in the last run",
+            f"# TYPE {METRIC_PREFIX}_phase_seconds gauge",
+        ]
+        for phase, values in snapshot["phases"].items():
+            lines.append(
+                f'{METRIC_PREFIX}_phase_seconds{{phase="{phase}"}} {values["seconds"]}'
+            )
+        lines += [
+            f"# HELP {METRIC_PREFIX}_phase_calls Number of times the phase ran in the last run",
+            f"# TYPE {METRIC_PREFIX}_phase_calls gauge",
+        ]
+        for phase, values in snapshot["phases"].items():
+            lines.append(
+                f'{METRIC_PREFIX}_phase_calls{{phase="{phase}"}} {values["calls"]}'
+            )
+        for name, value in snapshot["counters"].items():
+            lines += [
+                f"# TYPE {METRIC_PREFIX}_{name} gauge",
+                f"{METRIC_PREFIX}_{name} {value}",
+            ]
+        lines += [
+            f"# TYPE {METRIC_PREFIX}_last_run_duration_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_duration_seconds {snapshot['duration_seconds']}",
+            f"# TYPE {METRIC_PREFIX}_last_run_success gauge",
+            f"{METRIC_PREFIX}_last_run_success {int(snapshot['success'])}",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_timestamp_seconds {int(self.started)}",
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: str, success: bool = True) -> dict:
+        """Appends the run to the JSON log and replaces the Prometheus textfile
+
+        :param directory: Directory of the JSON log and the textfile, e.g. the node exporter textfile directory
+        :param success: Whether the run finished without an error, defaults to True
+        :return: The exported snapshot
+        """
+
+        snapshot = self.snapshot(success)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, JSON_LOG_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+        # the textfile collector may read at any time, so the file is replaced atomically
+        path = os.path.join(directory, PROMETHEUS_FILE_NAME)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(snapshot))
+        os.replace(f"{path}.tmp", path)
+
+        return snapshot
+
+
+METRICS = Metrics()
+
+
+def enable() -> None:
+    """Starts recording the metrics of a new run"""
+
+    METRICS.enabled = True
+    METRICS.reset()
+
+
+def reset() -> None:
+    """Drops the recorded values, e.g. between the poll cycles of the daemon"""
+
+    METRICS.reset()
+
+
+def phase(name: str):
+    return METRICS.phase(name)
+
+
+def increment(name: str, value: float = 1) -> None:
+    METRICS.increment(name, value)
+
+
+def export(directory: str, success: bool = True) -> dict:
+    return METRICS.export(directory, success)
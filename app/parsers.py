@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+# bs4 and lxml are only imported when a backend using them is created, so the CLI can list
+# the backends without loading either
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, ResultSet, Tag
+    from lxml.html import HtmlElement
+
+DEFAULT_PARSER = "html.parser"
+
+# css class of the fixture child div -> Game field
+FIXTURE_FIELDS = {
+    "home_team": "home_team",
+    "away_team": "away_team",
+    "team_sorsolas_arena": "venue",
+    "team_sorsolas_date": "date",
+}
+
+
+class ParserBackend(ABC):
+    """Base class for the HTML parser backends of the BlszScraper"""
+
+    @abstractmethod
+    def parse(self, content: bytes):
+        """Parses the page content into a document object of the backend"""
+
+    @abstractmethod
+    def get_schedule_table(self, document) -> Iterable:
+        """Returns the fixture elements of the schedule table"""
+
+    def iter_schedule_table(self, document) -> Iterator:
+        """Yields the fixture elements of the schedule table in document order"""
+
+        yield from self.get_schedule_table(document)
+
+    @abstractmethod
+    def get_division(self, document) -> str:
+        """Returns the division name of the schedule"""
+
+    @abstractmethod
+    def get_match_fields(self, fixture) -> dict:
+        """Returns the home_team, away_team, venue and date of a fixture element"""
+
+
+class SoupParserBackend(ParserBackend):
+    """Parser backend building a BeautifulSoup tree"""
+
+    def __init__(self, features: str = "html.parser") -> None:
+        """Initializes the SoupParserBackend object
+
+        :param features: The BeautifulSoup tree builder, defaults to "html.parser"
+        """
+        self.features = features
+
+    def parse(self, content: bytes) -> "BeautifulSoup":
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(content, self.features)
+
+    def get_schedule_table(self, document: "BeautifulSoup") -> "ResultSet[Tag]":
+        return document.find_all("div", attrs={"class": "schedule"})
+
+    def iter_schedule_table(self, document: "BeautifulSoup") -> Iterator["Tag"]:
+        from bs4 import Tag
+
+        for element in document.descendants:
+            if (
+                isinstance(element, Tag)
+                and element.name == "div"
+                and "schedule" in element.get("class", ())
+            ):
+                yield element
+
+    def get_division(self, document: "BeautifulSoup") -> str:
+        return document.select_one(".team_tabella .container_title").get_text().strip()
+
+    def get_match_fields(self, fixture: "Tag") -> dict:
+        # one pass over the child divs instead of a find() tree scan per field
+        fields = {}
+        for div in fixture.find_all("div", recursive=False):
+            for css_class in div.get("class", ()):
+                if css_class in FIXTURE_FIELDS:
+                    fields[FIXTURE_FIELDS[css_class]] = div.get_text()
+
+        for css_class, field in FIXTURE_FIELDS.items():
+            if field not in fields:
+                fields[field] = fixture.find(
+                    "div", attrs={"class": css_class}
+                ).get_text()
+
+        return fields
+
+
+class LxmlParserBackend(ParserBackend):
+    """Parser backend using the C based lxml HTML parser and XPath queries"""
+
+    SCHEDULE_XPATH = (
+        '//div[contains(concat(" ", normalize-space(@class), " "), " schedule ")]'
+    )
+    DIVISION_XPATH = (
+        '//div[contains(concat(" ", normalize-space(@class), " "), " team_tabella ")]'
+        '//*[contains(concat(" ", normalize-space(@class), " "), " container_title ")]'
+    )
+
+    def __init__(self) -> None:
+        """Initializes the LxmlParserBackend object"""
+
+        from lxml.html import HTMLParser
+
+        # adatbank pages are served as utf-8
+        self.html_parser = HTMLParser(encoding="utf-8")
+
+    def parse(self, content: bytes) -> "HtmlElement":
+        from lxml.html import document_fromstring
+
+        if isinstance(content, str):
+            return document_fromstring(content)
+        return document_fromstring(content, parser=self.html_parser)
+
+    def get_schedule_table(self, document: "HtmlElement") -> list["HtmlElement"]:
+        return document.xpath(self.SCHEDULE_XPATH)
+
+    def iter_schedule_table(self, document: "HtmlElement") -> Iterator["HtmlElement"]:
+        for element in document.iter("div"):
+            if "schedule" in element.get("class", "").split():
+                yield element
+
+    def get_division(self, document: "HtmlElement") -> str:
+        return document.xpath(self.DIVISION_XPATH)[0].text_content().strip()
+
+    def get_match_fields(self, fixture: "HtmlElement") -> dict:
+        fields = {}
+        for div in fixture.iterchildren("div"):
+            for css_class in div.get("class", "").split():
+                if css_class in FIXTURE_FIELDS:
+                    fields[FIXTURE_FIELDS[css_class]] = div.text_content()
+
+        for css_class, field in FIXTURE_FIELDS.items():
+            if field not in fields:
+                fields[field] = fixture.find_class(css_class)[0].text_content()
+
+        return fields
+
+
+PARSER_BACKENDS = {
+    "html.parser": lambda: SoupParserBackend("html.parser"),
+    "bs4-lxml": lambda: SoupParserBackend("lxml"),
+    "lxml": LxmlParserBackend,
+}
+
+
+def get_parser_backend(name: str = DEFAULT_PARSER) -> ParserBackend:
+    """Returns a new parser backend by its name
+
+    :param name: One of the PARSER_BACKENDS keys, defaults to DEFAULT_PARSER
+    :raises ValueError: If the backend name is unknown
+    :return: The parser backend object
+    """
+
+    if name not in PARSER_BACKENDS:
+        raise ValueError(
+            f"Unknown parser backend: {name}, choose from {list(PARSER_BACKENDS)}"
+        )
+
+    return PARSER_BACKENDS[name]()
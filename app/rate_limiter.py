@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+from typing import Callable, TypeVar
+from googleapiclient.errors import HttpError
+
+from app import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows, the limiter is then only shared between threads
+    fcntl = None
+
+T = TypeVar("T")
+
+# the Calendar API quota is 600 requests per minute per user by default
+DEFAULT_RATE = 2.0
+MAX_RATE = 10.0
+# the fixed pacing the scraper used before, one write every 20 seconds
+MIN_RATE = 1 / 20
+DEFAULT_BURST = 5.0
+# AIMD: requests per second added after a success, factor applied after a quota error
+RATE_INCREASE = 0.1
+RATE_DECREASE = 0.5
+DEFAULT_MAX_RETRIES = 5
+
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Checks if an API error is a quota error: 429, or 403 with a rate limit reason"""
+
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    if error.resp.status != 403:
+        return False
+
+    details = error.error_details if isinstance(error.error_details, list) else []
+    return any(
+        isinstance(detail, dict) and detail.get("reason") in RATE_LIMIT_REASONS
+        for detail in details
+    )
+
+
+class AdaptiveRateLimiter:
+    """Token bucket for the Calendar API calls whose rate adapts to the quota errors.
+
+    The rate grows additively after every successful call and is halved after every
+    quota error (AIMD), so the writes run as fast as the quota allows. With a path the
+    bucket is kept in a file locked with fcntl, and the processes of the host share it.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        rate: float = DEFAULT_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        burst: float = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initializes the AdaptiveRateLimiter object
+
+        :param path: JSON file of the state shared between processes, defaults to None (this process only)
+        :param rate: Requests per second to start with, defaults to DEFAULT_RATE
+        :param min_rate: Lowest rate the quota errors can lower the rate to, defaults to MIN_RATE
+        :param max_rate: Highest rate the successes can raise the rate to, defaults to MAX_RATE
+        :param burst: Max number of tokens saved up while idle, defaults to DEFAULT_BURST
+        :param max_retries: Max number of retries of a throttled call, defaults to DEFAULT_MAX_RETRIES
+        :param clock: Returns the current wall clock time, shared by the processes, defaults to time.time
+        :param sleep: Waits the given seconds, defaults to time.sleep
+        """
+        self.path = path
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.state = self.initial_state()
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def initial_state(self) -> dict:
+        return {
+            "rate": self.initial_rate,
+            "tokens": self.burst,
+            "updated": self.clock(),
+        }
+
+    @contextlib.contextmanager
+    def locked_state(self):
+        """Yields the bucket state for an update, holding the thread and the file lock"""
+
+        with self.lock:
+            if self.path is None:
+                yield self.state
+                return
+
+            # the lock is released when the file is closed
+            with open(self.path, "a+", encoding="utf-8") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                except ValueError:
+                    state = self.initial_state()
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            self.state = state
+
+    def refill(self, state: dict, now: float) -> None:
+        """Adds the tokens accrued at the current rate since the last update"""
+
+        elapsed = max(now - state["updated"], 0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["updated"] = now
+
+    @property
+    def rate(self) -> float:
+        """The current rate in requests per second"""
+
+        with self.locked_state() as state:
+            return state["rate"]
+
+    def acquire(self, count: int = 1) -> float:
+        """Takes count tokens from the bucket, waiting until they are available
+
+        The tokens are reserved under the lock and the wait happens outside of it, so
+        the waiting callers are served in order without blocking each other.
+
+        :param count: Number of API calls about to be sent, defaults to 1
+        :return: The seconds waited
+        """
+
+        with self.locked_state() as state:
+            self.refill(state, self.clock())
+            state["tokens"] -= count
+            wait = -state["tokens"] / state["rate"] if state["tokens"] < 0 else 0.0
+
+        if wait > 0:
+            metrics.increment("rate_limit_sleeps")
+            metrics.increment("rate_limit_sleep_seconds", wait)
+            self.sleep(wait)
+        return wait
+
+    def record_success(self) -> None:
+        """Raises the rate additively after a call that was not throttled"""
+
+        with self.locked_state() as state:
+            self.refill(state, self.clock())
+            state["rate"] = min(self.max_rate, state["rate"] + RATE_INCREASE)
+
+    def record_throttle(self) -> None:
+        """Halves the rate and drops the saved up tokens after a quota error"""
+
+        with self.locked_state() as state:
+            self.refill(state, self.clock())
+            state["rate"] = max(self.min_rate, state["rate"] * RATE_DECREASE)
+            state["tokens"] = min(state["tokens"], 0)
+        metrics.increment("rate_limit_throttles")
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Calls func at the current rate, retrying it after quota errors
+
+        :param func: The API call
+        :return: The return value of func
+        :raises HttpError: The quota error of the last retry, or any other error of func
+        """
+
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.record_throttle()
+                metrics.increment("rate_limit_retries")
+                print(f"Calendar API rate limit exceeded, retrying: {e}")
+                continue
+
+            self.record_success()
+            return result
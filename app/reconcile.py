@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Callable
+from zoneinfo import ZoneInfo
+from dataclasses import dataclass, field
+
+from gcsa.event import Event
+
+from app.game import Game, MATCH_KEY_PROPERTY, FINGERPRINT_PROPERTY
+from app.calendar_batch import EventPatch, WriteSummary
+
+# event attributes written by Game.to_gc_event that the scraper keeps in sync
+SYNCED_ATTRIBUTES = ("summary", "description", "location", "start", "end")
+
+
+@dataclass
+class ReconcilePlan:
+    """Class for representing the calendar writes needed to match the scraped games"""
+
+    to_create: list[Event] = field(default_factory=list)
+    to_update: list[EventPatch] = field(default_factory=list)
+    to_delete: list[Event] = field(default_factory=list)
+    unchanged: list[Event] = field(default_factory=list)
+    # the outcome of the writes, set when the plan is executed
+    write_summary: WriteSummary = field(default_factory=WriteSummary)
+
+    @property
+    def is_empty(self) -> bool:
+        """Checks if the plan has no writes"""
+
+        return not (self.to_create or self.to_update or self.to_delete)
+
+    def summary(self) -> str:
+        """Returns a one line summary of the plan"""
+
+        return (
+            f"{len(self.to_create)} to create, {len(self.to_update)} to update, "
+            f"{len(self.to_delete)} to delete, {len(self.unchanged)} unchanged"
+        )
+
+
+def get_shared_property(event: Event, name: str) -> str:
+    """Returns a shared extended property of the event, None if it is not set"""
+
+    return event.other.get("extendedProperties", {}).get("shared", {}).get(name)
+
+
+def get_match_key(event: Event) -> str:
+    """Returns the match key of a scraper created event.
+
+    Events created before the match key property existed fall back to their summary.
+    """
+
+    return get_shared_property(event, MATCH_KEY_PROPERTY) or event.summary
+
+
+def get_event_division(event: Event) -> str:
+    """Returns the division part of the match key, None for events without the match key property"""
+
+    match_key = get_shared_property(event, MATCH_KEY_PROPERTY)
+    return match_key.split("|", 1)[0] if match_key else None
+
+
+def to_aware(value, timezone: str):
+    """Localizes naive datetimes to the timezone of the event, so they compare with API datetimes"""
+
+    if isinstance(value, datetime) and value.tzinfo is None and timezone:
+        return value.replace(tzinfo=ZoneInfo(timezone))
+    return value
+
+
+def to_naive(value, timezone: str) -> datetime:
+    """Converts an event datetime to a naive local datetime, comparable with the game starts"""
+
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        zone = ZoneInfo(timezone) if timezone else value.tzinfo
+        return value.astimezone(zone).replace(tzinfo=None)
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def attendee_emails(event: Event) -> set[str]:
+    return {attendee.email for attendee in event.attendees}
+
+
+def get_changed_fields(existing_event: Event, game_event: Event) -> tuple[str, ...]:
+    """Returns the synced attributes, and attendees, that differ between the two events"""
+
+    changed = []
+    for attribute in SYNCED_ATTRIBUTES:
+        existing_value = getattr(existing_event, attribute)
+        new_value = getattr(game_event, attribute)
+        if attribute in ("start", "end"):
+            existing_value = to_aware(existing_value, existing_event.timezone)
+            new_value = to_aware(new_value, game_event.timezone)
+        if existing_value != new_value:
+            changed.append(attribute)
+
+    if attendee_emails(existing_event) != attendee_emails(game_event):
+        changed.append("attendees")
+
+    return tuple(changed)
+
+
+def needs_update(existing_event: Event, game_event: Event) -> bool:
+    """Checks if the existing event differs from the event rendered from the game"""
+
+    return bool(get_changed_fields(existing_event, game_event))
+
+
+def build_reconcile_plan(
+    games: list[Game],
+    existing_events: list[Event],
+    attendees: list[str],
+    delete_missing: bool = False,
+    now: datetime = None,
+    render: Callable[[Game], Event] = None,
+) -> ReconcilePlan:
+    """Computes the minimal create/update/delete plan to match the calendar to the games.
+
+    Only the upcoming games are synced, and only the existing events of the divisions
+    of the games are touched, so teams sharing a calendar keep each other's events.
+    Missing events are only deleted with delete_missing, which must only be set for
+    the complete, unfiltered and unlimited game list of the schedule page. Even then
+    only the events starting within the time span of the games are deleted.
+
+    :param games: The scraped games that should be in the calendar
+    :param existing_events: The scraper created upcoming events already in the calendar
+    :param attendees: Attendees to invite to the events
+    :param delete_missing: Delete the events of games that are no longer scraped, defaults to False
+    :param now: Games starting before this are skipped, defaults to datetime.now()
+    :param render: Returns the event of a game, defaults to game.to_gc_event(attendees)
+    :return: The ReconcilePlan object
+    """
+
+    now = now or datetime.now()
+    divisions = {game.division for game in games}
+    existing_by_key = {}
+    plan = ReconcilePlan()
+    for event in existing_events:
+        division = get_event_division(event)
+        if division is not None and division not in divisions:
+            continue
+
+        key = get_match_key(event)
+        if key in existing_by_key:
+            # duplicate created by an earlier run
+            plan.to_delete.append(event)
+        else:
+            existing_by_key[key] = event
+
+    for game in games:
+        if game.start_datetime <= now:
+            continue
+
+        game_event = render(game) if render else game.to_gc_event(attendees)
+        existing_event = existing_by_key.pop(game.match_key, None)
+        if existing_event is None:
+            existing_event = existing_by_key.pop(game.summary, None)
+
+        if existing_event is None:
+            plan.to_create.append(game_event)
+        elif get_shared_property(
+            existing_event, FINGERPRINT_PROPERTY
+        ) == get_shared_property(game_event, FINGERPRINT_PROPERTY):
+            plan.unchanged.append(existing_event)
+        else:
+            # events created before the fingerprint existed get it with an otherwise
+            # empty patch, after that one property comparison classifies them
+            game_event.event_id = existing_event.event_id
+            plan.to_update.append(
+                EventPatch(game_event, get_changed_fields(existing_event, game_event))
+            )
+
+    if delete_missing and games:
+        first_start = min(game.start_datetime for game in games)
+        last_start = max(game.start_datetime for game in games)
+        plan.to_delete.extend(
+            event
+            for event in existing_by_key.values()
+            if first_start <= to_naive(event.start, event.timezone) <= last_start
+        )
+
+    return plan
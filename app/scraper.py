@@ -1,55 +1,118 @@
 import requests
 import datetime
 
+from typing import Iterator
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup, ResultSet, Tag
 from gcsa.event import Event
 
+from app import metrics
 from app.game import Game
+from app.game_table import GameTable
+from app.cache import ResponseCache
+from app.http_client import (
+    DEFAULT_POOL_SIZE,
+    ResilientHttp,
+    create_session,
+    get_default_http,
+)
+from app.parsers import DEFAULT_PARSER, get_parser_backend
 
 
 class BlszScraper:
     """Class for scraping the fixture schedule of a team from the MLSZ Adatbank website"""
 
-    def __init__(self, team_schedule_url: str) -> None:
+    def __init__(
+        self,
+        team_schedule_url: str,
+        session: requests.Session = None,
+        cache: ResponseCache = None,
+        parser: str = DEFAULT_PARSER,
+    ) -> None:
         """Initializes the BlszScraper object
 
         :param team_schedule_url: The URL from where the fixture schedule can be scraped
+        :param session: Shared requests Session to reuse pooled connections, defaults to None
+        :param cache: Response cache used for conditional requests, defaults to None
+        :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
         """
         self.team_schedule_url = team_schedule_url
-        self.soup = self.get_soup_from_url(self.team_schedule_url)
-        self.division = self.get_division()
+        self.session = session
+        self.cache = cache
+        self.parser = get_parser_backend(parser)
+
+    @classmethod
+    def from_content(
+        cls, team_schedule_url: str, content: bytes, parser: str = DEFAULT_PARSER
+    ) -> "BlszScraper":
+        """Creates a BlszScraper from an already downloaded team schedule page
+
+        :param team_schedule_url: The URL the page was downloaded from
+        :param content: The body of the team schedule page
+        :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+        :return: The BlszScraper object
+        """
+
+        scraper = cls(team_schedule_url, parser=parser)
+        with metrics.phase("parse"):
+            scraper.soup = scraper.parser.parse(content)
+
+        return scraper
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        """The parsed team schedule page, downloaded on first use"""
+
+        return self.get_soup_from_url(self.team_schedule_url)
+
+    @cached_property
+    def division(self) -> str:
+        """The division of the team, scraped on first use"""
+
+        return self.get_division()
 
     def get_soup_from_url(self, url: str) -> BeautifulSoup:
-        """Returns BeautifulSoup object from url or static html"""
+        """Returns BeautifulSoup object (or the document of the parser backend) from url or static html"""
 
-        r = requests.get(url)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, "html.parser")
+        content = self.get_content_from_url(url)
+        with metrics.phase("parse"):
+            soup = self.parser.parse(content)
 
         return soup
 
+    def get_content_from_url(self, url: str) -> bytes:
+        """Returns the body of the url, revalidated against the cache if one is set"""
+
+        http = self.session if self.session is not None else get_default_http()
+        with metrics.phase("fetch"):
+            if self.cache is not None:
+                return self.cache.fetch(http, url)
+
+            r = http.get(url)
+            r.raise_for_status()
+
+        metrics.increment("bytes_downloaded", len(r.content))
+
+        return r.content
+
     def get_schedule_table(self) -> ResultSet[Tag]:
         """Returns the schedule table from the team schedule page as a ResultSet of Tag objects"""
 
-        schedule_table = self.soup.findAll("div", attrs={"class": "schedule"})
+        schedule_table = self.parser.get_schedule_table(self.soup)
         return schedule_table
 
     def get_division(self) -> str:
         """Gets division from the team schedule page"""
 
-        return self.soup.select_one(".team_tabella .container_title").get_text().strip()
+        return self.parser.get_division(self.soup)
 
     def get_match_data(self, fixture_div: Tag) -> Game:
         """From a fixture div, returns a dictionary with the match data"""
 
-        home_team = fixture_div.find("div", attrs={"class": "home_team"}).get_text()
-        away_team = fixture_div.find("div", attrs={"class": "away_team"}).get_text()
-        date = fixture_div.find("div", attrs={"class": "team_sorsolas_date"}).get_text()
-        venue = fixture_div.find(
-            "div", attrs={"class": "team_sorsolas_arena"}
-        ).get_text()
+        fields = self.parser.get_match_fields(fixture_div)
 
-        return Game(home_team, away_team, venue, date, self.division)
+        return Game(division=self.division, **fields)
 
     def get_game_list(
         self, schedule_table: ResultSet[Tag], max_results: int = 100
@@ -68,25 +131,118 @@ class BlszScraper:
 
         return list_of_games
 
+    def iter_games(
+        self,
+        year_filter: int = None,
+        start: datetime.datetime = None,
+        end: datetime.datetime = None,
+        limit: int = None,
+    ) -> Iterator[Game]:
+        """Yields the games of the team schedule page as the fixtures are extracted
+
+        :param year_filter: Only yield games of this year, defaults to None
+        :param start: Only yield games starting at or after this datetime, defaults to None
+        :param end: Only yield games starting before this datetime, defaults to None
+        :param limit: Stop after yielding this many games, defaults to None
+        :return: An iterator of Game objects
+        """
+
+        if limit is not None and limit <= 0:
+            return
+
+        count = 0
+        for fixture in self.parser.iter_schedule_table(self.soup):
+            game = self.get_match_data(fixture)
+            start_datetime = game.start_datetime
+            if year_filter is not None and start_datetime.year != year_filter:
+                continue
+            if start is not None and start_datetime < start:
+                continue
+            if end is not None and start_datetime >= end:
+                continue
+
+            yield game
+
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
     def fetch_games(
-        self, year_filter: int = None, max_results: int = 100
+        self,
+        year_filter: int = None,
+        max_results: int = 100,
+        start: datetime.datetime = None,
+        end: datetime.datetime = None,
     ) -> list[Game]:
         """Fetches the game list from the team schedule page
 
+        :param year_filter: Year to filter the games by, defaults to None
         :param max_results: Max results count, defaults to 100
+        :param start: Only return games starting at or after this datetime, defaults to None
+        :param end: Only return games starting before this datetime, defaults to None
         :return: A list of Game objects
         """
 
-        schedule_table = self.get_schedule_table()
-        game_list = self.get_game_list(schedule_table, max_results)
-        result = []
-        for game in game_list:
-            if (
-                year_filter is not None and game.start_datetime.year == year_filter
-            ) or year_filter is None:
-                result.append(game)
+        # download and parse first, so they are not timed as transform
+        self.soup
+        with metrics.phase("transform"):
+            return list(
+                self.iter_games(
+                    year_filter=year_filter, start=start, end=end, limit=max_results
+                )
+            )
+
+    def fetch_game_table(
+        self, year_filter: int = None, max_results: int = None
+    ) -> GameTable:
+        """Fetches the games of the team schedule page into a columnar GameTable
+
+        :param year_filter: Year to filter the games by, defaults to None
+        :param max_results: Max results count, defaults to None
+        :return: The GameTable object
+        """
 
-        return result
+        return GameTable.from_games(
+            self.iter_games(year_filter=year_filter, limit=max_results)
+        )
+
+
+def fetch_all_team_games(
+    schedules: list[dict],
+    year_filter: int = None,
+    max_results: int = 100,
+    max_workers: int = DEFAULT_POOL_SIZE,
+    session: requests.Session = None,
+    cache: ResponseCache = None,
+    parser: str = DEFAULT_PARSER,
+) -> dict[str, list[Game]]:
+    """Fetches the game lists of several teams concurrently over one connection pool
+
+    :param schedules: Team configs from the "schedules" section of the app config
+    :param year_filter: Year to filter the games by, defaults to None
+    :param max_results: Max results count per team, defaults to 100
+    :param max_workers: Max number of schedule pages fetched at the same time, defaults to DEFAULT_POOL_SIZE
+    :param session: Shared requests Session, a pooled one with retries is created if not set, defaults to None
+    :param cache: Response cache used for conditional requests, defaults to None
+    :param parser: Name of the HTML parser backend, defaults to DEFAULT_PARSER
+    :return: A dictionary of Game lists keyed by team name
+    """
+
+    session = session or ResilientHttp(create_session(pool_size=max_workers))
+
+    def fetch_team_games(team_config: dict) -> list[Game]:
+        scraper = BlszScraper(
+            team_config["url"], session=session, cache=cache, parser=parser
+        )
+        return scraper.fetch_games(year_filter=year_filter, max_results=max_results)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        game_lists = executor.map(fetch_team_games, schedules)
+
+        return {
+            team_config["team_name"]: games
+            for team_config, games in zip(schedules, game_lists)
+        }
 
 
 if __name__ == "__main__":
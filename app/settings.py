@@ -0,0 +1,23 @@
+import os
+
+from functools import cache
+from dotenv import load_dotenv
+
+
+@cache
+def load_env() -> None:
+    """Loads the .env file into the environment, only on the first call"""
+
+    load_dotenv(override=True)
+
+
+def get_env(name: str, default: str = None) -> str:
+    """Returns an environment variable, loading the .env file first if needed
+
+    :param name: Name of the variable
+    :param default: Returned if the variable is not set, defaults to None
+    :return: The value of the variable
+    """
+
+    load_env()
+    return os.getenv(name, default)
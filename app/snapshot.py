@@ -0,0 +1,134 @@
+import os
+import gzip
+import json
+import hashlib
+
+from typing import Iterator
+from dataclasses import dataclass, field
+
+from app.game import Game
+
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class FixtureDiff:
+    """Class for representing the changes of a fixture list between two runs"""
+
+    added: list[Game] = field(default_factory=list)
+    rescheduled: list[tuple[Game, Game]] = field(default_factory=list)
+    venue_changed: list[tuple[Game, Game]] = field(default_factory=list)
+    removed: list[Game] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        """Checks if anything changed between the two fixture lists"""
+
+        return bool(
+            self.added or self.rescheduled or self.venue_changed or self.removed
+        )
+
+    @property
+    def changed_games(self) -> list[Game]:
+        """The new and the modified games, in their current state"""
+
+        changed = {game.match_key: game for game in self.added}
+        for _, game in self.rescheduled + self.venue_changed:
+            changed[game.match_key] = game
+        return list(changed.values())
+
+    def summary(self) -> str:
+        """Returns a one line summary of the changes"""
+
+        return (
+            f"{len(self.added)} new, {len(self.rescheduled)} rescheduled, "
+            f"{len(self.venue_changed)} venue changed, {len(self.removed)} removed"
+        )
+
+
+def diff_games(old_games: list[Game], new_games: list[Game]) -> FixtureDiff:
+    """Compares two fixture lists of a team by the match key of the games
+
+    :param old_games: The games of the previous run
+    :param new_games: The games of the current run
+    :return: The FixtureDiff object of the changes
+    """
+
+    old_by_key = {game.match_key: game for game in old_games}
+    new_keys = set()
+    diff = FixtureDiff()
+
+    for game in new_games:
+        new_keys.add(game.match_key)
+        old_game = old_by_key.get(game.match_key)
+        if old_game is None:
+            diff.added.append(game)
+            continue
+        if old_game.date != game.date:
+            diff.rescheduled.append((old_game, game))
+        if old_game.venue != game.venue:
+            diff.venue_changed.append((old_game, game))
+
+    diff.removed = [game for game in old_games if game.match_key not in new_keys]
+
+    return diff
+
+
+class SnapshotStore:
+    """Class for persisting the scraped game list of each team URL between runs"""
+
+    def __init__(self, directory: str) -> None:
+        """Initializes the SnapshotStore object
+
+        :param directory: Directory where the snapshots are stored
+        """
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def load(self, url: str) -> list[Game]:
+        """Loads the last saved game list of the url, None if there is no snapshot yet"""
+
+        try:
+            with gzip.open(self._path(url), "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        return [Game(*row) for row in snapshot["games"]]
+
+    def iter_snapshots(self) -> Iterator[tuple[str, list[Game]]]:
+        """Yields the url and the game list of every saved snapshot"""
+
+        for file_name in sorted(os.listdir(self.directory)):
+            if not file_name.endswith(".json.gz"):
+                continue
+            with gzip.open(
+                os.path.join(self.directory, file_name), "rt", encoding="utf-8"
+            ) as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION:
+                yield snapshot["url"], [Game(*row) for row in snapshot["games"]]
+
+    def save(self, url: str, games: list[Game]) -> None:
+        """Saves the game list of the url, replacing the previous snapshot atomically"""
+
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "url": url,
+            "games": [
+                [game.home_team, game.away_team, game.venue, game.date, game.division]
+                for game in games
+            ],
+        }
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
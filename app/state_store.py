@@ -0,0 +1,270 @@
+import os
+import copy
+import json
+import sqlite3
+import threading
+
+from typing import TYPE_CHECKING
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from gcsa.event import Event
+from gcsa.serializers.event_serializer import EventSerializer
+
+from app.game import MATCH_KEY_PROPERTY, FINGERPRINT_PROPERTY
+
+# the Google API client is not needed to read the store, e.g. by the offline --mode R
+if TYPE_CHECKING:
+    from app.calendar_batch import WriteResult
+
+STATE_VERSION = 1
+# a calendar is listed again after this many seconds, to pick up the events changed or
+# deleted outside the scraper
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calendars (
+    calendar_id TEXT PRIMARY KEY,
+    seeded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    fixture_key TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    fingerprint TEXT,
+    start_utc TEXT NOT NULL,
+    end_utc TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    event_json TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_fixture_key ON events (calendar_id, fixture_key);
+CREATE INDEX IF NOT EXISTS events_end ON events (calendar_id, end_utc);
+"""
+
+
+def to_utc_text(event_time: dict) -> str:
+    """Returns the start or end of a raw API event as a sortable UTC timestamp"""
+
+    if "dateTime" in event_time:
+        value = datetime.fromisoformat(event_time["dateTime"])
+    else:
+        value = datetime.fromisoformat(event_time["date"])
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def get_fixture_key(event_json: dict) -> str:
+    """Returns the match key of a raw API event, the summary for events created before it existed"""
+
+    shared_properties = event_json.get("extendedProperties", {}).get("shared", {})
+    return shared_properties.get(MATCH_KEY_PROPERTY) or event_json.get("summary")
+
+
+@dataclass(frozen=True)
+class EventRecord:
+    """Class for representing the calendar event of a fixture in the state store"""
+
+    calendar_id: str
+    fixture_key: str
+    event_id: str
+    fingerprint: str
+    start_utc: str
+    end_utc: str
+    synced_at: str
+    event_json: dict
+
+    def to_event(self) -> Event:
+        """Returns the stored event as an Event object"""
+
+        return EventSerializer.to_object(copy.deepcopy(self.event_json))
+
+
+class StateStore:
+    """Local SQLite store of the fixture -> calendar event mapping of each calendar.
+
+    The events written by the scraper are recorded with their event id, fingerprint and
+    sync time, keyed by the fixture (match key), so lookups, reconciles, updates and
+    deletes are indexed local queries instead of listings of the calendar. A calendar
+    is seeded from one listing the first time it is used, and seeded again once the
+    seed is older than max_age.
+    """
+
+    def __init__(self, path: str, max_age: float = DEFAULT_MAX_AGE) -> None:
+        """Initializes the StateStore object
+
+        :param path: The SQLite database file, ":memory:" for a store that is not persisted
+        :param max_age: Seconds after which the events of a calendar are seeded again,
+            None to never seed again, defaults to DEFAULT_MAX_AGE
+        """
+        self.path = path
+        self.max_age = max_age
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # the fan-out threads share the store, sqlite serializes the processes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, STATE_VERSION):
+                self.connection.executescript(
+                    "DROP TABLE IF EXISTS events; DROP TABLE IF EXISTS calendars;"
+                )
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {STATE_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> EventRecord:
+        return EventRecord(
+            calendar_id=row["calendar_id"],
+            fixture_key=row["fixture_key"],
+            event_id=row["event_id"],
+            fingerprint=row["fingerprint"],
+            start_utc=row["start_utc"],
+            end_utc=row["end_utc"],
+            synced_at=row["synced_at"],
+            event_json=json.loads(row["event_json"]),
+        )
+
+    def _query(self, sql: str, params: tuple) -> list[EventRecord]:
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def _upsert(self, calendar_id: str, event_json: dict, synced_at: str) -> None:
+        shared_properties = event_json.get("extendedProperties", {}).get("shared", {})
+        self.connection.execute(
+            "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                calendar_id,
+                get_fixture_key(event_json),
+                event_json["id"],
+                shared_properties.get(FINGERPRINT_PROPERTY),
+                to_utc_text(event_json["start"]),
+                to_utc_text(event_json["end"]),
+                synced_at,
+                json.dumps(event_json, ensure_ascii=False),
+            ),
+        )
+
+    def is_seeded(self, calendar_id: str) -> bool:
+        """Checks if the events of the calendar were loaded into the store"""
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM calendars WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row is not None
+
+    def is_stale(self, calendar_id: str) -> bool:
+        """Checks if the calendar needs a seed: it was never seeded or the seed is older than max_age"""
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT seeded_at FROM calendars WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        if row is None:
+            return True
+        if self.max_age is None:
+            return False
+
+        seeded_at = datetime.fromisoformat(row["seeded_at"])
+        return (datetime.now(timezone.utc) - seeded_at).total_seconds() >= self.max_age
+
+    def seed(self, calendar_id: str, events: list[Event]) -> None:
+        """Replaces the stored events of the calendar with a listing of the calendar
+
+        :param calendar_id: The calendar of the events
+        :param events: The scraper created events listed from the calendar
+        """
+
+        synced_at = datetime.now(timezone.utc).isoformat()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM events WHERE calendar_id = ?", (calendar_id,)
+            )
+            for event in events:
+                self._upsert(calendar_id, EventSerializer.to_json(event), synced_at)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO calendars VALUES (?, ?)",
+                (calendar_id, synced_at),
+            )
+
+    def get(self, calendar_id: str, fixture_key: str) -> EventRecord:
+        """Returns the record of a fixture, None if it has no event in the calendar"""
+
+        records = self._query(
+            "SELECT * FROM events WHERE calendar_id = ? AND fixture_key = ? "
+            "ORDER BY synced_at",
+            (calendar_id, fixture_key),
+        )
+        return records[0] if records else None
+
+    def get_by_event_id(self, calendar_id: str, event_id: str) -> EventRecord:
+        """Returns the record of a calendar event, None if it is not stored"""
+
+        records = self._query(
+            "SELECT * FROM events WHERE calendar_id = ? AND event_id = ?",
+            (calendar_id, event_id),
+        )
+        return records[0] if records else None
+
+    def get_records(
+        self, calendar_id: str, time_min: datetime = None
+    ) -> list[EventRecord]:
+        """Returns the records of the calendar, ordered by start
+
+        :param calendar_id: The calendar of the events
+        :param time_min: Only events ending after this, timezone aware datetime, defaults to None
+        :return: List of EventRecord objects
+        """
+
+        time_min_utc = time_min.astimezone(timezone.utc).isoformat() if time_min else ""
+        return self._query(
+            "SELECT * FROM events WHERE calendar_id = ? AND end_utc > ? "
+            "ORDER BY start_utc",
+            (calendar_id, time_min_utc),
+        )
+
+    def get_events(self, calendar_id: str, time_min: datetime = None) -> list[Event]:
+        """Returns the stored events of the calendar as Event objects, ordered by start
+
+        :param calendar_id: The calendar of the events
+        :param time_min: Only events ending after this, timezone aware datetime, defaults to None
+        :return: List of Event objects
+        """
+
+        return [record.to_event() for record in self.get_records(calendar_id, time_min)]
+
+    def record_results(self, calendar_id: str, results: list["WriteResult"]) -> int:
+        """Records the successful writes of the calendar
+
+        :param calendar_id: The calendar the writes were sent to
+        :param results: The results of the calendar writes
+        :return: The number of recorded writes
+        """
+
+        synced_at = datetime.now(timezone.utc).isoformat()
+        recorded = 0
+        with self.lock, self.connection:
+            for result in results:
+                if not result.ok:
+                    continue
+                if result.operation == "delete":
+                    self.connection.execute(
+                        "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                        (calendar_id, result.event.id),
+                    )
+                else:
+                    response = result.response
+                    if isinstance(response, Event):
+                        response = EventSerializer.to_json(response)
+                    self._upsert(calendar_id, response, synced_at)
+                recorded += 1
+
+        return recorded
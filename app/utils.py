@@ -1,5 +1,4 @@
 import os
-import yaml
 
 
 def config_parser(pathname: str = None) -> dict:
@@ -19,6 +18,8 @@ def config_parser(pathname: str = None) -> dict:
         config_file_path = os.path.join(base_path, "config.yaml")
     else:
         config_file_path = pathname
+    import yaml
+
     with open(config_file_path) as router_config_yaml:
         rc = yaml.load(router_config_yaml, Loader=yaml.SafeLoader)
 
@@ -41,3 +42,51 @@ def get_credentials_path() -> str:
     base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
     credentials_path = os.path.join(base_path, ".credentials", "credentials.json")
     return credentials_path
+
+
+def get_cache_path() -> str:
+    """This function is used to get the path of the directory where the downloaded schedule pages are cached."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    cache_path = os.path.join(base_path, ".cache", "http")
+    return cache_path
+
+
+def get_snapshot_path() -> str:
+    """This function is used to get the path of the directory where the fixture snapshots of the previous runs are stored."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    snapshot_path = os.path.join(base_path, ".cache", "snapshots")
+    return snapshot_path
+
+
+def get_mirror_path() -> str:
+    """This function is used to get the path of the file where the local mirror of the calendar events is stored."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    mirror_path = os.path.join(base_path, ".cache", "calendar_mirror.json")
+    return mirror_path
+
+
+def get_state_path() -> str:
+    """This function is used to get the path of the SQLite database where the calendar event of each fixture is recorded."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    state_path = os.path.join(base_path, ".cache", "state.sqlite3")
+    return state_path
+
+
+def get_rate_limit_path() -> str:
+    """This function is used to get the path of the file where the Calendar API rate limiter state shared by the processes is stored."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    rate_limit_path = os.path.join(base_path, ".cache", "rate_limit.json")
+    return rate_limit_path
+
+
+def get_crawl_path() -> str:
+    """This function is used to get the path of the directory where the crawler checkpoint and the crawled fixtures are stored."""
+
+    base_path = os.path.dirname(os.path.abspath(__file__)).removesuffix("/app")
+    crawl_path = os.path.join(base_path, ".cache", "crawl")
+    return crawl_path
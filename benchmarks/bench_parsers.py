@@ -0,0 +1,46 @@
+"""Compares the parse and fixture extraction time of the HTML parser backends.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parsers --repeat 20
+"""
+
+import argparse
+import timeit
+
+from app.parsers import PARSER_BACKENDS
+from app.scraper import BlszScraper
+
+DEFAULT_PAGE = "tests/data/test_adatbank.html"
+
+
+def scrape(content: bytes, parser: str) -> list:
+    """Parses the page content and extracts the games with the given backend"""
+
+    return BlszScraper.from_content("static_page", content, parser).fetch_games()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend benchmark.")
+    parser.add_argument("--page", type=str, default=DEFAULT_PAGE)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.page, "rb") as f:
+        content = f.read()
+
+    baseline_games = scrape(content, "html.parser")
+    results = {}
+    for name in PARSER_BACKENDS:
+        assert scrape(content, name) == baseline_games, f"{name} output differs"
+        timer = timeit.Timer(lambda: scrape(content, name))
+        results[name] = min(timer.repeat(repeat=args.repeat, number=1))
+
+    baseline = results["html.parser"]
+    print(f"{len(baseline_games)} fixtures, best of {args.repeat} runs")
+    for name, seconds in results.items():
+        print(f"{name:>12}: {seconds * 1000:8.1f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
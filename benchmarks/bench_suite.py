@@ -0,0 +1,263 @@
+"""Benchmark suite of the scraper pipeline on synthetic schedule pages of growing size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --save benchmarks/baseline.json
+    python -m benchmarks.bench_suite --compare benchmarks/baseline.json --threshold 0.2
+
+The comparison exits with status 1 if any case got slower than the baseline by
+more than the threshold.
+"""
+
+import io
+import os
+import sys
+import json
+import timeit
+import argparse
+import platform
+import tempfile
+import contextlib
+
+from datetime import datetime
+from unittest.mock import patch
+
+from app import main as main_module
+from app.fake_calendar import FakeGoogleCalendar
+from app.ics_export import write_calendar
+from app.scraper import BlszScraper
+from app.rate_limiter import AdaptiveRateLimiter
+from benchmarks.synthetic import generate_schedule_page
+
+BASELINE_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.2
+FILTER_YEAR = 2025
+# main() only creates upcoming events of FILTER_YEAR, so the clock is pinned before it
+PINNED_NOW = datetime(FILTER_YEAR, 1, 1)
+# a fake calendar run of the largest pages takes minutes, end-to-end stops here by default
+DEFAULT_MAX_END_TO_END_SIZE = 10000
+BENCH_URL = "https://adatbank.mlsz.hu/club/61/5/27291/1/268004.html"
+
+
+class PinnedDatetime(datetime):
+    """datetime whose now() is PINNED_NOW"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return PINNED_NOW.replace(tzinfo=tz)
+
+
+def bench_parse(content: bytes, size: int, parser: str):
+    """Parses the page and extracts every fixture"""
+
+    return lambda: BlszScraper.from_content(BENCH_URL, content, parser).fetch_games(
+        max_results=None
+    )
+
+
+def bench_filter(content: bytes, size: int, parser: str):
+    """Extracts the fixtures of FILTER_YEAR from an already parsed page"""
+
+    scraper = BlszScraper.from_content(BENCH_URL, content, parser)
+    scraper.soup
+
+    return lambda: scraper.fetch_games(year_filter=FILTER_YEAR, max_results=None)
+
+
+def bench_render(content: bytes, size: int, parser: str):
+    """Renders every fixture to a Google Calendar event"""
+
+    games = BlszScraper.from_content(BENCH_URL, content, parser).fetch_games(
+        max_results=None
+    )
+    attendees = ["player1@example.com", "player2@example.com"]
+
+    return lambda: [game.to_gc_event(attendees) for game in games]
+
+
+def bench_ics(content: bytes, size: int, parser: str):
+    """Renders every fixture into an iCalendar feed in memory"""
+
+    games = BlszScraper.from_content(BENCH_URL, content, parser).fetch_games(
+        max_results=None
+    )
+
+    return lambda: write_calendar(io.StringIO(), games, "benchmark", PINNED_NOW)
+
+
+def bench_end_to_end(content: bytes, size: int, parser: str):
+    """Runs main() in batch create mode against a fake calendar"""
+
+    team_config = {
+        "team_name": "benchmark",
+        "url": BENCH_URL,
+        "attendees_2024": ["player1@example.com"],
+    }
+    argv = ["main", "--mode", "C", "--batch", "--limit", str(size)]
+    argv += ["--parser", parser]
+
+    def run():
+        calendar = FakeGoogleCalendar()
+        with tempfile.TemporaryDirectory() as cache_dir, contextlib.ExitStack() as stack:
+            for target, value in (
+                ("sys.argv", argv),
+                (
+                    "gcsa.google_calendar.GoogleCalendar",
+                    lambda *args, **kwargs: calendar,
+                ),
+                ("app.main.config_parser", lambda: {"schedules": [team_config]}),
+                ("app.main.get_config_by_team", lambda *args: team_config),
+                ("app.main.get_credentials_path", lambda: None),
+                ("app.main.get_cache_path", lambda: cache_dir),
+                (
+                    "app.main.get_rate_limit_path",
+                    lambda: os.path.join(cache_dir, "rate_limit.json"),
+                ),
+                # the fake calendar has no quota, the pacing is not part of the benchmark
+                (
+                    "app.rate_limiter.AdaptiveRateLimiter",
+                    lambda path: AdaptiveRateLimiter(path, sleep=lambda seconds: None),
+                ),
+                (
+                    "app.scraper.BlszScraper",
+                    lambda url, **kwargs: BlszScraper.from_content(
+                        url, content, kwargs["parser"]
+                    ),
+                ),
+                ("app.game_event_processor.datetime", PinnedDatetime),
+            ):
+                stack.enter_context(patch(target, value))
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            main_module.main()
+
+        return calendar
+
+    return run
+
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "filter": bench_filter,
+    "render": bench_render,
+    "ics": bench_ics,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def run_benchmarks(
+    sizes: list[int],
+    cases: list[str],
+    parser: str = "lxml",
+    repeat: int = 3,
+    max_end_to_end_size: int = DEFAULT_MAX_END_TO_END_SIZE,
+) -> dict[str, dict]:
+    """Runs the benchmark cases on generated pages of every size
+
+    :param sizes: Fixture counts of the generated pages
+    :param cases: Names of the BENCHMARKS to run
+    :param parser: HTML parser backend, defaults to "lxml"
+    :param repeat: The best of this many runs is kept, defaults to 3
+    :param max_end_to_end_size: Largest page the end-to-end case runs on, defaults to DEFAULT_MAX_END_TO_END_SIZE
+    :return: The results keyed by "<case>/<size>"
+    """
+
+    results = {}
+    for size in sizes:
+        content = generate_schedule_page(size)
+        for case in cases:
+            if case == "end_to_end" and size > max_end_to_end_size:
+                continue
+
+            timer = timeit.Timer(BENCHMARKS[case](content, size, parser))
+            seconds = min(timer.repeat(repeat=repeat, number=1))
+            results[f"{case}/{size}"] = {
+                "case": case,
+                "size": size,
+                "seconds": seconds,
+                "us_per_fixture": seconds / size * 1e6,
+            }
+            print(f"{case:>10} {size:>7}: {seconds * 1000:10.1f} ms", file=sys.stderr)
+
+    return results
+
+
+def save_baseline(path: str, results: dict[str, dict], parser: str) -> None:
+    baseline = {
+        "version": BASELINE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parser": parser,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def compare_results(
+    baseline: dict[str, dict],
+    results: dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """Compares the results to the baseline results
+
+    :param baseline: The "results" of a saved baseline
+    :param results: The results of the current run
+    :param threshold: Allowed relative slowdown, defaults to DEFAULT_THRESHOLD
+    :return: The keys of the cases slower than the baseline by more than the threshold
+    """
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            print(f"{key:>18}: {result['seconds'] * 1000:10.1f} ms  (new)")
+            continue
+
+        ratio = result["seconds"] / baseline[key]["seconds"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(key)
+        print(
+            f"{key:>18}: {result['seconds'] * 1000:10.1f} ms  {ratio:5.2f}x baseline"
+            + ("  REGRESSION" if regressed else "")
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper pipeline benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--cases", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument("--parser", type=str, default="lxml")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max_end_to_end_size", type=int, default=DEFAULT_MAX_END_TO_END_SIZE
+    )
+    parser.add_argument("--save", type=str, help="Write the results as a baseline")
+    parser.add_argument("--compare", type=str, help="Baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.sizes, args.cases, args.parser, args.repeat, args.max_end_to_end_size
+    )
+
+    if args.save:
+        save_baseline(args.save, results, args.parser)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
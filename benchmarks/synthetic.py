@@ -0,0 +1,93 @@
+"""Generates synthetic adatbank team schedule pages of any size from a real page.
+
+The fixture blocks of the template page are repeated with unique match ids, dates
+spread over SEASON_YEARS and opponent names varied, the rest of the page is kept.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+DEFAULT_TEMPLATE = "tests/data/test_adatbank.html"
+SCHEDULE_START = '<div class="schedule "'
+SEASON_YEARS = (2024, 2025, 2026)
+OPPONENT_VARIANTS = 20
+
+DATE_PATTERN = re.compile(r"\d{4}\. \d{2}\. \d{2}\. <span> \d{2}:\d{2}</span>")
+REL_PATTERN = re.compile(r'rel="\d+"')
+TEAM_PATTERN = re.compile(
+    r'class="(?:home|away)_team"><a [^>]*><span>([^<]+)</span>', re.UNICODE
+)
+DIV_PATTERN = re.compile(r"<div\b|</div>")
+
+
+def find_block_end(html: str, start: int) -> int:
+    """Returns the position after the </div> closing the div opened at start"""
+
+    depth = 0
+    for match in DIV_PATTERN.finditer(html, start):
+        depth += 1 if match.group() == "<div" else -1
+        if depth == 0:
+            return match.end()
+
+    raise ValueError("Unbalanced div in the template page")
+
+
+def split_template(html: str) -> tuple[str, list[str], str]:
+    """Splits the page into the part before, the fixture blocks and the part after them"""
+
+    starts = [match.start() for match in re.finditer(re.escape(SCHEDULE_START), html)]
+    if not starts:
+        raise ValueError("The template page has no fixtures")
+
+    blocks = [html[start : find_block_end(html, start)] for start in starts]
+    end = find_block_end(html, starts[-1])
+
+    return html[: starts[0]], blocks, html[end:]
+
+
+def fixture_datetime(index: int, count: int) -> datetime:
+    """Spreads count fixtures evenly over SEASON_YEARS, on whole minutes"""
+
+    first = datetime(SEASON_YEARS[0], 1, 1, 10)
+    span = datetime(SEASON_YEARS[-1] + 1, 1, 1) - first - timedelta(hours=14)
+    offset = span * index / max(count, 1)
+
+    return first + timedelta(minutes=offset // timedelta(minutes=1))
+
+
+def generate_schedule_page(count: int, template: str = DEFAULT_TEMPLATE) -> bytes:
+    """Generates a team schedule page with count fixtures
+
+    :param count: Number of fixtures on the page
+    :param template: Path of the real page used as template, defaults to DEFAULT_TEMPLATE
+    :return: The UTF-8 encoded page
+    """
+
+    with open(template, encoding="utf-8") as f:
+        html = f.read()
+
+    before, blocks, after = split_template(html)
+    team_counts = {}
+    for block in blocks:
+        for team in TEAM_PATTERN.findall(block):
+            team_counts[team] = team_counts.get(team, 0) + 1
+    home_team = max(team_counts, key=team_counts.get)
+    opponents = [team for team in team_counts if team != home_team]
+
+    parts = [before]
+    for index in range(count):
+        block = blocks[index % len(blocks)]
+        variant = (index // len(blocks)) % OPPONENT_VARIANTS
+        if variant:
+            for team in opponents:
+                block = block.replace(team, f"{team} {variant}")
+
+        start = fixture_datetime(index, count)
+        block = DATE_PATTERN.sub(
+            start.strftime("%Y. %m. %d. <span> %H:%M</span>"), block, count=1
+        )
+        block = REL_PATTERN.sub(f'rel="{index + 1}"', block, count=1)
+        parts.append(block)
+    parts.append(after)
+
+    return "\n".join(parts).encode("utf-8")
@@ -0,0 +1,71 @@
+import pytest
+import asyncio
+
+from app.async_scraper import AsyncBlszScraper, parse_games
+
+
+@pytest.fixture
+def html_content():
+    with open("tests/data/test_adatbank.html", "rb") as f:
+        return f.read()
+
+
+class MockResponse:
+    def __init__(self, session, content):
+        self.session = session
+        self.content = content
+
+    async def __aenter__(self):
+        self.session.in_flight += 1
+        self.session.max_in_flight = max(
+            self.session.max_in_flight, self.session.in_flight
+        )
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.session.in_flight -= 1
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self):
+        return self.content
+
+
+class MockSession:
+    def __init__(self, content):
+        self.content = content
+        self.urls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url):
+        self.urls.append(url)
+        return MockResponse(self, self.content)
+
+
+def test_parse_games(html_content):
+    games = parse_games("dummy_url", html_content, parser="lxml", year_filter=2024)
+
+    assert len(games) == 15
+
+
+def test_fetch_all_team_games(html_content):
+    session = MockSession(html_content)
+    schedules = [
+        {"team_name": f"team{i}", "url": f"http://example.com/{i}"} for i in range(6)
+    ]
+
+    async def run():
+        async with AsyncBlszScraper(
+            max_concurrency=2, parser="lxml", session=session
+        ) as scraper:
+            return await scraper.fetch_all_team_games(schedules, year_filter=2024)
+
+    games_by_team = asyncio.run(run())
+
+    assert list(games_by_team) == [f"team{i}" for i in range(6)]
+    assert all(len(games) == 15 for games in games_by_team.values())
+    assert len(session.urls) == 6
+    assert session.max_in_flight == 2
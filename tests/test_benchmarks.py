@@ -0,0 +1,39 @@
+from app.scraper import BlszScraper
+from benchmarks.synthetic import generate_schedule_page
+from benchmarks.bench_suite import bench_end_to_end, compare_results
+
+
+def test_generate_schedule_page():
+    content = generate_schedule_page(75)
+    games = BlszScraper.from_content("url", content, "lxml").fetch_games(
+        max_results=None
+    )
+
+    assert len(games) == 75
+    assert (
+        len({game.away_team for game in games} | {game.home_team for game in games})
+        > 16
+    )
+    assert [game.start_datetime for game in games] == sorted(
+        game.start_datetime for game in games
+    )
+    assert {game.start_datetime.year for game in games} == {2024, 2025, 2026}
+
+
+def test_end_to_end_creates_the_events():
+    content = generate_schedule_page(30)
+
+    calendar = bench_end_to_end(content, 30, "lxml")()
+
+    assert calendar.call_counts["insert"] == 10
+
+
+def test_compare_results():
+    baseline = {"parse/10": {"seconds": 1.0}, "render/10": {"seconds": 1.0}}
+    results = {
+        "parse/10": {"seconds": 1.1},
+        "render/10": {"seconds": 1.5},
+        "filter/10": {"seconds": 1.0},
+    }
+
+    assert compare_results(baseline, results, threshold=0.2) == ["render/10"]
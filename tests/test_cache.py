@@ -0,0 +1,117 @@
+import os
+import pytest
+
+from unittest.mock import Mock
+
+from app.cache import ResponseCache
+
+
+def make_response(content, status_code=200, headers=None):
+    response = Mock()
+    response.content = content
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+def test_fetch_stores_response(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    http = Mock()
+    http.get.return_value = make_response(
+        b"<html></html>", headers={"ETag": '"abc"', "Last-Modified": "Mon"}
+    )
+
+    body = cache.fetch(http, "http://example.com")
+
+    assert body == b"<html></html>"
+    http.get.assert_called_once_with("http://example.com", headers={})
+    entry = cache.get("http://example.com")
+    assert entry.body == b"<html></html>"
+    assert entry.etag == '"abc"'
+    assert entry.last_modified == "Mon"
+
+
+def test_fetch_reuses_body_on_not_modified(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    http = Mock()
+    http.get.return_value = make_response(b"first", headers={"ETag": '"abc"'})
+    cache.fetch(http, "http://example.com")
+
+    http.get.return_value = make_response(b"", status_code=304)
+    body = cache.fetch(http, "http://example.com")
+
+    assert body == b"first"
+    http.get.assert_called_with(
+        "http://example.com", headers={"If-None-Match": '"abc"'}
+    )
+
+
+def test_fetch_skips_request_when_fresh(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age=60)
+    http = Mock()
+    http.get.return_value = make_response(b"first")
+    cache.fetch(http, "http://example.com")
+
+    body = cache.fetch(http, "http://example.com")
+
+    assert body == b"first"
+    http.get.assert_called_once()
+
+
+def test_fetch_raises_on_error_status(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    http = Mock()
+    http.get.return_value = make_response(b"", status_code=500)
+    http.get.return_value.raise_for_status.side_effect = RuntimeError("500")
+
+    with pytest.raises(RuntimeError):
+        cache.fetch(http, "http://example.com")
+
+    assert cache.get("http://example.com") is None
+
+
+def test_evict_least_recently_used(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    clock = iter(range(100))
+    monkeypatch.setattr("app.cache.time.time", lambda: next(clock))
+
+    cache.store("http://example.com/a", make_response(b"aaaaa"))
+    cache.store("http://example.com/b", make_response(b"bbbbb"))
+    cache.get("http://example.com/a")
+    cache.store("http://example.com/c", make_response(b"ccccc"))
+
+    assert cache.get("http://example.com/a") is not None
+    assert cache.get("http://example.com/b") is None
+    assert cache.get("http://example.com/c") is not None
+
+
+def test_fetch_not_modified_after_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    http = Mock()
+    http.get.return_value = make_response(b"first", headers={"ETag": '"abc"'})
+    cache.fetch(http, "http://example.com")
+
+    def evict_then_not_modified(url, headers):
+        for path in cache._paths(url):
+            os.remove(path)
+        return make_response(b"", status_code=304)
+
+    http.get.side_effect = evict_then_not_modified
+    body = cache.fetch(http, "http://example.com")
+
+    assert body == b"first"
+    assert cache.refresh("http://example.com") is False
+    assert cache.get("http://example.com") is None
+
+
+def test_temporary_files_are_unique_per_process(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path))
+    replaced = []
+    monkeypatch.setattr("app.cache.os.getpid", lambda: 4242)
+    monkeypatch.setattr(
+        "app.cache.os.replace", lambda src, dst: replaced.append(src) or None
+    )
+
+    cache._write_atomic(str(tmp_path / "entry.json"), b"{}")
+
+    assert ".4242." in replaced[0]
@@ -0,0 +1,110 @@
+import pytest
+
+from datetime import datetime
+
+from unittest.mock import Mock
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+
+from app.calendar_batch import CalendarBatchWriter, EventPatch
+
+
+class MockBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batch_sizes.append(len(self.requests))
+        for request_id, request in self.requests:
+            event_id = request.get("eventId") or request["body"]["id"]
+            if event_id in self.service.failing_ids:
+                self.callback(request_id, None, RuntimeError("rateLimitExceeded"))
+            else:
+                self.callback(request_id, {"id": event_id}, None)
+
+
+class MockService:
+    def __init__(self, failing_ids=()):
+        self.failing_ids = set(failing_ids)
+        self.batch_sizes = []
+        self.events_resource = Mock()
+        for method in ("insert", "update", "patch", "delete"):
+            getattr(self.events_resource, method).side_effect = (
+                lambda method=method, **kwargs: {"method": method, **kwargs}
+            )
+
+    def events(self):
+        return self.events_resource
+
+    def new_batch_http_request(self, callback):
+        return MockBatch(self, callback)
+
+
+def make_event(event_id):
+    return Event(
+        "Team1 - Team2",
+        start=datetime(2022, 1, 1, 12),
+        event_id=event_id,
+    )
+
+
+@pytest.fixture
+def gc_client():
+    gc_client = Mock(spec=GoogleCalendar)
+    gc_client.default_calendar = "primary"
+    return gc_client
+
+
+def test_write_groups_operations_into_batches(gc_client):
+    gc_client.service = MockService(failing_ids={"e3"})
+    writer = CalendarBatchWriter(gc_client, batch_size=2)
+
+    results = writer.write(
+        inserts=[make_event("e1"), make_event("e2")],
+        patches=[EventPatch(make_event("e3"), ("location",))],
+        deletes=[make_event("e4"), make_event("e5")],
+    )
+
+    assert gc_client.service.batch_sizes == [2, 2, 1]
+    assert [result.operation for result in results] == [
+        "insert",
+        "insert",
+        "patch",
+        "delete",
+        "delete",
+    ]
+    assert [result.ok for result in results] == [True, True, False, True, True]
+    assert isinstance(results[2].error, RuntimeError)
+    gc_client.service.events_resource.delete.assert_any_call(
+        calendarId="primary", eventId="e4", sendUpdates="none"
+    )
+
+
+def test_write_patches_only_changed_fields(gc_client):
+    gc_client.service = MockService()
+    writer = CalendarBatchWriter(gc_client)
+    event = make_event("e1")
+    event.location = "Venue"
+
+    results = writer.write(patches=[EventPatch(event, ("location",))])
+
+    assert [result.operation for result in results] == ["patch"]
+    assert results[0].ok
+    body = gc_client.service.events_resource.patch.call_args.kwargs["body"]
+    assert body == {"location": "Venue"}
+
+
+def test_build_request_unknown_operation(gc_client):
+    gc_client.service = MockService()
+    writer = CalendarBatchWriter(gc_client)
+
+    with pytest.raises(ValueError):
+        writer.build_request("move", make_event("e1"))
+    # the full update of a listed event would clear the fields missing from the mask
+    with pytest.raises(ValueError):
+        writer.build_request("update", make_event("e1"))
@@ -0,0 +1,70 @@
+import threading
+
+from datetime import datetime
+from unittest.mock import Mock
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+
+from app.calendar_executor import CalendarPoolExecutor
+
+
+def make_event(event_id):
+    return Event(
+        "Team1 - Team2",
+        start=datetime(2022, 1, 1, 12),
+        event_id=event_id,
+    )
+
+
+def test_execute_keeps_order_and_reports_errors():
+    clients = []
+
+    def client_factory():
+        client = Mock(spec=GoogleCalendar)
+        client.add_event.side_effect = lambda event, **kwargs: event
+        client.delete_event.side_effect = RuntimeError("rateLimitExceeded")
+        clients.append(client)
+        return client
+
+    executor = CalendarPoolExecutor(client_factory, max_workers=4)
+    events = [make_event(f"e{i}") for i in range(6)]
+
+    results = executor.write(inserts=events[:5], deletes=events[5:])
+
+    assert [result.event for result in results] == events
+    assert [result.ok for result in results] == [True] * 5 + [False]
+    assert str(results[-1].error) == "rateLimitExceeded"
+    assert results[0].response is events[0]
+    assert 1 <= len(clients) <= 4
+
+
+def test_every_thread_uses_its_own_client():
+    barrier = threading.Barrier(3)
+    owners = {}
+
+    def client_factory():
+        client = Mock(spec=GoogleCalendar)
+        owner = threading.get_ident()
+
+        def add_event(event, **kwargs):
+            assert threading.get_ident() == owner
+            owners.setdefault(owner, client)
+            barrier.wait(timeout=5)
+
+        client.add_event.side_effect = add_event
+        return client
+
+    executor = CalendarPoolExecutor(client_factory, max_workers=3)
+    results = executor.write(inserts=[make_event(f"e{i}") for i in range(3)])
+
+    assert all(result.ok for result in results)
+    assert len(owners) == 3
+
+
+def test_execute_unknown_operation():
+    executor = CalendarPoolExecutor(lambda: Mock(spec=GoogleCalendar))
+
+    (result,) = executor.execute([("move", make_event("e1"))])
+
+    assert not result.ok
+    assert isinstance(result.error, ValueError)
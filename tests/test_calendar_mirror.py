@@ -0,0 +1,109 @@
+import pytest
+import httplib2
+
+from datetime import datetime, timezone
+from unittest.mock import Mock
+from gcsa.google_calendar import GoogleCalendar
+from googleapiclient.errors import HttpError
+
+from app.calendar_mirror import CalendarMirror
+
+
+def make_item(event_id, start="2099-01-01T12:00:00+01:00", tagged=True, **kwargs):
+    item = {
+        "id": event_id,
+        "summary": f"Event {event_id}",
+        "start": {"dateTime": start},
+        "end": {"dateTime": start},
+        **kwargs,
+    }
+    if tagged:
+        item["extendedProperties"] = {"shared": {"scraper_automatic_event": "yes"}}
+    return item
+
+
+class MockListService:
+    """Serves the queued list responses and records the list calls"""
+
+    def __init__(self):
+        self.responses = []
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        response = self.responses.pop(0)
+        request = Mock()
+        if isinstance(response, Exception):
+            request.execute.side_effect = response
+        else:
+            request.execute.return_value = response
+        return request
+
+
+@pytest.fixture
+def gc_client():
+    gc_client = Mock(spec=GoogleCalendar)
+    gc_client.default_calendar = "primary"
+    gc_client.service = MockListService()
+    return gc_client
+
+
+def test_full_then_incremental_sync(gc_client, tmp_path):
+    path = str(tmp_path / "mirror.json")
+    service = gc_client.service
+    service.responses = [
+        {
+            "items": [make_item("e1"), make_item("other", tagged=False)],
+            "nextPageToken": "p2",
+        },
+        {"items": [make_item("e2")], "nextSyncToken": "s1"},
+    ]
+
+    mirror = CalendarMirror(gc_client, path)
+    assert mirror.sync() == 2
+    assert [event.id for event in mirror.get_events()] == ["e1", "e2"]
+
+    service.responses = [
+        {
+            "items": [make_item("e1", status="cancelled"), make_item("e3")],
+            "nextSyncToken": "s2",
+        }
+    ]
+    reloaded_mirror = CalendarMirror(gc_client, path)
+    assert reloaded_mirror.sync() == 2
+
+    assert service.calls[-1]["syncToken"] == "s1"
+    assert [event.id for event in reloaded_mirror.get_events()] == ["e2", "e3"]
+    assert reloaded_mirror.sync_token == "s2"
+
+
+def test_expired_sync_token_falls_back_to_full_sync(gc_client, tmp_path):
+    service = gc_client.service
+    mirror = CalendarMirror(gc_client, str(tmp_path / "mirror.json"))
+    mirror.sync_token = "expired"
+    mirror.events = {"old": make_item("old")}
+    service.responses = [
+        HttpError(httplib2.Response({"status": 410}), b"Gone"),
+        {"items": [make_item("e1")], "nextSyncToken": "s1"},
+    ]
+
+    mirror.sync()
+
+    assert "syncToken" not in service.calls[-1]
+    assert list(mirror.events) == ["e1"]
+    assert mirror.sync_token == "s1"
+
+
+def test_get_events_time_min(gc_client, tmp_path):
+    mirror = CalendarMirror(gc_client, str(tmp_path / "mirror.json"))
+    mirror.events = {
+        "past": make_item("past", start="2000-01-01T12:00:00+01:00"),
+        "future": make_item("future"),
+    }
+
+    events = mirror.get_events(time_min=datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+    assert [event.id for event in events] == ["future"]
@@ -0,0 +1,171 @@
+import json
+import pytest
+
+from app.crawler import (
+    ClubPage,
+    CrawlFrontier,
+    HostPoliteness,
+    ScheduleCrawler,
+    discover_club_pages,
+)
+from app.snapshot import SnapshotStore
+
+SEED_URL = "https://adatbank.mlsz.hu/club/61/5/27291/5/268004.html"
+CLUB_KEYS = [
+    "61/5/27291/268004",
+    "61/5/27292/268906",
+    "61/5/27345/269029",
+    "61/5/27347/270052",
+]
+
+
+@pytest.fixture
+def page():
+    with open("tests/data/test_adatbank.html", "rb") as f:
+        return f.read()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fetched(monkeypatch, page):
+    """Serves the test page for every URL, records the fetched URLs"""
+
+    urls = []
+
+    def get_content_from_url(scraper, url):
+        urls.append(url)
+        return page
+
+    monkeypatch.setattr(
+        "app.crawler.BlszScraper.get_content_from_url", get_content_from_url
+    )
+    return urls
+
+
+def make_crawler(tmp_path, clock, **kwargs):
+    return ScheduleCrawler(
+        [SEED_URL],
+        str(tmp_path / "checkpoint.json"),
+        SnapshotStore(str(tmp_path / "games")),
+        parser="lxml",
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+
+def test_club_page():
+    page = ClubPage.from_url(SEED_URL)
+
+    assert page.key == "61/5/27291/268004"
+    assert page.url == SEED_URL
+    assert (
+        ClubPage.from_url("https://adatbank.mlsz.hu/league/61/5/27291/5.html") is None
+    )
+    assert ClubPage.from_selector_value(
+        "https://adatbank.mlsz.hu",
+        "teamId=268906&evad=61&szervezet=5&verseny=27292&fordulo=5",
+    ) == ClubPage("https://adatbank.mlsz.hu", "61", "5", "27292", "5", "268906")
+    assert ClubPage.from_selector_value("https://adatbank.mlsz.hu", "evad=61") is None
+
+
+def test_discover_club_pages(page):
+    pages = discover_club_pages(SEED_URL, page)
+
+    # the rounds of the team are one schedule, the opponents belong to other clubs
+    assert [club_page.key for club_page in pages] == CLUB_KEYS
+
+
+def test_frontier_deduplicates_rounds():
+    frontier = CrawlFrontier()
+
+    assert frontier.add(ClubPage.from_url(SEED_URL))
+    assert not frontier.add(
+        ClubPage.from_url("https://adatbank.mlsz.hu/club/61/5/27291/12/268004.html")
+    )
+    assert list(frontier.queue) == [SEED_URL]
+
+
+def test_frontier_pop_ready_skips_busy_hosts():
+    frontier = CrawlFrontier()
+    frontier.requeue("https://a.example/club/1/1/1/1/1.html")
+    frontier.requeue("https://b.example/club/1/1/1/1/2.html")
+    politeness = HostPoliteness(delay=2)
+    politeness.record("a.example", 0)
+
+    assert frontier.pop_ready(politeness, 1) == (
+        "https://b.example/club/1/1/1/1/2.html",
+        0,
+    )
+    assert frontier.pop_ready(politeness, 1) == (None, 1)
+    assert frontier.pop_ready(politeness, 2) == (
+        "https://a.example/club/1/1/1/1/1.html",
+        0,
+    )
+
+
+def test_crawler_crawls_the_club(tmp_path, fetched):
+    clock = Clock()
+    crawler = make_crawler(tmp_path, clock, delay=1.5)
+
+    assert crawler.run() == 4
+
+    assert len(fetched) == 4
+    assert len(set(fetched)) == 4
+    # one request per host every 1.5 seconds
+    assert clock.sleeps == [1.5, 1.5, 1.5]
+    assert len(SnapshotStore(str(tmp_path / "games")).load(SEED_URL)) == 30
+    with open(tmp_path / "checkpoint.json", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert checkpoint["frontier"] == []
+    assert checkpoint["seen"] == CLUB_KEYS
+    assert checkpoint["crawled"] == 4
+
+
+def test_crawler_resumes_from_checkpoint(tmp_path, fetched):
+    assert make_crawler(tmp_path, Clock()).run(max_pages=2) == 2
+
+    resumed = make_crawler(tmp_path, Clock())
+    assert len(resumed.frontier) == 2
+    assert resumed.run() == 2
+
+    assert resumed.crawled == 4
+    assert len(set(fetched)) == 4
+    assert len(fetched) == 4
+
+
+def test_crawler_requeues_the_page_on_interrupt(tmp_path, monkeypatch):
+    def interrupt(scraper, url):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("app.crawler.BlszScraper.get_content_from_url", interrupt)
+
+    assert make_crawler(tmp_path, Clock()).run() == 0
+
+    resumed = make_crawler(tmp_path, Clock())
+    assert list(resumed.frontier.queue) == [SEED_URL]
+
+
+def test_crawler_gives_up_after_max_attempts(tmp_path, monkeypatch):
+    def fail(scraper, url):
+        raise ConnectionError("Connection refused")
+
+    monkeypatch.setattr("app.crawler.BlszScraper.get_content_from_url", fail)
+    crawler = make_crawler(tmp_path, Clock(), max_attempts=2)
+
+    assert crawler.run() == 0
+
+    assert crawler.failed == [SEED_URL]
+    assert len(crawler.frontier) == 0
@@ -0,0 +1,258 @@
+import json
+import pytest
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from app import metrics
+from app.game import Game
+from app.metrics import Metrics
+from app.daemon import (
+    ScheduleDaemon,
+    get_poll_interval,
+    MIN_INTERVAL,
+    NEAR_MATCH_INTERVAL,
+    SEASON_INTERVAL,
+    OFF_SEASON_INTERVAL,
+)
+from app.fan_out import FanOutProcessor
+from app.reconcile import ReconcilePlan
+from app.fake_calendar import FakeGoogleCalendar
+from app.calendar_batch import WriteResult, WriteSummary
+from app.game_event_processor import GameEventProcessor
+
+NOW = datetime(2025, 3, 1, 12)
+
+
+def make_game(start, away_team="Team2"):
+    return Game(
+        "Team1", away_team, "Venue", start.strftime("%Y. %m. %d.  %H:%M"), "Division"
+    )
+
+
+@pytest.fixture
+def page():
+    with open("tests/data/test_adatbank.html", "rb") as f:
+        return f.read()
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+def test_get_poll_interval():
+    near = [make_game(NOW + timedelta(days=1))]
+    far = [make_game(NOW + timedelta(days=10))]
+    past = [make_game(NOW - timedelta(days=10))]
+
+    assert get_poll_interval(near, NOW) == NEAR_MATCH_INTERVAL
+    assert get_poll_interval(far, NOW) == SEASON_INTERVAL
+    assert get_poll_interval(past, NOW) == OFF_SEASON_INTERVAL
+    assert get_poll_interval(far, NOW, changed=True) == MIN_INTERVAL
+    assert get_poll_interval(far, NOW, previous_interval=MIN_INTERVAL) == (
+        MIN_INTERVAL * 2
+    )
+    assert (
+        get_poll_interval(near, NOW, previous_interval=SEASON_INTERVAL)
+        == NEAR_MATCH_INTERVAL
+    )
+
+
+def test_daemon_syncs_only_changes(monkeypatch, page):
+    clock = Clock()
+    pages = [page, page, page.replace(b"2024. 05. 24.", b"2024. 05. 25.")]
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: pages.pop(0)
+    )
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.return_value = ReconcilePlan()
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": ["email1"]}
+    daemon = ScheduleDaemon(
+        gep, [team_config], parser="lxml", now=clock, sleep=clock.sleep
+    )
+
+    daemon.run(max_cycles=3)
+
+    (team,) = daemon.teams
+    assert team.polls == 3
+    assert team.syncs == 2
+    assert gep.reconcile.call_count == 2
+    games, attendees = gep.reconcile.call_args.args
+    assert games[-1].date == "2024. 05. 25.  19:30"
+    assert team.interval == MIN_INTERVAL
+    # first sync, quiet poll after MIN_INTERVAL, change after 2 * MIN_INTERVAL
+    assert clock.now == NOW + 3 * MIN_INTERVAL
+
+
+def test_daemon_retries_failed_sync(monkeypatch, page):
+    clock = Clock()
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.side_effect = [Exception("rateLimitExceeded"), ReconcilePlan()]
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": []}
+    daemon = ScheduleDaemon(
+        gep, [team_config], parser="lxml", now=clock, sleep=clock.sleep
+    )
+
+    daemon.run(max_cycles=2)
+
+    (team,) = daemon.teams
+    assert team.errors == 1
+    assert team.syncs == 1
+    assert gep.reconcile.call_count == 2
+
+
+def test_daemon_retries_failed_calendar_writes(monkeypatch, page):
+    clock = Clock()
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    failed_write = WriteResult("insert", Mock(), False, error=Exception("500"))
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.side_effect = [
+        ReconcilePlan(write_summary=WriteSummary(results=[failed_write])),
+        ReconcilePlan(),
+        ReconcilePlan(),
+    ]
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": []}
+    daemon = ScheduleDaemon(
+        gep, [team_config], parser="lxml", now=clock, sleep=clock.sleep
+    )
+
+    daemon.run_once()
+
+    (team,) = daemon.teams
+    assert team.errors == 1
+    assert team.games is None
+    assert team.next_poll == NOW + MIN_INTERVAL
+
+    # the unchanged page is synced again, then polls stay quiet
+    daemon.run(max_cycles=2)
+
+    assert gep.reconcile.call_count == 2
+    assert team.syncs == 2
+    assert team.errors == 1
+
+
+def test_daemon_syncs_every_target_calendar(monkeypatch, page):
+    clock = Clock()
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    start = datetime.now() + timedelta(days=7)
+    games = [make_game(start + timedelta(days=i), f"Team{i + 2}") for i in range(3)]
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.fetch_games", lambda *args, **kwargs: games
+    )
+    calendars = {}
+
+    def client_factory(calendar_id):
+        return calendars.setdefault(calendar_id, FakeGoogleCalendar(calendar_id))
+
+    monkeypatch.setattr(
+        "app.daemon.FanOutProcessor.from_processor",
+        lambda gep, targets: FanOutProcessor(targets, client_factory),
+    )
+    gep = Mock(spec=GameEventProcessor)
+    gep.gc_client = FakeGoogleCalendar("primary@example.com")
+    # a team synced only to its targets has no attendees_2024
+    team_config = {
+        "team_name": "SFC",
+        "url": "url",
+        "targets": [
+            {"name": "players", "calendar_id": "players@example.com"},
+            {"name": "club"},
+        ],
+    }
+    daemon = ScheduleDaemon(
+        gep, [team_config], parser="lxml", max_results=3, now=clock, sleep=clock.sleep
+    )
+
+    daemon.run_once()
+
+    (team,) = daemon.teams
+    assert team.errors == 0
+    assert team.syncs == 1
+    gep.reconcile.assert_not_called()
+    assert sorted(calendars) == ["players@example.com", "primary@example.com"]
+    assert all(calendar.call_counts["insert"] == 3 for calendar in calendars.values())
+
+
+def test_daemon_keeps_missing_events_by_default(monkeypatch, page):
+    clock = Clock()
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.return_value = ReconcilePlan()
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": []}
+    daemon = ScheduleDaemon(
+        gep, [team_config], parser="lxml", max_results=3, now=clock, sleep=clock.sleep
+    )
+
+    daemon.run(max_cycles=1)
+
+    assert len(gep.reconcile.call_args.args[0]) == 3
+    assert gep.reconcile.call_args.kwargs["delete_missing"] is False
+
+
+def test_daemon_deletes_only_with_the_complete_schedule(monkeypatch, page):
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.return_value = ReconcilePlan()
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": []}
+    with pytest.raises(ValueError):
+        ScheduleDaemon(gep, [team_config], year_filter=2025, delete_missing=True)
+
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    clock = Clock()
+    daemon = ScheduleDaemon(
+        gep,
+        [team_config],
+        parser="lxml",
+        max_results=None,
+        delete_missing=True,
+        now=clock,
+        sleep=clock.sleep,
+    )
+
+    daemon.run(max_cycles=1)
+
+    assert gep.reconcile.call_args.kwargs["delete_missing"] is True
+
+
+def test_daemon_exports_the_metrics_of_each_poll_cycle(monkeypatch, tmp_path, page):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    metrics.enable()
+    clock = Clock()
+    monkeypatch.setattr(
+        "app.daemon.BlszScraper.get_content_from_url", lambda *args: page
+    )
+    team_config = {"team_name": "SFC", "url": "url", "attendees_2024": []}
+    gep = Mock(spec=GameEventProcessor)
+    gep.reconcile.return_value = ReconcilePlan()
+    daemon = ScheduleDaemon(
+        gep,
+        [team_config],
+        parser="lxml",
+        metrics_dir=str(tmp_path),
+        now=clock,
+        sleep=clock.sleep,
+    )
+
+    daemon.run(max_cycles=3)
+
+    with open(tmp_path / "run_metrics.jsonl", encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f]
+    assert [run["counters"]["daemon_polls"] for run in runs] == [1, 1, 1]
+    assert [run["counters"].get("daemon_syncs", 0) for run in runs] == [1, 0, 0]
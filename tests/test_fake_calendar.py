@@ -0,0 +1,117 @@
+import pytest
+
+from datetime import datetime, timedelta
+from gcsa.event import Event
+from googleapiclient.errors import HttpError
+
+from app.game import Game
+from app.fake_calendar import FakeGoogleCalendar
+from app.calendar_batch import CalendarBatchWriter
+from app.calendar_mirror import CalendarMirror
+from app.game_event_processor import GameEventProcessor
+
+
+def make_games(count):
+    start = datetime.now() + timedelta(days=7)
+    return [
+        Game(
+            home_team="Team1",
+            away_team=f"Team{i + 2}",
+            venue="Venue",
+            date=(start + timedelta(days=i)).strftime("%Y. %m. %d.  %H:%M"),
+            division="Division",
+        )
+        for i in range(count)
+    ]
+
+
+def test_event_crud_round_trip():
+    calendar = FakeGoogleCalendar()
+    event = calendar.add_event(Event("Team1 - Team2", start=datetime(2030, 1, 1, 12)))
+
+    assert calendar.get_event(event.id).summary == "Team1 - Team2"
+
+    event.location = "Venue"
+    calendar.update_event(event)
+    assert calendar.get_event(event.id).location == "Venue"
+
+    calendar.delete_event(event)
+    with pytest.raises(HttpError) as e:
+        calendar.get_event(event.id)
+    assert e.value.resp.status == 404
+
+
+def test_get_events_filters():
+    calendar = FakeGoogleCalendar(page_size=2)
+    for game in make_games(5):
+        calendar.add_event(game.to_gc_event([]))
+    calendar.add_event(
+        Event(
+            "Team1 training",
+            start=datetime.now().replace(microsecond=0) + timedelta(days=1),
+        )
+    )
+
+    assert len(list(calendar.get_events(query="Team1"))) == 6
+    assert len(list(calendar.get_events(query="training"))) == 1
+    tagged = list(
+        calendar.get_events(sharedExtendedProperty="scraper_automatic_event=yes")
+    )
+    assert len(tagged) == 5
+    assert calendar.call_counts["list"] == 3 + 1 + 3
+
+
+def test_processor_reconcile_is_idempotent():
+    calendar = FakeGoogleCalendar()
+    gep = GameEventProcessor(calendar)
+    games = make_games(3)
+
+    assert len(gep.reconcile(games, ["email1"]).to_create) == 3
+    plan = gep.reconcile(games, ["email1"])
+
+    assert plan.is_empty
+    assert len(plan.unchanged) == 3
+    assert calendar.call_counts["insert"] == 3
+
+
+def test_injected_errors_in_batch():
+    calendar = FakeGoogleCalendar()
+    calendar.fail_next(429)
+    events = [game.to_gc_event([]) for game in make_games(2)]
+
+    results = CalendarBatchWriter(calendar).write(inserts=events)
+
+    assert [result.ok for result in results] == [False, True]
+    assert results[0].error.resp.status == 429
+    assert calendar.errors[429] == 1
+
+
+def test_quota_errors():
+    calendar = FakeGoogleCalendar(max_requests_per_second=2, quota_status=403)
+    calendar.add_event(Event("Event1", start=datetime(2030, 1, 1)))
+    calendar.add_event(Event("Event2", start=datetime(2030, 1, 1)))
+
+    with pytest.raises(HttpError) as e:
+        calendar.add_event(Event("Event3", start=datetime(2030, 1, 1)))
+
+    assert e.value.resp.status == 403
+    assert b"rateLimitExceeded" in e.value.content
+
+
+def test_sync_tokens(tmp_path):
+    calendar = FakeGoogleCalendar()
+    gep = GameEventProcessor(calendar)
+    gep.reconcile(make_games(3), [])
+    mirror = CalendarMirror(calendar, str(tmp_path / "mirror.json"))
+    mirror.sync()
+
+    calendar.delete_event(mirror.get_events()[0])
+    assert mirror.sync() == 1
+    assert len(mirror.events) == 2
+
+    calendar.expire_sync_tokens()
+    with pytest.raises(HttpError):
+        calendar.service.events().list(
+            calendarId="primary", syncToken=mirror.sync_token
+        ).execute()
+    assert mirror.sync() == 2
@@ -0,0 +1,185 @@
+import pytest
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from app.game import Game
+from app.fake_calendar import FakeGoogleCalendar
+from app.fan_out import (
+    CalendarTarget,
+    FanOutProcessor,
+    get_targets,
+    render_target_events,
+)
+
+TEAM_CONFIG = {
+    "team_name": "SFC",
+    "url": "http://example.com",
+    "attendees_2024": ["player1@example.com"],
+    "targets": [
+        {
+            "name": "players",
+            "calendar_id": "players@example.com",
+            "attendees": ["player1@example.com", "player2@example.com"],
+            "description": "players",
+        },
+        {
+            "name": "stewards",
+            "calendar_id": "stewards@example.com",
+            "attendees": ["steward@example.com"],
+            "description": "stewards",
+        },
+        {"name": "club", "description": "club"},
+    ],
+}
+
+
+def make_games(count):
+    start = datetime.now() + timedelta(days=7)
+    return [
+        Game(
+            home_team="Team1",
+            away_team=f"Team{i + 2}",
+            venue="Venue",
+            date=(start + timedelta(days=i)).strftime("%Y. %m. %d.  %H:%M"),
+            division="Division",
+        )
+        for i in range(count)
+    ]
+
+
+def test_get_targets():
+    targets = get_targets(TEAM_CONFIG, "primary@example.com")
+
+    assert [target.name for target in targets] == ["players", "stewards", "club"]
+    assert targets[0].attendees == ("player1@example.com", "player2@example.com")
+    assert targets[2] == CalendarTarget("club", "primary@example.com", (), "club")
+
+
+def test_get_targets_without_targets_config():
+    team_config = {key: value for key, value in TEAM_CONFIG.items() if key != "targets"}
+
+    assert get_targets(team_config, "primary@example.com") == [
+        CalendarTarget("SFC", "primary@example.com", ("player1@example.com",))
+    ]
+
+
+def test_get_targets_rejects_shared_calendars():
+    team_config = {
+        "team_name": "SFC",
+        "targets": [{"name": "players"}, {"name": "stewards"}],
+    }
+
+    with pytest.raises(ValueError):
+        get_targets(team_config, "primary@example.com")
+
+
+def test_unknown_description_variant():
+    with pytest.raises(ValueError):
+        CalendarTarget("players", "primary", description="coaches")
+
+
+def test_render_target_events_renders_each_variant_once(monkeypatch):
+    targets = get_targets(TEAM_CONFIG, "primary@example.com") + [
+        CalendarTarget("club2", "club2@example.com", description="club")
+    ]
+    get_description = Mock(side_effect=lambda variant: f"{variant} description")
+    monkeypatch.setattr(
+        Game, "get_description", lambda self, variant: get_description(variant)
+    )
+    game = make_games(1)[0]
+    to_gc_event = Mock(side_effect=Game.to_gc_event)
+    monkeypatch.setattr(
+        Game,
+        "to_gc_event",
+        lambda self, *args, **kwargs: to_gc_event(self, *args, **kwargs),
+    )
+
+    events = render_target_events([game], targets)
+
+    assert get_description.call_count == 3
+    assert to_gc_event.call_count == 3
+    players_event = events["players"][game.match_key]
+    assert players_event.description == "players description"
+    assert [attendee.email for attendee in players_event.attendees] == [
+        "player1@example.com",
+        "player2@example.com",
+    ]
+    assert events["club2"][game.match_key].description == "club description"
+    assert events["club2"][game.match_key] is not events["club"][game.match_key]
+    # the copies have the fingerprint of an event rendered with their attendees
+    expected_event = to_gc_event(
+        game, list(targets[0].attendees), description="players description"
+    )
+    assert (
+        players_event.other["extendedProperties"]
+        == expected_event.other["extendedProperties"]
+    )
+    assert events["stewards"][game.match_key].other["extendedProperties"] != (
+        events["club"][game.match_key].other["extendedProperties"]
+    )
+
+
+def test_sync_keeps_missing_events_by_default():
+    calendar = FakeGoogleCalendar()
+    fan_out = FanOutProcessor(
+        [CalendarTarget("club", "primary")], lambda calendar_id: calendar
+    )
+    games = make_games(3)
+    fan_out.sync(games)
+
+    fan_out.sync(games[:2])
+    assert calendar.call_counts["delete"] == 0
+
+    fan_out.sync(games[:2], delete_missing=True)
+    assert calendar.call_counts["delete"] == 0
+    fan_out.sync(games[::2], delete_missing=True)
+    assert calendar.call_counts["delete"] == 1
+
+
+def test_sync_writes_every_target_calendar():
+    calendars = {}
+
+    def client_factory(calendar_id):
+        return calendars.setdefault(calendar_id, FakeGoogleCalendar(calendar_id))
+
+    fan_out = FanOutProcessor(
+        get_targets(TEAM_CONFIG, "primary@example.com"), client_factory
+    )
+    games = make_games(3)
+
+    plans = fan_out.sync(games)
+
+    assert {name: len(plan.to_create) for name, plan in plans.items()} == {
+        "players": 3,
+        "stewards": 3,
+        "club": 3,
+    }
+    stewards_events = list(calendars["stewards@example.com"].get_events())
+    assert len(stewards_events) == 3
+    assert all("rendezőknek" in event.description for event in stewards_events)
+    assert all(
+        [attendee.email for attendee in event.attendees] == ["steward@example.com"]
+        for event in stewards_events
+    )
+    club_events = list(calendars["primary@example.com"].get_events())
+    assert [event.description for event in club_events] == [
+        "Division bajnoki mérkőzés"
+    ] * 3
+
+    # the second sync finds every event up to date in every calendar
+    plans = fan_out.sync(games)
+    assert all(plan.is_empty for plan in plans.values())
+    assert sum(calendar.call_counts["insert"] for calendar in calendars.values()) == 9
+
+
+def test_sync_dry_run_makes_no_writes():
+    calendar = FakeGoogleCalendar()
+    fan_out = FanOutProcessor(
+        get_targets(TEAM_CONFIG, "primary@example.com"), lambda calendar_id: calendar
+    )
+
+    plans = fan_out.sync(make_games(2), dry_run=True)
+
+    assert len(plans["players"].to_create) == 2
+    assert calendar.call_counts["insert"] == 0
@@ -1,7 +1,9 @@
 import pytest
+import pickle
 from unittest.mock import Mock
+from dataclasses import FrozenInstanceError
 from datetime import datetime, timedelta
-from app.game import Game
+from app.game import Game, get_event_fingerprint, parse_game_date
 
 HOME_TEAM_NAME = "Team1"
 
@@ -126,9 +128,80 @@ def test_to_gc_event(monkeypatch):
         "default_reminders": False,
         "reminders": mock_reminder("email", 60 * 48),
         "minutes_before_popup_reminder": 60 * 24,
-        "extendedProperties": {"public": {"scraper_automatic_event": "yes"}},
+        "extendedProperties": {
+            "shared": {
+                "scraper_automatic_event": "yes",
+                "scraper_match_key": "Division|Team1|Team2",
+                "scraper_fingerprint": get_event_fingerprint(
+                    {
+                        "summary": game.summary,
+                        "description": game.description,
+                        "location": game.venue,
+                        "start": game.start_datetime,
+                        "end": game.end_datetime,
+                        "attendees": attendees,
+                    }
+                ),
+            }
+        },
     }
     mock_event.assert_called_once_with(**expected_event_data)
 
     # Assert that the method returned the correct result
     assert result == mock_event.return_value
+
+
+def test_get_event_fingerprint():
+    event_data = {
+        "summary": "Team1 - Team2",
+        "description": "Description",
+        "location": "Venue",
+        "start": datetime(2022, 1, 1, 12),
+        "end": datetime(2022, 1, 1, 14),
+        "attendees": ["b@example.com", "a@example.com"],
+    }
+    fingerprint = get_event_fingerprint(event_data)
+
+    assert len(fingerprint) == 16
+    assert fingerprint == get_event_fingerprint(
+        {**event_data, "attendees": ["a@example.com", "b@example.com"]}
+    )
+    assert fingerprint != get_event_fingerprint(
+        {**event_data, "start": datetime(2022, 1, 8, 12)}
+    )
+
+
+def test_parse_game_date():
+    assert parse_game_date("2022. 01. 01.  12:00") == datetime(2022, 1, 1, 12, 0)
+    assert parse_game_date("2022. 1. 1.  12:00") == datetime(2022, 1, 1, 12, 0)
+
+    with pytest.raises(ValueError):
+        parse_game_date("2022. 13. 01.  12:00")
+    with pytest.raises(ValueError):
+        parse_game_date("dummy_date")
+
+
+def test_game_is_immutable():
+    game = Game(
+        home_team="Team1",
+        away_team="Team2",
+        venue="Venue",
+        date="2022. 01. 01.  12:00",
+        division="Division",
+    )
+
+    with pytest.raises(FrozenInstanceError):
+        game.date = "2022. 01. 02.  12:00"
+    assert not hasattr(game, "__dict__")
+    assert pickle.loads(pickle.dumps(game)) == game
+
+
+def test_game_invalid_date():
+    with pytest.raises(ValueError):
+        Game(
+            home_team="Team1",
+            away_team="Team2",
+            venue="Venue",
+            date="Halasztva",
+            division="Division",
+        )
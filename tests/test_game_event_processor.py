@@ -4,7 +4,8 @@ from unittest.mock import Mock, patch
 from gcsa.google_calendar import GoogleCalendar
 from gcsa.event import Event
 from app.game import Game
-from app.game_event_processor import GameEventProcessor
+from app.calendar_batch import WriteSummary
+from app.game_event_processor import GameEventProcessor, EVENT_LIST_FIELDS
 import datetime
 
 
@@ -151,5 +152,139 @@ def test_get_game_events(monkeypatch):
     events = gep.get_game_events(apply_date_filter=False)
 
     # Assert that get_events was called and the returned events are correct
-    mock_gc_client.get_events.assert_called_once_with(query="Svábhegy FC")
+    mock_gc_client.get_events.assert_called_once_with(
+        time_min=None,
+        sharedExtendedProperty="scraper_automatic_event=yes",
+        fields=EVENT_LIST_FIELDS,
+    )
     assert events == [mock_event]
+
+
+def test_list_events_filters_on_the_server(monkeypatch):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_gc_client.get_events.return_value = iter([])
+    gep = GameEventProcessor(mock_gc_client)
+    time_min = datetime.datetime(2025, 1, 1)
+
+    assert gep.list_events(time_min=time_min) == []
+
+    kwargs = mock_gc_client.get_events.call_args.kwargs
+    assert kwargs["time_min"] == time_min
+    assert kwargs["sharedExtendedProperty"] == "scraper_automatic_event=yes"
+    assert "query" not in kwargs
+    assert kwargs["fields"].startswith("nextPageToken,items(")
+    assert "extendedProperties" in kwargs["fields"]
+
+
+def test_create_game_events_use_batch(monkeypatch, make_game):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_writer = Mock()
+    mock_writer.return_value.write.return_value = []
+    monkeypatch.setattr("app.game_event_processor.CalendarBatchWriter", mock_writer)
+
+    gep = GameEventProcessor(mock_gc_client)
+    attendees = ["attendee1@example.com"]
+    game_event = make_game.to_gc_event(attendees)
+
+    summary = gep.create_game_events(
+        [make_game, make_game], attendees, apply_date_filter=False, use_batch=True
+    )
+
+    assert summary == WriteSummary()
+    mock_gc_client.add_event.assert_not_called()
+    mock_writer.return_value.write.assert_called_once_with(
+        [game_event, game_event], (), ()
+    )
+
+
+def test_create_game_events_use_batch_dry_run(monkeypatch, make_game):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_writer = Mock()
+    monkeypatch.setattr("app.game_event_processor.CalendarBatchWriter", mock_writer)
+
+    gep = GameEventProcessor(mock_gc_client)
+    summary = gep.create_game_events(
+        [make_game], [], apply_date_filter=False, dry_run=True, use_batch=True
+    )
+
+    assert summary.skipped == [("insert", make_game.to_gc_event([]))]
+    assert summary.summary() == "0 succeeded, 0 failed, 1 skipped"
+    mock_writer.assert_not_called()
+
+
+def test_create_game_events_skip_existing(monkeypatch, make_game):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    existing_event = make_game.to_gc_event([])
+    mock_gc_client.get_events.return_value = [existing_event]
+
+    gep = GameEventProcessor(mock_gc_client)
+    new_game = Game("Team1", "Team3", "Venue", "2022. 01. 08.  12:00", "Division")
+
+    gep.create_game_events(
+        [make_game, new_game], [], apply_date_filter=False, skip_existing=True
+    )
+
+    mock_gc_client.get_events.assert_called_once()
+    mock_gc_client.add_event.assert_called_once_with(
+        new_game.to_gc_event([]), send_updates="none"
+    )
+
+
+def test_create_game_events_concurrent(make_game):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    worker_client = Mock(spec=GoogleCalendar)
+    worker_client.add_event.side_effect = [Exception("Forbidden"), None]
+    gep = GameEventProcessor(
+        mock_gc_client, max_workers=2, client_factory=lambda: worker_client
+    )
+    new_game = Game("Team1", "Team3", "Venue", "2022. 01. 08.  12:00", "Division")
+
+    summary = gep.create_game_events([make_game, new_game], [], apply_date_filter=False)
+
+    mock_gc_client.add_event.assert_not_called()
+    assert worker_client.add_event.call_count == 2
+    assert summary.summary() == "1 succeeded, 1 failed, 0 skipped"
+    assert str(summary.failed[0].error) == "Forbidden"
+
+
+def test_create_game_events_sequential(make_game):
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_gc_client.add_event.side_effect = [Exception("Forbidden"), None]
+    gep = GameEventProcessor(mock_gc_client)
+    new_game = Game("Team1", "Team3", "Venue", "2022. 01. 08.  12:00", "Division")
+
+    summary = gep.create_game_events([make_game, new_game], [], apply_date_filter=False)
+
+    assert summary.summary() == "1 succeeded, 1 failed, 0 skipped"
+    assert summary.succeeded[0].event == new_game.to_gc_event([])
+    assert str(summary.failed[0].error) == "Forbidden"
+
+
+def test_delete_game_events_sequential_dry_run():
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_event = Mock(spec=Event)
+    mock_event.start = datetime.datetime.now() + datetime.timedelta(days=1)
+    mock_gc_client.get_events.return_value = [mock_event]
+    gep = GameEventProcessor(mock_gc_client)
+
+    summary = gep.delete_game_events(dry_run=True)
+
+    mock_gc_client.delete_event.assert_not_called()
+    assert summary.skipped == [("delete", mock_event)]
+
+
+def test_delete_game_events_concurrent_dry_run():
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_event = Mock(spec=Event)
+    mock_event.start = datetime.datetime.now() + datetime.timedelta(days=1)
+    mock_gc_client.get_events.return_value = [mock_event]
+    client_factory = Mock()
+    gep = GameEventProcessor(
+        mock_gc_client, max_workers=4, client_factory=client_factory
+    )
+
+    summary = gep.delete_game_events(dry_run=True)
+
+    client_factory.assert_not_called()
+    assert summary.results == []
+    assert summary.skipped == [("delete", mock_event)]
@@ -0,0 +1,99 @@
+import pytest
+
+from datetime import datetime
+
+from app.game import Game
+from app.game_table import GameTable
+from app.scraper import BlszScraper
+
+
+@pytest.fixture
+def games():
+    return [
+        Game("Team1", "Team2", "Venue1", "2022. 03. 01.  12:00", "Division"),
+        Game("Team3", "Team1", "Venue3", "2021. 12. 01.  12:00", "Division"),
+        Game("Team1", "Team3", "Venue1", "2022. 01. 15.  18:00", "Division"),
+        Game("Team4", "Team1", "Venue4", "2022. 02. 01.  10:00", "Division"),
+    ]
+
+
+@pytest.fixture
+def table(games):
+    return GameTable.from_games(games)
+
+
+def test_from_games_sorts_by_start(table, games):
+    assert len(table) == 4
+    assert table.to_games() == sorted(games, key=lambda game: game.start_datetime)
+    assert table[0] == games[1]
+
+
+def test_filter_year_and_range(table):
+    assert [game.date for game in table.filter(year=2021)] == ["2021. 12. 01.  12:00"]
+    assert [
+        game.date
+        for game in table.filter(
+            start=datetime(2022, 1, 15, 18), end=datetime(2022, 3, 1, 12)
+        )
+    ] == ["2022. 01. 15.  18:00", "2022. 02. 01.  10:00"]
+
+
+def test_filter_home_away_and_opponent(table, monkeypatch):
+    monkeypatch.setattr("app.game.HOME_TEAM_NAME", "Team1")
+
+    home_games = table.filter(home=True)
+    away_games = table.filter(year=2022, home=False)
+    team3_games = table.filter(opponent="Team3")
+
+    assert [game.away_team for game in home_games] == ["Team3", "Team2"]
+    assert [game.home_team for game in away_games] == ["Team4"]
+    assert [game.date for game in team3_games] == [
+        "2021. 12. 01.  12:00",
+        "2022. 01. 15.  18:00",
+    ]
+    assert len(table.filter(opponent="Unknown")) == 0
+
+
+def test_filter_rounds_the_bounds_up_to_whole_minutes(table):
+    assert [
+        game.date
+        for game in table.filter(
+            start=datetime(2022, 1, 15, 17, 59, 30), end=datetime(2022, 2, 1, 10, 0, 30)
+        )
+    ] == ["2022. 01. 15.  18:00", "2022. 02. 01.  10:00"]
+    assert len(table.filter(start=datetime(2022, 3, 1, 12, 0, 30))) == 0
+
+
+def test_filter_combines_the_team_filters(table, monkeypatch):
+    monkeypatch.setattr("app.game.HOME_TEAM_NAME", "Team1")
+
+    home_games = table.filter(year=2022, home=True, opponent="Team3")
+    away_games = table.filter(home=False, opponent="Team3")
+
+    assert [game.date for game in home_games] == ["2022. 01. 15.  18:00"]
+    assert [game.date for game in away_games] == ["2021. 12. 01.  12:00"]
+    assert home_games.categories is table.categories
+    assert home_games.filter(opponent="Team3").to_games() == home_games.to_games()
+
+
+def test_next_games(table):
+    next_games = table.next_games(2, after=datetime(2022, 1, 1))
+
+    assert [game.date for game in next_games] == [
+        "2022. 01. 15.  18:00",
+        "2022. 02. 01.  10:00",
+    ]
+    assert table.next_games(5, after=datetime(2022, 3, 1, 12)) == []
+
+
+def test_fetch_game_table():
+    with open("tests/data/test_adatbank.html", "rb") as f:
+        content = f.read()
+    scraper = BlszScraper.from_content("dummy_url", content, parser="lxml")
+
+    table = scraper.fetch_game_table(year_filter=2024)
+
+    assert len(table) == 15
+    assert sorted(table.to_games(), key=lambda game: game.date) == sorted(
+        scraper.fetch_games(year_filter=2024), key=lambda game: game.date
+    )
@@ -0,0 +1,213 @@
+import pytest
+import requests
+import threading
+
+from unittest.mock import Mock
+
+from app import metrics
+from app.metrics import Metrics
+from app.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceededError,
+    LatencyTracker,
+    ResilientHttp,
+    BACKOFF_MAX,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    HEDGE_MIN_SAMPLES,
+)
+
+URL = "https://adatbank.mlsz.hu/club/61/5/27291/1/268004.html"
+HOST = "adatbank.mlsz.hu"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_response(status_code=200, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+def make_http(responses, clock=None, **kwargs):
+    clock = clock or Clock()
+    session = Mock()
+    session.get.side_effect = responses
+    return ResilientHttp(session, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_get_sets_timeouts():
+    http = make_http([make_response()])
+
+    http.get(URL, headers={"If-None-Match": "etag"})
+
+    http.session.get.assert_called_once_with(
+        URL,
+        timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        headers={"If-None-Match": "etag"},
+    )
+
+
+def test_get_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    metrics.enable()
+    ok = make_response()
+    clock = Clock()
+    http = make_http(
+        [make_response(503), requests.ConnectionError("reset"), ok], clock=clock
+    )
+
+    assert http.get(URL) is ok
+
+    assert http.session.get.call_count == 3
+    assert len(clock.sleeps) == 2
+    assert all(0 <= delay <= BACKOFF_MAX for delay in clock.sleeps)
+    assert metrics.METRICS.counters["http_retries"] == 2
+
+
+def test_get_returns_the_last_error_response():
+    http = make_http([make_response(503)] * 4, max_retries=3)
+
+    assert http.get(URL).status_code == 503
+    assert http.session.get.call_count == 4
+
+
+def test_get_does_not_retry_client_errors():
+    http = make_http([make_response(404)])
+
+    assert http.get(URL).status_code == 404
+    assert http.session.get.call_count == 1
+
+
+def test_get_raises_after_the_last_retry():
+    http = make_http([requests.Timeout("read timeout")] * 2, max_retries=1)
+
+    with pytest.raises(requests.Timeout):
+        http.get(URL)
+
+
+def test_get_honors_retry_after():
+    clock = Clock()
+    http = make_http(
+        [make_response(429, {"Retry-After": "30"}), make_response()], clock=clock
+    )
+
+    http.get(URL)
+
+    assert clock.sleeps == [30.0]
+
+
+def test_deadline_cuts_timeouts_and_retries():
+    clock = Clock()
+    deadline = Deadline(5, clock=clock)
+    http = make_http([make_response(503)] * 4, clock=clock, deadline=deadline)
+    clock.now = 1
+    assert http.get_timeout() == (DEFAULT_CONNECT_TIMEOUT, 4)
+    clock.now = 4
+    assert http.get_timeout() == (1, 1)
+
+    clock.now = 5
+    with pytest.raises(DeadlineExceededError):
+        http.get(URL)
+    http.session.get.assert_not_called()
+
+
+def test_deadline_stops_retrying_before_the_backoff(monkeypatch):
+    monkeypatch.setattr("app.http_client.random.uniform", lambda a, b: b)
+    clock = Clock()
+    http = make_http(
+        [make_response(503), make_response()],
+        clock=clock,
+        deadline=Deadline(0.1, clock=clock),
+    )
+
+    assert http.get(URL).status_code == 503
+    assert clock.sleeps == []
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure(HOST)
+    assert breaker.allow(HOST)
+    breaker.record_failure(HOST)
+    assert not breaker.allow(HOST)
+
+    clock.now = 30
+    assert breaker.allow(HOST)
+    # only one trial request goes through
+    assert not breaker.allow(HOST)
+
+    breaker.record_success(HOST)
+    assert breaker.allow(HOST)
+
+
+def test_get_fails_fast_with_open_circuit():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, clock=clock)
+    http = make_http([make_response(503)] * 2, clock=clock, breaker=breaker)
+
+    with pytest.raises(CircuitOpenError):
+        http.get(URL)
+    assert http.session.get.call_count == 2
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker()
+    for seconds in range(HEDGE_MIN_SAMPLES - 1):
+        tracker.record(HOST, seconds)
+    assert tracker.percentile(HOST) is None
+
+    tracker.record(HOST, 100)
+    assert tracker.percentile(HOST) == 18
+
+
+def test_get_hedges_slow_requests():
+    release = threading.Event()
+    fast = make_response()
+
+    def get(url, **kwargs):
+        if get.calls == 0:
+            get.calls += 1
+            release.wait(5)
+            return make_response()
+        return fast
+
+    get.calls = 0
+    session = Mock()
+    session.get.side_effect = get
+    http = ResilientHttp(session, hedge=True)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        http.latencies.record(HOST, 0.01)
+
+    try:
+        assert http.get(URL) is fast
+    finally:
+        release.set()
+    assert session.get.call_count == 2
+    executor = http._executor
+    http.close()
+    assert executor._shutdown
+    session.close.assert_called_once_with()
+
+
+def test_close_without_hedging():
+    http = ResilientHttp()
+
+    assert http._executor is None
+    http.close()
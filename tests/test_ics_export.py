@@ -0,0 +1,143 @@
+import os
+import threading
+import pytest
+
+from datetime import datetime, timezone
+
+from app.game import Game
+from app.ics_export import (
+    CRLF,
+    MAX_LINE_OCTETS,
+    escape_text,
+    export_ics,
+    fold_line,
+    get_feed_file_name,
+    get_uid,
+    iter_calendar,
+)
+
+NOW = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def make_game(date="2025. 03. 01.  12:00", away_team="Team2, FC"):
+    return Game(
+        home_team="Team1",
+        away_team=away_team,
+        venue="Venue; Budapest",
+        date=date,
+        division="Division",
+    )
+
+
+def unfold(feed: str) -> list[str]:
+    return feed.replace(CRLF + " ", "").split(CRLF)
+
+
+def test_escape_text():
+    assert escape_text("a, b; c\\d\ne") == "a\\, b\\; c\\\\d\\ne"
+
+
+def test_fold_line():
+    assert fold_line("SUMMARY:short") == "SUMMARY:short" + CRLF
+
+    line = "DESCRIPTION:" + "árvíztűrő tükörfúrógép " * 10
+    folded = fold_line(line)
+
+    lines = folded.removesuffix(CRLF).split(CRLF)
+    assert len(lines) > 1
+    assert all(len(part.encode()) <= MAX_LINE_OCTETS for part in lines)
+    assert all(part.startswith(" ") for part in lines[1:])
+    assert "".join(lines[:1] + [part[1:] for part in lines[1:]]) == line
+
+
+def test_get_uid_is_stable_across_reschedules():
+    assert get_uid(make_game()) == get_uid(make_game(date="2025. 03. 08.  18:00"))
+    assert get_uid(make_game()) != get_uid(make_game(away_team="Team3"))
+    assert get_uid(make_game()).endswith("@blsz-scraper")
+
+
+def test_iter_calendar(monkeypatch):
+    monkeypatch.setattr("app.game.HOME_TEAM_NAME", "Team1")
+    games = [make_game(), make_game(), make_game(away_team="Team3")]
+
+    feed = "".join(iter_calendar(games, "Team1", now=NOW))
+
+    assert feed.endswith("END:VCALENDAR" + CRLF)
+    assert "\n" not in feed.replace(CRLF, "")
+    lines = unfold(feed)
+    assert lines[:4] == [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//blsz-scraper//Fixture schedule//HU",
+        "CALSCALE:GREGORIAN",
+    ]
+    assert "X-WR-CALNAME:Team1" in lines
+    assert "TZID:Europe/Budapest" in lines
+    # the duplicate fixture is exported once
+    assert lines.count("BEGIN:VEVENT") == 2
+    assert f"UID:{get_uid(games[0])}" in lines
+    assert "DTSTAMP:20250101T120000Z" in lines
+    assert "DTSTART;TZID=Europe/Budapest:20250301T120000" in lines
+    assert "DTEND;TZID=Europe/Budapest:20250301T140000" in lines
+    assert "SUMMARY:Team1 - Team2\\, FC" in lines
+    assert "LOCATION:Venue\\; Budapest" in lines
+    assert any(
+        line.startswith("DESCRIPTION:Division bajnoki mérkőzés") for line in lines
+    )
+
+
+def test_iter_calendar_streams_the_games():
+    def games():
+        yield make_game()
+        raise RuntimeError("the second game is never needed")
+
+    feed = iter_calendar(games(), now=NOW)
+    lines = []
+    while not lines or lines[-1] != "END:VEVENT" + CRLF:
+        lines.append(next(feed))
+
+    assert lines.count("BEGIN:VEVENT" + CRLF) == 1
+
+
+def test_export_ics_writes_atomically(tmp_path):
+    path = str(tmp_path / "feeds" / "team.ics")
+
+    export_ics(path, [make_game()], "Team1", now=NOW)
+
+    with open(path, "rb") as f:
+        content = f.read()
+    assert content.startswith(b"BEGIN:VCALENDAR\r\n")
+    assert content.count(b"BEGIN:VEVENT") == 1
+
+    def failing_games():
+        yield make_game()
+        raise RuntimeError("Scraping failed")
+
+    with pytest.raises(RuntimeError):
+        export_ics(path, failing_games(), "Team1", now=NOW)
+
+    # the previous feed is kept and no temporary file is left behind
+    with open(path, "rb") as f:
+        assert f.read() == content
+    assert os.listdir(tmp_path / "feeds") == ["team.ics"]
+
+
+def test_export_ics_temporary_file_is_unique_per_process_and_thread(
+    tmp_path, monkeypatch
+):
+    path = str(tmp_path / "team.ics")
+    replaced = []
+    replace = os.replace
+    monkeypatch.setattr(
+        "app.ics_export.os.replace",
+        lambda src, dst: replaced.append(src) or replace(src, dst),
+    )
+
+    export_ics(path, [make_game()], "Team1", now=NOW)
+
+    assert replaced == [f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"]
+
+
+def test_get_feed_file_name():
+    assert get_feed_file_name("SFC 2") == "SFC_2.ics"
+    assert get_feed_file_name("61/5/27291/1/268004") == "61_5_27291_1_268004.ics"
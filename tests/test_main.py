@@ -1,9 +1,15 @@
+import json
 import pytest
 
-from unittest.mock import Mock
+from datetime import datetime, timedelta
+from unittest.mock import ANY, Mock
 from gcsa.google_calendar import GoogleCalendar
 
-from app.main import main
+from app import metrics
+from app.main import main, create_team_events
+from app.fake_calendar import FakeGoogleCalendar, make_http_error
+from app.calendar_batch import WriteSummary
+from app.snapshot import SnapshotStore
 from app.game_event_processor import GameEventProcessor
 from app.scraper import BlszScraper
 from app.game import Game
@@ -26,12 +32,36 @@ def make_event(make_game):
     return make_game.to_gc_event(["email1"])
 
 
+@pytest.fixture(autouse=True)
+def cache_path(monkeypatch, tmp_path):
+    monkeypatch.setattr("app.main.get_cache_path", lambda: str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        "app.main.get_snapshot_path", lambda: str(tmp_path / "snapshots")
+    )
+    monkeypatch.setattr(
+        "app.main.get_rate_limit_path", lambda: str(tmp_path / "rate_limit.json")
+    )
+
+
 def test_main_create_mode(monkeypatch, make_game):
     # Mock the command line arguments
     mock_args = Mock()
     mock_args.mode = "C"
     mock_args.dry_run = False
     mock_args.limit = 10
+    mock_args.all_teams = False
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
     monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
 
     # Mock the config_parser function
@@ -40,28 +70,40 @@ def test_main_create_mode(monkeypatch, make_game):
     # Mock the get_config_by_team function
     monkeypatch.setattr(
         "app.main.get_config_by_team",
-        lambda *args: {"url": "http://example.com", "attendees_test": ["email1"]},
+        lambda *args: {"url": "http://example.com", "attendees_2024": ["email1"]},
     )
 
     # Mock the GoogleCalendar class
     mock_gc = Mock(spec=GoogleCalendar)
-    monkeypatch.setattr("app.main.GoogleCalendar", lambda *args, **kwargs: mock_gc)
+    monkeypatch.setattr(
+        "gcsa.google_calendar.GoogleCalendar", lambda *args, **kwargs: mock_gc
+    )
 
     # Mock the GameEventProcessor class
     mock_gep = Mock(spec=GameEventProcessor)
-    monkeypatch.setattr("app.main.GameEventProcessor", lambda *args: mock_gep)
+    monkeypatch.setattr(
+        "app.game_event_processor.GameEventProcessor", lambda *args, **kwargs: mock_gep
+    )
 
     # Mock the BlszScraper class
     mock_blsz_scraper = Mock(spec=BlszScraper)
-    monkeypatch.setattr("app.main.BlszScraper", lambda *args: mock_blsz_scraper)
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper", lambda *args, **kwargs: mock_blsz_scraper
+    )
     mock_blsz_scraper.fetch_games.return_value = [make_game]
 
     # Call the main function
     main()
 
-    mock_blsz_scraper.fetch_games.assert_called_once_with(year_filter=2024)
+    mock_blsz_scraper.fetch_games.assert_called_once_with(
+        year_filter=2025, max_results=10
+    )
     mock_gep.create_game_events.assert_called_once_with(
-        [make_game], attendees=["email1"], dry_run=False
+        [make_game],
+        attendees=["email1"],
+        dry_run=False,
+        use_batch=False,
+        skip_existing=True,
     )
 
 
@@ -71,6 +113,19 @@ def test_main_read_mode(monkeypatch, make_event):
     mock_args.mode = "R"
     mock_args.dry_run = False
     mock_args.limit = 10
+    mock_args.all_teams = False
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
     monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
 
     # Mock the config_parser function
@@ -84,16 +139,22 @@ def test_main_read_mode(monkeypatch, make_event):
 
     # Mock the GoogleCalendar class
     mock_gc = Mock(spec=GoogleCalendar)
-    monkeypatch.setattr("app.main.GoogleCalendar", lambda *args, **kwargs: mock_gc)
+    monkeypatch.setattr(
+        "gcsa.google_calendar.GoogleCalendar", lambda *args, **kwargs: mock_gc
+    )
 
     # Mock the GameEventProcessor class
     mock_gep = Mock(spec=GameEventProcessor)
-    monkeypatch.setattr("app.main.GameEventProcessor", lambda *args: mock_gep)
+    monkeypatch.setattr(
+        "app.game_event_processor.GameEventProcessor", lambda *args, **kwargs: mock_gep
+    )
     mock_gep.get_game_events.return_value = [make_event]
 
     # Mock the BlszScraper class
     mock_blsz_scraper = Mock(spec=BlszScraper)
-    monkeypatch.setattr("app.main.BlszScraper", lambda *args: mock_blsz_scraper)
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper", lambda *args, **kwargs: mock_blsz_scraper
+    )
 
     # Call the main function
     main()
@@ -101,3 +162,383 @@ def test_main_read_mode(monkeypatch, make_event):
     mock_blsz_scraper.fetch_games.assert_not_called()
     mock_gep.create_game_events.assert_not_called()
     mock_gep.get_game_events.assert_called_once_with(apply_date_filter=True)
+
+
+def test_main_create_mode_all_teams(monkeypatch, make_game):
+    # Mock the command line arguments
+    mock_args = Mock()
+    mock_args.mode = "C"
+    mock_args.dry_run = True
+    mock_args.limit = 10
+    mock_args.all_teams = True
+    mock_args.async_mode = False
+    mock_args.max_workers = 2
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+
+    schedules = [
+        {"team_name": "A", "url": "http://example.com/a", "attendees_2024": ["a"]},
+        {"team_name": "B", "url": "http://example.com/b", "attendees_2024": ["b"]},
+    ]
+    monkeypatch.setattr("app.main.config_parser", lambda: {"schedules": schedules})
+    monkeypatch.setattr("app.main.get_config_by_team", lambda *args: schedules[0])
+    monkeypatch.setattr(
+        "gcsa.google_calendar.GoogleCalendar", lambda *args, **kwargs: Mock()
+    )
+
+    mock_gep = Mock(spec=GameEventProcessor)
+    monkeypatch.setattr(
+        "app.game_event_processor.GameEventProcessor", lambda *args, **kwargs: mock_gep
+    )
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper", lambda *args, **kwargs: Mock(spec=BlszScraper)
+    )
+
+    mock_fetch_all = Mock(return_value={"A": [make_game], "B": []})
+    monkeypatch.setattr("app.scraper.fetch_all_team_games", mock_fetch_all)
+
+    main()
+
+    mock_fetch_all.assert_called_once_with(
+        schedules,
+        year_filter=2025,
+        max_results=10,
+        max_workers=2,
+        session=ANY,
+        cache=ANY,
+        parser="lxml",
+    )
+    assert mock_gep.create_game_events.call_count == 2
+    mock_gep.create_game_events.assert_any_call(
+        [make_game], attendees=["a"], dry_run=True, use_batch=False, skip_existing=True
+    )
+    mock_gep.create_game_events.assert_any_call(
+        [], attendees=["b"], dry_run=True, use_batch=False, skip_existing=True
+    )
+
+
+def test_main_create_mode_all_teams_async(monkeypatch, make_game):
+    # Mock the command line arguments
+    mock_args = Mock()
+    mock_args.mode = "C"
+    mock_args.dry_run = True
+    mock_args.limit = 10
+    mock_args.all_teams = True
+    mock_args.async_mode = True
+    mock_args.max_workers = 2
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+
+    schedules = [
+        {"team_name": "A", "url": "http://example.com/a", "attendees_2024": ["a"]}
+    ]
+    monkeypatch.setattr("app.main.config_parser", lambda: {"schedules": schedules})
+    monkeypatch.setattr("app.main.get_config_by_team", lambda *args: schedules[0])
+    monkeypatch.setattr(
+        "gcsa.google_calendar.GoogleCalendar", lambda *args, **kwargs: Mock()
+    )
+
+    mock_gep = Mock(spec=GameEventProcessor)
+    monkeypatch.setattr(
+        "app.game_event_processor.GameEventProcessor", lambda *args, **kwargs: mock_gep
+    )
+
+    async def mock_fetch_all_async(*args, **kwargs):
+        return {"A": [make_game]}
+
+    monkeypatch.setattr(
+        "app.async_scraper.fetch_all_team_games_async", mock_fetch_all_async
+    )
+    mock_fetch_all = Mock()
+    monkeypatch.setattr("app.scraper.fetch_all_team_games", mock_fetch_all)
+
+    main()
+
+    mock_fetch_all.assert_not_called()
+    mock_gep.create_game_events.assert_called_once_with(
+        [make_game], attendees=["a"], dry_run=True, use_batch=False, skip_existing=True
+    )
+
+
+def test_create_team_events_changed_only(tmp_path, make_game):
+    mock_gep = Mock(spec=GameEventProcessor)
+    mock_gep.create_game_events.return_value = WriteSummary()
+    snapshot_store = SnapshotStore(str(tmp_path))
+    team_config = {
+        "team_name": "A",
+        "url": "http://example.com/a",
+        "attendees_2024": [],
+    }
+    new_game = Game("Team3", "Team1", "Venue", "2022. 02. 01.  12:00", "Division")
+
+    create_team_events(mock_gep, team_config, [make_game], False, snapshot_store)
+    create_team_events(
+        mock_gep, team_config, [make_game, new_game], False, snapshot_store
+    )
+
+    assert mock_gep.create_game_events.call_args_list[0].args == ([make_game],)
+    assert mock_gep.create_game_events.call_args_list[1].args == ([new_game],)
+    assert snapshot_store.load("http://example.com/a") == [make_game, new_game]
+
+
+def test_main_exports_metrics(monkeypatch, tmp_path):
+    mock_args = Mock()
+    mock_args.mode = "R"
+    mock_args.dry_run = False
+    mock_args.limit = 10
+    mock_args.all_teams = False
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = str(tmp_path / "metrics")
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+    monkeypatch.setattr("app.main.config_parser", lambda: {})
+    monkeypatch.setattr(
+        "app.main.get_config_by_team", lambda *args: {"url": "http://example.com"}
+    )
+    monkeypatch.setattr(
+        "gcsa.google_calendar.GoogleCalendar",
+        lambda *args, **kwargs: FakeGoogleCalendar(),
+    )
+    monkeypatch.setattr(metrics.METRICS, "enabled", False)
+
+    main()
+
+    with open(tmp_path / "metrics" / "run_metrics.jsonl") as f:
+        snapshot = json.loads(f.readline())
+    assert snapshot["success"] is True
+    assert snapshot["phases"]["calendar_read"]["calls"] == 1
+    assert snapshot["counters"] == {"calendar_events_listed": 0}
+    with open(tmp_path / "metrics" / "blsz_scraper.prom") as f:
+        assert 'blsz_scraper_phase_calls{phase="calendar_read"} 1' in f.read()
+
+
+def test_create_team_events_saves_only_the_written_fixtures(tmp_path):
+    calendar = FakeGoogleCalendar()
+    add_event = calendar.add_event
+
+    def failing_add_event(event, **kwargs):
+        if event.summary == "Team1 - Team3":
+            raise make_http_error(500)
+        return add_event(event, **kwargs)
+
+    gep = GameEventProcessor(calendar)
+    snapshot_store = SnapshotStore(str(tmp_path))
+    team_config = {
+        "team_name": "A",
+        "url": "http://example.com/a",
+        "attendees_2024": [],
+    }
+    start = datetime.now() + timedelta(days=7)
+    game, other_game = [
+        Game(
+            "Team1",
+            away_team,
+            "Venue",
+            (start + timedelta(days=days)).strftime("%Y. %m. %d.  12:00"),
+            "D",
+        )
+        for away_team, days in (("Team2", 0), ("Team3", 1))
+    ]
+
+    calendar.add_event = failing_add_event
+    create_team_events(gep, team_config, [game, other_game], False, snapshot_store)
+
+    # the failed fixture is left out of the snapshot, so the next run retries it
+    assert snapshot_store.load(team_config["url"]) == [game]
+
+    calendar.add_event = add_event
+    rescheduled_game = Game(
+        "Team1",
+        "Team2",
+        "Venue",
+        (start + timedelta(days=2)).strftime("%Y. %m. %d.  18:00"),
+        "D",
+    )
+    create_team_events(
+        gep, team_config, [rescheduled_game, other_game], False, snapshot_store
+    )
+
+    assert snapshot_store.load(team_config["url"]) == [rescheduled_game, other_game]
+    events = {event.summary: event for event in gep.get_game_events()}
+    assert set(events) == {"Team1 - Team2", "Team1 - Team3"}
+    assert events["Team1 - Team2"].start.replace(tzinfo=None) == (
+        rescheduled_game.start_datetime
+    )
+
+
+def test_main_daemon_mode(monkeypatch):
+    mock_args = Mock()
+    mock_args.mode = None
+    mock_args.dry_run = True
+    mock_args.limit = 10
+    mock_args.all_teams = True
+    mock_args.max_workers = 2
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = True
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+    schedules = [{"team_name": "SFC", "url": "http://example.com"}]
+    monkeypatch.setattr("app.main.config_parser", lambda: {"schedules": schedules})
+    monkeypatch.setattr("app.main.get_config_by_team", lambda *args: schedules[0])
+    monkeypatch.setattr("gcsa.google_calendar.GoogleCalendar", Mock())
+    mock_daemon = Mock()
+    monkeypatch.setattr("app.daemon.ScheduleDaemon", mock_daemon)
+
+    main()
+
+    args, kwargs = mock_daemon.call_args
+    assert args[1] == schedules
+    assert kwargs["dry_run"] is True
+    assert kwargs["max_results"] == 10
+    assert kwargs["delete_missing"] is False
+    mock_daemon.return_value.run.assert_called_once_with()
+
+
+def test_main_update_mode_fans_out_to_targets(monkeypatch, make_game):
+    mock_args = Mock()
+    mock_args.mode = "U"
+    mock_args.dry_run = False
+    mock_args.limit = 10
+    mock_args.all_teams = False
+    mock_args.cache_max_age = 0
+    mock_args.changed_only = False
+    mock_args.batch = False
+    mock_args.use_mirror = False
+    mock_args.calendar_workers = 1
+    mock_args.metrics_dir = None
+    mock_args.daemon = False
+    mock_args.deadline = None
+    mock_args.hedge = False
+    mock_args.delete_missing = False
+    mock_args.state_store = False
+    mock_args.parser = "lxml"
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+    team_config = {
+        "team_name": "SFC",
+        "url": "http://example.com",
+        "targets": [
+            {"name": "players", "attendees": ["player@example.com"]},
+            {"name": "stewards", "calendar_id": "stewards@example.com"},
+        ],
+    }
+    monkeypatch.setattr("app.main.config_parser", lambda: {"schedules": [team_config]})
+    monkeypatch.setattr("app.main.get_config_by_team", lambda *args: team_config)
+    calendars = {}
+
+    def make_calendar(calendar_id, **kwargs):
+        return calendars.setdefault(calendar_id, FakeGoogleCalendar(calendar_id))
+
+    monkeypatch.setattr("gcsa.google_calendar.GoogleCalendar", make_calendar)
+    monkeypatch.setattr("app.fan_out.GoogleCalendar", make_calendar)
+    mock_blsz_scraper = Mock(spec=BlszScraper)
+    mock_blsz_scraper.fetch_games.return_value = [
+        Game("Team1", "Team2", "Venue", "2099. 01. 01.  12:00", "Division")
+    ]
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper", lambda *args, **kwargs: mock_blsz_scraper
+    )
+    monkeypatch.setattr("app.main.SENDER_MAIL", "sender@example.com")
+
+    main()
+
+    mock_blsz_scraper.fetch_games.assert_called_once()
+    assert calendars["sender@example.com"].call_counts["insert"] == 1
+    assert calendars["stewards@example.com"].call_counts["insert"] == 1
+
+
+def test_create_team_events_fans_out_to_targets(monkeypatch, tmp_path):
+    calendars = {"primary": FakeGoogleCalendar()}
+
+    def make_calendar(calendar_id, **kwargs):
+        return calendars.setdefault(calendar_id, FakeGoogleCalendar(calendar_id))
+
+    monkeypatch.setattr("app.fan_out.GoogleCalendar", make_calendar)
+    gep = GameEventProcessor(calendars["primary"])
+    team_config = {
+        "team_name": "SFC",
+        "url": "http://example.com",
+        "targets": [
+            {"name": "players", "attendees": ["player@example.com"]},
+            {"name": "stewards", "calendar_id": "stewards@example.com"},
+        ],
+    }
+    start = datetime.now() + timedelta(days=7)
+    games = [
+        Game("Team1", f"Team{i}", "Venue", start.strftime("%Y. %m. %d.  %H:%M"), "D")
+        for i in range(2, 4)
+    ]
+    snapshot_store = SnapshotStore(str(tmp_path / "snapshots"))
+
+    create_team_events(gep, team_config, games[:1], False, snapshot_store)
+    create_team_events(gep, team_config, games, False, snapshot_store)
+
+    # only the new fixture is written in the second run, nothing is deleted
+    assert calendars["primary"].call_counts["insert"] == 2
+    assert calendars["stewards@example.com"].call_counts["insert"] == 2
+    assert calendars["stewards@example.com"].call_counts["delete"] == 0
+    attendees = calendars["primary"].get_events()
+    assert [len(event.attendees) for event in attendees] == [1, 1]
+
+
+def test_main_read_mode_offline(monkeypatch, tmp_path, make_game):
+    mock_args = Mock()
+    mock_args.mode = "R"
+    mock_args.dry_run = False
+    mock_args.limit = 10
+    mock_args.daemon = False
+    mock_args.metrics_dir = None
+    mock_args.state_store = True
+    mock_args.reseed_state = False
+    monkeypatch.setattr("argparse.ArgumentParser.parse_args", lambda *args: mock_args)
+    state_path = str(tmp_path / "state.sqlite3")
+    monkeypatch.setattr("app.main.get_state_path", lambda: state_path)
+    monkeypatch.setattr("app.main.SENDER_MAIL", "primary")
+    get_events = Mock(return_value=[])
+    monkeypatch.setattr("app.state_store.StateStore.get_events", get_events)
+    calendar = Mock(side_effect=AssertionError("the calendar is not used"))
+    monkeypatch.setattr("gcsa.google_calendar.GoogleCalendar", calendar)
+    monkeypatch.setattr("app.main.config_parser", calendar)
+
+    main()
+
+    get_events.assert_called_once_with("primary", time_min=ANY)
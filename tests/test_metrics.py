@@ -0,0 +1,72 @@
+import json
+import threading
+
+from app import metrics
+from app.metrics import Metrics
+
+
+def test_disabled_metrics_record_nothing():
+    run_metrics = Metrics()
+
+    with run_metrics.phase("fetch"):
+        run_metrics.increment("bytes_downloaded", 100)
+
+    snapshot = run_metrics.snapshot()
+    assert snapshot["phases"]["fetch"] == {"seconds": 0, "calls": 0}
+    assert snapshot["counters"] == {}
+    assert run_metrics.phase("fetch") is run_metrics.phase("parse")
+
+
+def test_phases_and_counters():
+    run_metrics = Metrics(enabled=True)
+
+    def work():
+        for _ in range(100):
+            with run_metrics.phase("parse"):
+                run_metrics.increment("bytes_downloaded", 10)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = run_metrics.snapshot()
+    assert snapshot["phases"]["parse"]["calls"] == 400
+    assert snapshot["phases"]["parse"]["seconds"] > 0
+    assert snapshot["counters"] == {"bytes_downloaded": 4000}
+
+
+def test_phase_is_recorded_on_error():
+    run_metrics = Metrics(enabled=True)
+
+    try:
+        with run_metrics.phase("fetch"):
+            raise RuntimeError("timeout")
+    except RuntimeError:
+        pass
+
+    assert run_metrics.snapshot()["phases"]["fetch"]["calls"] == 1
+
+
+def test_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    metrics.enable()
+    with metrics.phase("calendar_write"):
+        metrics.increment("calendar_writes", 3)
+
+    metrics.export(str(tmp_path), success=False)
+    metrics.export(str(tmp_path))
+
+    with open(tmp_path / "run_metrics.jsonl") as f:
+        runs = [json.loads(line) for line in f]
+    assert [run["success"] for run in runs] == [False, True]
+    assert runs[0]["counters"] == {"calendar_writes": 3}
+
+    with open(tmp_path / "blsz_scraper.prom") as f:
+        textfile = f.read()
+    assert "# TYPE blsz_scraper_phase_seconds gauge" in textfile
+    assert 'blsz_scraper_phase_calls{phase="calendar_write"} 1' in textfile
+    assert 'blsz_scraper_phase_calls{phase="fetch"} 0' in textfile
+    assert "blsz_scraper_calendar_writes 3" in textfile
+    assert "blsz_scraper_last_run_success 1" in textfile
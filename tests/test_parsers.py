@@ -0,0 +1,74 @@
+import pytest
+
+from app.parsers import (
+    LxmlParserBackend,
+    ParserBackend,
+    SoupParserBackend,
+    get_parser_backend,
+    PARSER_BACKENDS,
+)
+from app.scraper import BlszScraper
+
+
+@pytest.fixture
+def html_content():
+    with open("tests/data/test_adatbank.html", "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def fetch_games_with_parser(monkeypatch, html_content):
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper.get_content_from_url",
+        lambda self, _: html_content,
+    )
+
+    def fetch_games(parser):
+        return BlszScraper("dummy_url", parser=parser).fetch_games()
+
+    return fetch_games
+
+
+@pytest.mark.parametrize("parser", list(PARSER_BACKENDS))
+def test_parsers_produce_identical_games(fetch_games_with_parser, parser):
+    expected_games = fetch_games_with_parser("html.parser")
+
+    games = fetch_games_with_parser(parser)
+
+    assert len(games) == 30
+    assert games == expected_games
+
+
+def test_lxml_parser_backend(html_content):
+    parser = LxmlParserBackend()
+    document = parser.parse(html_content)
+
+    fixtures = parser.get_schedule_table(document)
+
+    assert len(fixtures) == 30
+    assert parser.get_division(document) == "BLSZ I. osztály"
+    assert parser.get_match_fields(fixtures[0]) == {
+        "home_team": "XII. KERÜLET SVÁBHEGY FC",
+        "away_team": "1908 SZAC BUDAPEST",
+        "date": "2023. 08. 18.  20:00",
+        "venue": "BVSC Utánpótlás Labdarúgó Centrum",
+    }
+
+
+def test_get_parser_backend():
+    assert isinstance(get_parser_backend("html.parser"), SoupParserBackend)
+    assert isinstance(get_parser_backend("lxml"), LxmlParserBackend)
+
+    with pytest.raises(ValueError):
+        get_parser_backend("unknown")
+
+
+def test_parser_backend_is_abstract():
+    class PartialParserBackend(ParserBackend):
+        def parse(self, content):
+            return content
+
+    with pytest.raises(TypeError):
+        ParserBackend()
+    with pytest.raises(TypeError):
+        PartialParserBackend()
@@ -0,0 +1,180 @@
+import pytest
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from app import metrics
+from app.game import Game
+from app.metrics import Metrics
+from app.fake_calendar import FakeGoogleCalendar, make_http_error
+from app.calendar_batch import CalendarBatchWriter
+from app.calendar_executor import CalendarPoolExecutor
+from app.game_event_processor import GameEventProcessor
+from app.rate_limiter import (
+    AdaptiveRateLimiter,
+    is_rate_limit_error,
+    RATE_INCREASE,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock, **kwargs):
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def make_events(count):
+    start = datetime.now() + timedelta(days=7)
+    return [
+        Game(
+            home_team="Team1",
+            away_team=f"Team{i + 2}",
+            venue="Venue",
+            date=(start + timedelta(days=i)).strftime("%Y. %m. %d.  %H:%M"),
+            division="Division",
+        ).to_gc_event([])
+        for i in range(count)
+    ]
+
+
+def test_is_rate_limit_error():
+    assert is_rate_limit_error(make_http_error(429))
+    assert is_rate_limit_error(make_http_error(403))
+    assert is_rate_limit_error(make_http_error(403, "userRateLimitExceeded"))
+    assert not is_rate_limit_error(make_http_error(403, "forbidden"))
+    assert not is_rate_limit_error(make_http_error(503))
+    assert not is_rate_limit_error(ValueError("rateLimitExceeded"))
+
+
+def test_acquire_spends_the_burst_then_waits(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    metrics.enable()
+    clock = Clock()
+    limiter = make_limiter(clock, rate=2, burst=2)
+
+    assert [limiter.acquire() for _ in range(4)] == [0, 0, 0.5, 0.5]
+    assert clock.sleeps == [0.5, 0.5]
+    assert metrics.METRICS.counters["rate_limit_sleeps"] == 2
+    assert metrics.METRICS.counters["rate_limit_sleep_seconds"] == 1
+
+    # a batch request takes a token per call
+    clock.now += 10
+    assert limiter.acquire(4) == 1
+
+
+def test_rate_adapts_to_the_quota_errors():
+    clock = Clock()
+    limiter = make_limiter(clock, rate=2, min_rate=0.5, max_rate=2.2)
+
+    limiter.record_success()
+    assert limiter.rate == pytest.approx(2 + RATE_INCREASE)
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.rate == 2.2
+
+    limiter.record_throttle()
+    assert limiter.rate == 1.1
+    # the saved up tokens are dropped after a quota error
+    assert limiter.acquire() == pytest.approx(1 / 1.1)
+    limiter.record_throttle()
+    limiter.record_throttle()
+    assert limiter.rate == 0.5
+
+
+def test_call_retries_throttled_calls(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    metrics.enable()
+    clock = Clock()
+    limiter = make_limiter(clock, rate=2)
+    func = Mock(side_effect=[make_http_error(429), make_http_error(403), "created"])
+
+    assert limiter.call(func, "event", send_updates="none") == "created"
+
+    assert func.call_count == 3
+    func.assert_called_with("event", send_updates="none")
+    assert limiter.rate == pytest.approx(0.5 + RATE_INCREASE)
+    assert metrics.METRICS.counters["rate_limit_retries"] == 2
+    assert metrics.METRICS.counters["rate_limit_throttles"] == 2
+
+
+def test_call_raises_other_errors_and_the_last_quota_error():
+    clock = Clock()
+    limiter = make_limiter(clock, max_retries=1)
+
+    with pytest.raises(ValueError):
+        limiter.call(Mock(side_effect=ValueError("invalid event")))
+    with pytest.raises(Exception) as exc_info:
+        limiter.call(Mock(side_effect=[make_http_error(429)] * 2))
+    assert is_rate_limit_error(exc_info.value)
+
+
+def test_state_is_shared_through_the_file(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "rate_limit.json")
+    limiter = make_limiter(clock, path=path, rate=1, burst=1)
+    other_limiter = make_limiter(clock, path=path, rate=1, burst=1)
+
+    assert limiter.acquire() == 0
+    # the token was taken by the other process
+    assert other_limiter.acquire() == 1
+    other_limiter.record_throttle()
+    assert limiter.rate == 0.5
+
+
+def test_batch_writer_retries_throttled_calls():
+    calendar = FakeGoogleCalendar()
+    calendar.fail_next(429, count=2)
+    clock = Clock()
+    limiter = make_limiter(clock, rate=2)
+    writer = CalendarBatchWriter(calendar, batch_size=2, rate_limiter=limiter)
+
+    results = writer.write(inserts=make_events(3))
+
+    assert all(result.ok for result in results)
+    assert calendar.call_counts["insert"] == 5
+    assert calendar.call_counts["batch"] == 3
+    assert len(calendar.calendars["primary"]) == 3
+    assert limiter.rate == pytest.approx(1 + RATE_INCREASE)
+
+
+def test_executor_retries_throttled_calls():
+    calendar = FakeGoogleCalendar()
+    calendar.fail_next(403)
+    limiter = make_limiter(Clock())
+    executor = CalendarPoolExecutor(
+        lambda: calendar, max_workers=2, rate_limiter=limiter
+    )
+
+    results = executor.write(inserts=make_events(2))
+
+    assert all(result.ok for result in results)
+    assert len(calendar.calendars["primary"]) == 2
+
+
+def test_create_game_events_uses_the_rate_limiter():
+    calendar = FakeGoogleCalendar()
+    calendar.fail_next(429)
+    clock = Clock()
+    gep = GameEventProcessor(calendar, rate_limiter=make_limiter(clock, burst=1))
+    start = datetime.now() + timedelta(days=7)
+    games = [
+        Game("Team1", f"Team{i}", "Venue", start.strftime("%Y. %m. %d.  %H:%M"), "D")
+        for i in range(3)
+    ]
+
+    gep.create_game_events(games, [])
+
+    assert len(calendar.calendars["primary"]) == 3
+    # paced by the limiter instead of a fixed 20 second sleep per event
+    assert clock.sleeps and max(clock.sleeps) < 20
@@ -0,0 +1,224 @@
+import pytest
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from gcsa.event import Event
+from gcsa.google_calendar import GoogleCalendar
+
+from app.game import Game, FINGERPRINT_PROPERTY
+from app.fake_calendar import FakeGoogleCalendar
+from app.game_event_processor import GameEventProcessor
+from app.reconcile import build_reconcile_plan, get_match_key
+
+NOW = datetime(2022, 1, 1)
+ATTENDEES = ["attendee1@example.com"]
+
+
+def make_game(away_team="Team2", date="2022. 02. 01.  12:00", venue="Venue"):
+    return Game(
+        home_team="Team1",
+        away_team=away_team,
+        venue=venue,
+        date=date,
+        division="Division",
+    )
+
+
+def make_existing_event(game, event_id):
+    event = game.to_gc_event(ATTENDEES)
+    event.event_id = event_id
+    return event
+
+
+def test_build_reconcile_plan():
+    unchanged = make_game("Team2")
+    rescheduled = make_game("Team3")
+    removed = make_game("Team4")
+    added = make_game("Team5")
+    past = make_game("Team6", date="2021. 12. 01.  12:00")
+    existing_events = [
+        make_existing_event(unchanged, "e1"),
+        make_existing_event(rescheduled, "e2"),
+        make_existing_event(removed, "e3"),
+        make_existing_event(unchanged, "e4"),
+    ]
+
+    plan = build_reconcile_plan(
+        [unchanged, make_game("Team3", date="2022. 02. 08.  12:00"), added, past],
+        existing_events,
+        ATTENDEES,
+        delete_missing=True,
+        now=NOW,
+    )
+
+    assert [event.summary for event in plan.to_create] == ["Team1 - Team5"]
+    assert [patch.id for patch in plan.to_update] == ["e2"]
+    assert plan.to_update[0].event.start == datetime(2022, 2, 8, 12)
+    assert plan.to_update[0].fields == ("start", "end")
+    assert sorted(event.event_id for event in plan.to_delete) == ["e3", "e4"]
+    assert [event.event_id for event in plan.unchanged] == ["e1"]
+
+
+def test_build_reconcile_plan_keeps_missing_events_by_default():
+    scraped = make_game("Team2")
+    missing = make_game("Team3", date="2022. 02. 08.  12:00")
+    existing_events = [
+        make_existing_event(scraped, "e1"),
+        make_existing_event(missing, "e2"),
+        make_existing_event(scraped, "e3"),
+    ]
+
+    plan = build_reconcile_plan([scraped], existing_events, ATTENDEES, now=NOW)
+
+    # only the duplicate is deleted
+    assert [event.event_id for event in plan.to_delete] == ["e3"]
+
+
+def test_build_reconcile_plan_deletes_only_within_the_scraped_time_span():
+    games = [make_game("Team2"), make_game("Team3", date="2022. 02. 15.  12:00")]
+    inside = make_game("Team4", date="2022. 02. 08.  12:00")
+    after = make_game("Team5", date="2022. 03. 01.  12:00")
+    existing_events = [
+        make_existing_event(inside, "e1"),
+        make_existing_event(after, "e2"),
+    ]
+
+    plan = build_reconcile_plan(
+        games, existing_events, ATTENDEES, delete_missing=True, now=NOW
+    )
+
+    assert [event.event_id for event in plan.to_delete] == ["e1"]
+
+
+def test_update_game_events_keeps_the_events_of_a_truncated_game_list():
+    calendar = FakeGoogleCalendar()
+    gep = GameEventProcessor(calendar)
+    start = datetime.now() + timedelta(days=7)
+    games = [
+        make_game(
+            f"Team{i}", date=(start + timedelta(days=i)).strftime("%Y. %m. %d.  12:00")
+        )
+        for i in range(6)
+    ]
+    gep.reconcile(games, ATTENDEES)
+
+    # e.g. the first --limit games of the schedule
+    plan = gep.update_game_events(games[:3], ATTENDEES)
+
+    assert plan.to_delete == []
+    assert len(gep.list_scraper_events()) == 6
+
+
+def test_build_reconcile_plan_keeps_other_divisions():
+    other_division_game = Game(
+        "Team1", "Team9", "Venue", "2022. 02. 01.  12:00", "Other division"
+    )
+    existing_events = [make_existing_event(other_division_game, "e1")]
+
+    plan = build_reconcile_plan([make_game()], existing_events, ATTENDEES, now=NOW)
+
+    assert len(plan.to_create) == 1
+    assert plan.to_delete == []
+
+
+def test_build_reconcile_plan_trusts_equal_fingerprints():
+    game = make_game()
+    existing_event = make_existing_event(game, "e1")
+    # a difference the fingerprint does not cover is not compared field by field
+    existing_event.location = "Other venue"
+
+    plan = build_reconcile_plan([game], [existing_event], ATTENDEES, now=NOW)
+
+    assert plan.is_empty
+    assert plan.unchanged == [existing_event]
+
+
+def test_build_reconcile_plan_adds_missing_fingerprint():
+    game = make_game()
+    existing_event = make_existing_event(game, "e1")
+    del existing_event.other["extendedProperties"]["shared"][FINGERPRINT_PROPERTY]
+
+    plan = build_reconcile_plan([game], [existing_event], ATTENDEES, now=NOW)
+
+    assert [patch.id for patch in plan.to_update] == ["e1"]
+    assert plan.to_update[0].fields == ()
+    assert set(plan.to_update[0].body()) == {"extendedProperties"}
+
+
+def test_get_match_key_falls_back_to_summary():
+    event = make_existing_event(make_game(), "e1")
+    assert get_match_key(event) == "Division|Team1|Team2"
+
+    event.other = {}
+    assert get_match_key(event) == "Team1 - Team2"
+
+
+def test_reconcile_no_op_makes_no_writes(monkeypatch):
+    game = make_game(date="2099. 02. 01.  12:00")
+    mock_gc_client = Mock(spec=GoogleCalendar)
+    mock_gc_client.get_events.return_value = [make_existing_event(game, "e1")]
+    mock_writer = Mock()
+    monkeypatch.setattr("app.game_event_processor.CalendarBatchWriter", mock_writer)
+
+    plan = GameEventProcessor(mock_gc_client).reconcile([game], ATTENDEES)
+
+    assert plan.is_empty
+    mock_gc_client.get_events.assert_called_once()
+    assert mock_gc_client.get_events.call_args.kwargs["sharedExtendedProperty"] == (
+        "scraper_automatic_event=yes"
+    )
+    mock_writer.assert_not_called()
+    mock_gc_client.add_event.assert_not_called()
+
+
+def add_baseline_event(calendar, game):
+    """Adds an event the way the versions before the shared tag created it"""
+
+    event = game.to_gc_event(ATTENDEES)
+    event.other = {"extendedProperties": {"public": {"scraper_automatic_event": "yes"}}}
+    return calendar.add_event(event)
+
+
+@pytest.mark.parametrize("mode", ["C", "U"])
+def test_baseline_events_are_tagged_instead_of_duplicated(monkeypatch, mode):
+    monkeypatch.setattr("app.game_event_processor.HOME_TEAM_NAME", "Team1")
+    calendar = FakeGoogleCalendar()
+    start = datetime.now() + timedelta(days=7)
+    games = [
+        make_game(
+            away_team, date=(start + timedelta(days=i)).strftime("%Y. %m. %d.  12:00")
+        )
+        for i, away_team in enumerate(("Team2", "Team3"))
+    ]
+    baseline_event = add_baseline_event(calendar, games[0])
+    # an event of the team created by hand is not touched
+    calendar.add_event(
+        Event("Team1 training", start=start, end=start + timedelta(hours=1))
+    )
+    gep = GameEventProcessor(calendar)
+
+    if mode == "C":
+        summary = gep.create_game_events(games, ATTENDEES, skip_existing=True)
+        assert summary.summary() == "2 succeeded, 0 failed, 0 skipped"
+    else:
+        plan = gep.reconcile(games, ATTENDEES)
+        assert len(plan.to_create) == 1
+        assert len(plan.to_update) == 1
+
+    assert calendar.call_counts["insert"] == 3
+    assert calendar.call_counts["delete"] == 0
+    events = {get_match_key(event): event for event in gep.list_events()}
+    assert set(events) == {game.match_key for game in games}
+    assert events[games[0].match_key].event_id == baseline_event.event_id
+    assert (
+        events[games[0].match_key].other["extendedProperties"]["shared"][
+            FINGERPRINT_PROPERTY
+        ]
+        == games[0]
+        .to_gc_event(ATTENDEES)
+        .other["extendedProperties"]["shared"][FINGERPRINT_PROPERTY]
+    )
+
+    # the next run finds the tagged event
+    plan = gep.reconcile(games, ATTENDEES)
+    assert plan.is_empty
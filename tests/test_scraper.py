@@ -1,9 +1,11 @@
 import pytest
+import datetime
 from bs4 import BeautifulSoup, Tag, ResultSet
 from unittest.mock import Mock
 
-from app.scraper import BlszScraper
+from app.scraper import BlszScraper, fetch_all_team_games
 from app.game import Game
+from app.parsers import SoupParserBackend
 
 
 @pytest.fixture
@@ -39,7 +41,7 @@ def test_get_soup_from_url(monkeypatch):
 
     mock_response = Mock()
     mock_response.content = mock_html_content.encode()
-    monkeypatch.setattr("requests.get", lambda _: mock_response)
+    monkeypatch.setattr("requests.get", lambda url, **kwargs: mock_response)
 
     scraper = BlszScraper("dummy_url")
     soup = scraper.get_soup_from_url("dummy_url")
@@ -166,3 +168,83 @@ def test_fetch_games(monkeypatch, mock_soup):
             "division": "BLSZ I. osztály",
         }
     )
+
+
+def test_fetch_all_team_games(monkeypatch, mock_soup):
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper.get_soup_from_url", lambda self, _: mock_soup
+    )
+    session = Mock()
+    schedules = [
+        {"team_name": "A", "url": "http://example.com/a"},
+        {"team_name": "B", "url": "http://example.com/b"},
+    ]
+
+    games_by_team = fetch_all_team_games(
+        schedules, year_filter=2024, max_workers=2, session=session
+    )
+
+    assert list(games_by_team) == ["A", "B"]
+    assert len(games_by_team["A"]) == 15
+    assert games_by_team["A"] == games_by_team["B"]
+
+
+def test_get_soup_from_url_uses_session():
+    with open("tests/data/test_adatbank.html") as f:
+        mock_html_content = f.read()
+
+    session = Mock()
+    session.get.return_value.content = mock_html_content.encode()
+
+    scraper = BlszScraper("dummy_url", session=session)
+
+    assert scraper.division == "BLSZ I. osztály"
+    session.get.assert_called_once_with("dummy_url")
+
+
+def test_scraper_is_lazy():
+    session = Mock()
+
+    BlszScraper("dummy_url", session=session)
+
+    session.get.assert_not_called()
+
+
+def test_iter_games_stops_at_limit(monkeypatch, mock_soup):
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper.get_soup_from_url", lambda self, _: mock_soup
+    )
+    extracted = []
+    get_match_fields = SoupParserBackend.get_match_fields
+
+    def tracking_get_match_fields(self, fixture):
+        extracted.append(fixture)
+        return get_match_fields(self, fixture)
+
+    monkeypatch.setattr(
+        "app.parsers.SoupParserBackend.get_match_fields", tracking_get_match_fields
+    )
+
+    scraper = BlszScraper("dummy_url")
+    games = scraper.iter_games(year_filter=2023, limit=3)
+
+    assert next(games).date == "2023. 08. 18.  20:00"
+    assert len(extracted) == 1
+    assert len(list(games)) == 2
+    assert len(extracted) == 3
+
+
+def test_iter_games_date_range(monkeypatch, mock_soup):
+    monkeypatch.setattr(
+        "app.scraper.BlszScraper.get_soup_from_url", lambda self, _: mock_soup
+    )
+
+    scraper = BlszScraper("dummy_url")
+    games = list(
+        scraper.iter_games(
+            start=datetime.datetime(2024, 2, 23, 19, 30),
+            end=datetime.datetime(2024, 3, 1),
+        )
+    )
+
+    assert [game.date for game in games] == ["2024. 02. 23.  19:30"]
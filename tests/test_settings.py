@@ -0,0 +1,16 @@
+from unittest.mock import Mock
+
+from app import settings
+
+
+def test_env_is_loaded_once(monkeypatch):
+    mock_load_dotenv = Mock()
+    monkeypatch.setattr("app.settings.load_dotenv", mock_load_dotenv)
+    monkeypatch.setenv("TEAM_NAME", "Team1")
+    settings.load_env.cache_clear()
+
+    assert settings.get_env("TEAM_NAME") == "Team1"
+    assert settings.get_env("MISSING_VARIABLE", "default") == "default"
+
+    mock_load_dotenv.assert_called_once_with(override=True)
+    settings.load_env.cache_clear()
@@ -0,0 +1,70 @@
+import pytest
+
+from app.game import Game
+from app.snapshot import SnapshotStore, diff_games
+
+
+def make_game(away_team="Team2", date="2022. 01. 01.  12:00", venue="Venue"):
+    return Game(
+        home_team="Team1",
+        away_team=away_team,
+        venue=venue,
+        date=date,
+        division="Division",
+    )
+
+
+def test_diff_games():
+    unchanged = make_game("Team2")
+    rescheduled_old = make_game("Team3")
+    rescheduled_new = make_game("Team3", date="2022. 01. 08.  12:00")
+    moved_old = make_game("Team4")
+    moved_new = make_game("Team4", venue="Other venue")
+    removed = make_game("Team5")
+    added = make_game("Team6")
+
+    diff = diff_games(
+        [unchanged, rescheduled_old, moved_old, removed],
+        [unchanged, rescheduled_new, moved_new, added],
+    )
+
+    assert diff.has_changes
+    assert diff.added == [added]
+    assert diff.rescheduled == [(rescheduled_old, rescheduled_new)]
+    assert diff.venue_changed == [(moved_old, moved_new)]
+    assert diff.removed == [removed]
+    assert diff.changed_games == [added, rescheduled_new, moved_new]
+    assert diff.summary() == "1 new, 1 rescheduled, 1 venue changed, 1 removed"
+
+
+def test_diff_games_without_changes():
+    games = [make_game("Team2"), make_game("Team3")]
+
+    diff = diff_games(games, list(games))
+
+    assert not diff.has_changes
+
+
+def test_snapshot_store_roundtrip(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    games = [make_game("Team2"), make_game("Team3")]
+
+    assert store.load("http://example.com") is None
+
+    store.save("http://example.com", games)
+
+    assert store.load("http://example.com") == games
+    assert store.load("http://example.com/other") is None
+
+
+def test_snapshot_store_iter_snapshots(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save("url1", [make_game()])
+    store.save("url2", [make_game("Team3"), make_game("Team4")])
+
+    snapshots = dict(store.iter_snapshots())
+
+    assert snapshots == {
+        "url1": [make_game()],
+        "url2": [make_game("Team3"), make_game("Team4")],
+    }
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cumulative import time of app.main, about 70 ms with the deferred imports and 700 ms without
+IMPORT_TIME_BUDGET_US = 250_000
+HEAVY_PACKAGES = {
+    "gcsa",
+    "googleapiclient",
+    "bs4",
+    "lxml",
+    "requests",
+    "aiohttp",
+    "asyncio",
+}
+# the event model of gcsa is light, its Google API client is not
+OFFLINE_READ_PACKAGES = HEAVY_PACKAGES - {"gcsa"}
+
+# runs the offline --mode R with a state store in a temporary folder and prints the
+# loaded top level packages
+OFFLINE_READ_SCRIPT = """
+import sys, json, tempfile, contextlib, io
+import app.main
+
+with tempfile.TemporaryDirectory() as state_dir:
+    app.main.get_state_path = lambda: state_dir + "/state.sqlite3"
+    sys.argv = ["main", "--mode", "R", "--state_store"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.main.main()
+print(json.dumps(sorted({module.split(".")[0] for module in sys.modules})))
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def get_import_time_us(module: str) -> int:
+    """Returns the cumulative import time of the module reported by -X importtime"""
+
+    stderr = run_python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+
+    raise AssertionError(f"{module} not found in the import time report")
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    stdout = run_python(
+        "-c", "import sys, json, app.main; print(json.dumps(sorted(sys.modules)))"
+    ).stdout
+    loaded = {module.split(".")[0] for module in json.loads(stdout)}
+
+    assert loaded & HEAVY_PACKAGES == set()
+
+
+def test_offline_read_does_not_load_the_api_client():
+    loaded = set(json.loads(run_python("-c", OFFLINE_READ_SCRIPT).stdout))
+
+    assert "sqlite3" in loaded
+    assert loaded & OFFLINE_READ_PACKAGES == set()
+
+
+def test_cli_import_time_budget():
+    # best of three runs, to keep the scheduling noise of the test machine out
+    import_time_us = min(get_import_time_us("app.main") for _ in range(3))
+
+    assert import_time_us < IMPORT_TIME_BUDGET_US
+
+
+def test_cli_help():
+    stdout = run_python("-m", "app.main", "--help").stdout
+
+    assert "--daemon" in stdout
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta, timezone
+
+from app.game import Game, MATCH_KEY_PROPERTY
+from app.fake_calendar import FakeGoogleCalendar
+from app.calendar_batch import WriteResult
+from app.game_event_processor import GameEventProcessor
+from app.state_store import StateStore, to_utc_text
+
+ATTENDEES = ["attendee1@example.com"]
+
+
+def make_game(away_team="Team2", days=7, hour=12):
+    date = datetime.now() + timedelta(days=days)
+    return Game(
+        home_team="Team1",
+        away_team=away_team,
+        venue="Venue",
+        date=date.strftime(f"%Y. %m. %d.  {hour}:00"),
+        division="Division",
+    )
+
+
+def make_created_event(game, event_id):
+    event = game.to_gc_event(ATTENDEES)
+    event.event_id = event_id
+    return event
+
+
+def test_to_utc_text():
+    assert (
+        to_utc_text({"dateTime": "2025-03-01T12:00:00+01:00"})
+        == "2025-03-01T11:00:00+00:00"
+    )
+    assert to_utc_text({"date": "2025-03-01"}) == "2025-03-01T00:00:00+00:00"
+
+
+def test_record_results(tmp_path):
+    store = StateStore(str(tmp_path / "state.sqlite3"))
+    first, second = make_game("Team2", days=14), make_game("Team3", days=7)
+    first_event = make_created_event(first, "e1")
+    second_event = make_created_event(second, "e2")
+
+    recorded = store.record_results(
+        "primary",
+        [
+            WriteResult("insert", first, True, response=first_event),
+            WriteResult("insert", second, True, response=second_event),
+            WriteResult("insert", make_game("Team4"), False, error=Exception()),
+        ],
+    )
+
+    assert recorded == 2
+    record = store.get("primary", first.match_key)
+    assert record.event_id == "e1"
+    assert record.fingerprint is not None
+    assert store.get_by_event_id("primary", "e2").fixture_key == second.match_key
+    assert store.get("other", first.match_key) is None
+    # ordered by start
+    assert [event.id for event in store.get_events("primary")] == ["e2", "e1"]
+    time_min = datetime.now(timezone.utc) + timedelta(days=10)
+    assert [event.id for event in store.get_events("primary", time_min)] == ["e1"]
+
+    store.record_results(
+        "primary",
+        [
+            WriteResult("delete", second_event, True),
+            WriteResult("delete", first_event, False, error=Exception()),
+        ],
+    )
+
+    assert store.get("primary", second.match_key) is None
+    # the store is persisted
+    assert StateStore(store.path).get("primary", first.match_key).event_id == "e1"
+
+
+def test_seed_replaces_the_calendar_events():
+    store = StateStore(":memory:")
+    game = make_game()
+    store.record_results(
+        "primary",
+        [WriteResult("insert", game, True, response=make_created_event(game, "old"))],
+    )
+    assert not store.is_seeded("primary")
+
+    duplicates = [make_created_event(game, "e1"), make_created_event(game, "e2")]
+    store.seed("primary", duplicates)
+
+    assert store.is_seeded("primary")
+    assert sorted(event.id for event in store.get_events("primary")) == ["e1", "e2"]
+
+
+def test_is_stale():
+    store = StateStore(":memory:", max_age=3600)
+    assert store.is_stale("primary")
+
+    store.seed("primary", [])
+    assert not store.is_stale("primary")
+
+    with store.connection:
+        store.connection.execute(
+            "UPDATE calendars SET seeded_at = ?",
+            ((datetime.now(timezone.utc) - timedelta(hours=2)).isoformat(),),
+        )
+    assert store.is_stale("primary")
+    store.max_age = None
+    assert not store.is_stale("primary")
+
+
+def test_stale_store_is_seeded_again():
+    calendar = FakeGoogleCalendar()
+    store = StateStore(":memory:", max_age=0)
+    gep = GameEventProcessor(calendar, state_store=store)
+    game = make_game()
+    gep.reconcile([game], ATTENDEES)
+    # an event deleted outside the scraper
+    calendar.delete_event(gep.get_game_events()[0])
+
+    plan = gep.reconcile([game], ATTENDEES)
+
+    # every reconcile and read lists the calendar again with max_age 0
+    assert calendar.call_counts["list"] == 3
+    assert len(plan.to_create) == 1
+
+
+def test_reconcile_reads_the_state_store():
+    calendar = FakeGoogleCalendar()
+    store = StateStore(":memory:")
+    gep = GameEventProcessor(calendar, state_store=store)
+    games = [make_game("Team2"), make_game("Team3", days=14)]
+
+    plan = gep.reconcile(games, ATTENDEES)
+
+    assert len(plan.to_create) == 2
+    assert calendar.call_counts["list"] == 1
+    records = store.get_records("primary")
+    assert {record.fixture_key for record in records} == {
+        game.match_key for game in games
+    }
+
+    # later runs only query the store
+    games[0] = make_game("Team2", hour=18)
+    games.append(make_game("Team4", days=10))
+    plan = gep.reconcile(games[::2], ATTENDEES, delete_missing=True)
+
+    assert calendar.call_counts["list"] == 1
+    assert [patch.fields for patch in plan.to_update] == [
+        ("description", "start", "end")
+    ]
+    assert [event.summary for event in plan.to_create] == ["Team1 - Team4"]
+    assert plan.to_delete == []
+    stored_event = store.get("primary", games[0].match_key).to_event()
+    assert stored_event.start.hour == 18
+
+    # the Team4 event is after the only scraped game, it is kept
+    plan = gep.reconcile(games[:1], ATTENDEES, delete_missing=True)
+    assert plan.to_delete == []
+
+    plan = gep.reconcile(games[:2], ATTENDEES, delete_missing=True)
+    assert [event.summary for event in plan.to_delete] == ["Team1 - Team4"]
+    assert store.get("primary", games[2].match_key) is None
+    assert [event.id for event in gep.get_game_events(apply_date_filter=True)] == [
+        stored_event.id,
+        store.get("primary", games[1].match_key).event_id,
+    ]
+
+
+def test_state_store_is_per_calendar():
+    calendar = FakeGoogleCalendar()
+    other_calendar = FakeGoogleCalendar("other")
+    store = StateStore(":memory:")
+    game = make_game()
+
+    GameEventProcessor(calendar, state_store=store).reconcile([game], ATTENDEES)
+    plan = GameEventProcessor(other_calendar, state_store=store).reconcile(
+        [game], ATTENDEES
+    )
+
+    assert len(plan.to_create) == 1
+    record = store.get("other", game.match_key)
+    assert record.event_id != store.get("primary", game.match_key).event_id
+    shared_properties = record.event_json["extendedProperties"]["shared"]
+    assert shared_properties[MATCH_KEY_PROPERTY] == game.match_key